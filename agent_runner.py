@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+from typing import Any, List, Optional
+
+from agents import Agent, ModelBehaviorError, Runner
+
+from depth import current_budget
+from disk_cache import cache_key, cache_get, cache_set
+from instrumentation import span, record_agent_result
+from output_parsing import TolerantOutputSchema, parse_output
+from run_context import bump
+from scheduler import get_scheduler
+from utils import estimate_tokens
+
+# Opt-in LLM response cache.
+#   off    - always call the model (default)
+#   record - serve byte-identical requests from the cache, store every new response
+#   replay - serve only from the cache; a miss raises LLMCacheMiss (offline, deterministic runs)
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off").lower()
+# In record mode: "all" caches every step, "planning" only the steps whose input depends
+# on framework/topic/section alone (complexity, query generation) so re-runs still do
+# fresh research. Replay always covers every step.
+LLM_CACHE_SCOPE = os.getenv("LLM_CACHE_SCOPE", "all").lower()
+PLANNING_STEPS = {"complexity", "query_gen", "planner"}
+# Output tokens reserved up front per agent run; corrected with real usage afterwards.
+LLM_OUTPUT_TOKENS_ESTIMATE = int(os.getenv("LLM_OUTPUT_TOKENS_ESTIMATE", "2000"))
+# Extra attempts for a step whose reply could not be parsed even after repair. A retry
+# continues the failed conversation (tool results included), so it costs one more model
+# turn, not a re-run of the step's searches.
+STEP_RETRIES = int(os.getenv("STEP_RETRIES", "1"))
+
+
+class LLMCacheMiss(RuntimeError):
+    pass
+
+
+class CachedRunResult:
+    """Minimal stand-in for agents.RunResult when a response comes from the cache."""
+
+    cached = True
+
+    def __init__(self, final_output: Any) -> None:
+        self.final_output = final_output
+        self.new_items: List[Any] = []
+        self.raw_responses: List[Any] = []
+        self.context_wrapper = None
+
+
+def _instructions_hash(agent: Agent) -> str:
+    instructions = agent.instructions if isinstance(agent.instructions, str) else repr(agent.instructions)
+    return hashlib.sha256(instructions.encode("utf-8")).hexdigest()
+
+
+def agent_cache_key(agent: Agent, messages: List[dict]) -> str:
+    return cache_key(agent.name, _instructions_hash(agent), str(agent.model), messages)
+
+
+def _serializable(output: Any) -> Any:
+    if hasattr(output, "model_dump"):
+        return output.model_dump()
+    try:
+        json.dumps(output)
+        return output
+    except TypeError:
+        return str(output)
+
+
+def _cache_enabled_for(step: Optional[str]) -> bool:
+    if LLM_CACHE_MODE == "replay":
+        return True
+    if LLM_CACHE_MODE != "record":
+        return False
+    return LLM_CACHE_SCOPE == "all" or step in PLANNING_STEPS
+
+
+async def _run_limited(agent: Agent, messages: List[dict], **kwargs):
+    """Runner.run under the process-wide LLM tokens-per-minute budget."""
+    instructions = agent.instructions if isinstance(agent.instructions, str) else ""
+    estimate = estimate_tokens(messages) + estimate_tokens(instructions) + LLM_OUTPUT_TOKENS_ESTIMATE
+    sched = get_scheduler()
+    async with sched.slot("llm", weight=estimate):
+        result = await Runner.run(agent, messages, **kwargs)
+    usage = getattr(getattr(result, "context_wrapper", None), "usage", None)
+    if usage is not None and usage.total_tokens:
+        sched.limiters["llm"].adjust(estimate - usage.total_tokens)
+    return result
+
+
+def _charge_budget(context_wrapper: Any) -> None:
+    usage = getattr(context_wrapper, "usage", None)
+    budget = current_budget()
+    if budget is not None and usage is not None:
+        budget.add_tokens(usage.total_tokens)
+
+
+def _retry_messages(error: ModelBehaviorError) -> List[Any]:
+    """The failed run's conversation so far plus a request to answer again in the schema."""
+    run_data = error.run_data
+    history = list(run_data.input) if isinstance(run_data.input, list) else [{"role": "user", "content": run_data.input}]
+    history.extend(item.to_input_item() for item in run_data.new_items)
+    history.append({"role": "user", "content": (
+        f"Your last reply could not be used ({error.message[:200]}). Reply again with ONLY the JSON object "
+        "in the required schema, built from the results above; do not call tools again."
+    )})
+    return history
+
+
+async def run_agent(agent: Agent, messages: List[dict], step: Optional[str] = None, **kwargs):
+    """
+    Drop-in for Runner.run(agent, messages) used by every pipeline step.
+
+    `step` names the pipeline step ("complexity", "query_gen", "researcher", ...) and
+    decides cache eligibility under LLM_CACHE_SCOPE. Model calls wait for the shared
+    LLM token budget; cache hits do not. Each call is recorded as a span named `step`, and
+    its tokens are charged to the current section budget (depth.py). A reply that is
+    unusable even after repair (ModelBehaviorError) is retried up to STEP_RETRIES times
+    from where it failed, counted as `retries_<step>`; the last error is re-raised.
+    """
+    for attempt in range(STEP_RETRIES + 1):
+        try:
+            async with span(step or agent.name, agent=agent.name, attempt=attempt):
+                result = await _run_agent_cached(agent, messages, step, **kwargs)
+                record_agent_result(result)
+        except ModelBehaviorError as e:
+            if e.run_data is None:
+                raise
+            _charge_budget(e.run_data.context_wrapper)
+            if attempt == STEP_RETRIES:
+                raise
+            bump(f"retries_{step or agent.name}")
+            print(f"[{step or agent.name}] unusable reply, retrying: {e.message[:120]}")
+            messages = _retry_messages(e)
+            continue
+        _charge_budget(getattr(result, "context_wrapper", None))
+        return result
+
+
+async def _run_agent_cached(agent: Agent, messages: List[dict], step: Optional[str], **kwargs):
+    if not _cache_enabled_for(step):
+        return await _run_limited(agent, messages, **kwargs)
+
+    key = agent_cache_key(agent, messages)
+    hit = await cache_get("llm", key)
+    if hit is not None:
+        output = hit["final_output"]
+        if isinstance(agent.output_type, TolerantOutputSchema):
+            # entries recorded before structured outputs hold the raw reply text
+            output = parse_output(output, agent.output_type.model, agent.output_type.step)
+        return CachedRunResult(output)
+    if LLM_CACHE_MODE == "replay":
+        raise LLMCacheMiss(f"no recorded response for {agent.name} (step={step})")
+
+    result = await _run_limited(agent, messages, **kwargs)
+    await cache_set("llm", key, {"agent": agent.name, "final_output": _serializable(result.final_output)})
+    return result
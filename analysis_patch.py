@@ -0,0 +1,66 @@
+from copy import deepcopy
+from typing import Any, Dict, List, Optional, Set
+
+from fact_dedup import conflict_groups, conflict_kind
+
+# Incremental self-healing: after gap-filling research the analyst sees only its previous
+# analysis and the new facts and returns an AnalystPatch; the patch is applied here, so the
+# cost of a self-healing round follows the new evidence instead of the whole fact table.
+
+
+def _as_bullet(bullet: Any) -> Dict[str, Any]:
+    return bullet if isinstance(bullet, dict) else {"text": str(bullet), "evidence_ids": []}
+
+
+def apply_analyst_patch(previous: Dict[str, Any], patch: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    New analysis = `previous` with `patch` applied (previous is not modified).
+
+    Bullet updates replace the text and add evidence_ids; removals and updates use indexes
+    into previous["bullets"], out-of-range ones are ignored. add_* lists are appended without
+    duplicates; ranked_options and gaps_next replace the previous lists when present.
+    """
+    result = deepcopy(previous)
+    if not patch:
+        return result
+    bullets = [_as_bullet(b) for b in result.get("bullets", [])]
+    for update in patch.get("update_bullets", []):
+        i = update.get("index")
+        if not isinstance(i, int) or not 0 <= i < len(bullets):
+            continue
+        ids = list(dict.fromkeys(list(bullets[i].get("evidence_ids", [])) + list(update.get("evidence_ids", []))))
+        bullets[i] = {**bullets[i], "text": update.get("text") or bullets[i].get("text", ""), "evidence_ids": ids}
+    removed = {i for i in patch.get("remove_bullets", []) if isinstance(i, int)}
+    bullets = [b for i, b in enumerate(bullets) if i not in removed]
+    bullets.extend(_as_bullet(b) for b in patch.get("add_bullets", []))
+    result["bullets"] = bullets
+
+    for key in ("mini_takeaways", "conflicts", "assumptions_to_test"):
+        current = list(result.get(key, []))
+        current.extend(x for x in patch.get(f"add_{key}", []) if x not in current)
+        if current or key in result:
+            result[key] = current
+    for key in ("ranked_options", "gaps_next"):
+        if patch.get(key) is not None:
+            result[key] = patch[key]
+    return result
+
+
+def detect_new_conflicts(facts: List[Dict[str, Any]], new_ids: Set[str],
+                         known: List[Dict[str, Any]], prefix: str = "") -> List[Dict[str, Any]]:
+    """
+    Conflicts (analyst `conflicts` entries) between new and earlier facts of `facts`, found
+    with fact_dedup.conflict_groups. Groups whose members are all already listed together in
+    `known` are skipped.
+    """
+    covered = [set(c.get("members", [])) for c in known if isinstance(c, dict)]
+    found = []
+    for k, members in enumerate(conflict_groups(facts), 1):
+        ids = [facts[i].get("fact_id") for i in members]
+        if not any(i in new_ids for i in ids) or all(i in new_ids for i in ids):
+            continue
+        if any(set(ids) <= c for c in covered):
+            continue
+        group = next((facts[i]["conflict_group_id"] for i in members if facts[i].get("conflict_group_id")), f"cg_{prefix}{k}")
+        found.append({"group": group, "what_differs": conflict_kind([facts[i] for i in members]), "members": ids})
+    return found
@@ -0,0 +1,162 @@
+"""
+Headless batch runner: research many topics without the Gradio UI.
+
+    python batch_runner.py topics.txt --out results.jsonl --workers 4
+    cat topics.jsonl | python batch_runner.py - --framework specific-idea
+
+Input is one topic per line, either plain text (uses --framework), "framework<TAB>topic",
+or JSON {"topic": ..., "framework": ...}. Each finished topic is appended to the output
+JSONL as it completes; topics already recorded as "ok" there are skipped on re-run, and
+failed ones resume from their run-store checkpoints.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FRAMEWORKS = ("big-idea", "specific-idea")
+
+# Process-wide limits that every worker must share; each worker gets an equal slice.
+_SHARED_LIMITS = {"LLM_TPM": "400000", "SEARCH_QPS": "5", "BROWSER_MAX_PAGES": "8"}
+
+
+def parse_topics(lines: Iterable[str], default_framework: str) -> List[Tuple[str, str]]:
+    topics = []
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            item = json.loads(line)
+            framework, topic = item.get("framework", default_framework), item["topic"]
+        elif "\t" in line and line.split("\t", 1)[0] in FRAMEWORKS:
+            framework, topic = line.split("\t", 1)
+        else:
+            framework, topic = default_framework, line
+        if framework not in FRAMEWORKS:
+            raise ValueError(f"unknown framework {framework!r} for topic {topic!r}")
+        topics.append((framework, topic.strip()))
+    return topics
+
+
+def load_previous(path: str) -> Tuple[set, Dict[Tuple[str, str], str]]:
+    """(done topic keys, failed topic key -> trace_id to resume) from an earlier output file."""
+    done, failed = set(), {}
+    if not os.path.exists(path):
+        return done, failed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partial line from an interrupted write
+            key = (rec.get("framework"), rec.get("topic"))
+            if rec.get("status") == "ok":
+                done.add(key)
+                failed.pop(key, None)
+            elif rec.get("trace_id") and key not in done:
+                failed[key] = rec["trace_id"]
+    return done, failed
+
+
+# ------------- Worker process -------------
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _init_worker(workers: int) -> None:
+    # Split the shared limits before scheduler.py reads them at import time.
+    for name, default in _SHARED_LIMITS.items():
+        total = float(os.getenv(name, default))
+        share = total / workers
+        os.environ[name] = str(share) if name == "SEARCH_QPS" else str(max(1, int(share)) if total > 0 else 0)
+    global _loop
+    # One loop per worker for its whole life, so per-loop pools (HTTP, browsers) are reused across topics.
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+
+
+async def _research(framework: str, topic: str, resume_trace_id: Optional[str], trace_id: str) -> Dict:
+    from orchestrator import run_framework_parallel_stream
+
+    report, failures = None, []
+    async for text, data in run_framework_parallel_stream(framework, topic, resume_trace_id=resume_trace_id, trace_id=trace_id):
+        failures.extend(line for line in text.splitlines() if line.startswith(("⚠️", "❌")))
+        if isinstance(data, dict) and not data.get("partial"):
+            report = data
+    if report is None:
+        raise RuntimeError("; ".join(failures) or "run produced no report")
+    return {"report": report, "warnings": failures}
+
+
+def _run_topic(framework: str, topic: str, resume_trace_id: Optional[str]) -> Dict:
+    from agents import gen_trace_id
+
+    trace_id = resume_trace_id or gen_trace_id()
+    t0 = time.perf_counter()
+    record = {"framework": framework, "topic": topic, "trace_id": trace_id, "pid": os.getpid()}
+    try:
+        record.update(_loop.run_until_complete(_research(framework, topic, resume_trace_id, trace_id)))
+        record["status"] = "ok"
+    except Exception as e:
+        record.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    record["elapsed_s"] = round(time.perf_counter() - t0, 1)
+    return record
+
+
+# ------------- Driver -------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run ReallyDeepResearch over many topics without the UI.")
+    parser.add_argument("input", help="topics file, or - for stdin")
+    parser.add_argument("--out", default="batch_results.jsonl", help="JSONL output (appended; used to skip done topics)")
+    parser.add_argument("--framework", default="big-idea", choices=FRAMEWORKS, help="framework for plain-text lines")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, os.cpu_count() or 1)),
+                        help="worker processes; rate limits (LLM_TPM, SEARCH_QPS, BROWSER_MAX_PAGES) are split between them")
+    parser.add_argument("--depth", choices=("shallow", "standard", "deep"),
+                        help="research depth budget for every topic (default: DEFAULT_DEPTH or standard)")
+    args = parser.parse_args(argv)
+    if args.depth:
+        os.environ["DEFAULT_DEPTH"] = args.depth  # inherited by the spawned workers
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    with source:
+        topics = parse_topics(source, args.framework)
+    done, failed = load_previous(args.out)
+    todo = [(fw, t) for fw, t in dict.fromkeys(topics) if (fw, t) not in done]
+    print(f"[batch] {len(topics)} topics, {len(topics) - len(todo)} already done, {len(todo)} to run on {args.workers} workers")
+    if not todo:
+        return 0
+
+    t0 = time.perf_counter()
+    ok = errors = 0
+    ctx = multiprocessing.get_context("spawn")  # fresh interpreter: no inherited loops or browser handles
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(args.workers,)) as pool, open(args.out, "a", encoding="utf-8") as out:
+        futures = {pool.submit(_run_topic, fw, t, failed.get((fw, t))): (fw, t) for fw, t in todo}
+        for n, fut in enumerate(as_completed(futures), start=1):
+            fw, t = futures[fut]
+            try:
+                record = fut.result()
+            except Exception as e:  # worker died
+                record = {"framework": fw, "topic": t, "status": "error", "error": f"{type(e).__name__}: {e}"}
+            out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            ok += record["status"] == "ok"
+            errors += record["status"] != "ok"
+            hours = (time.perf_counter() - t0) / 3600
+            print(f"[batch] {n}/{len(todo)} {record['status']:5} {fw}: {t} ({record.get('elapsed_s', 0)}s) "
+                  f"— {n / hours:.1f} topics/hour")
+
+    elapsed = time.perf_counter() - t0
+    print(f"[batch] done: {ok} ok, {errors} failed in {elapsed / 60:.1f} min — {len(todo) / (elapsed / 3600):.1f} topics/hour")
+    return 0 if errors == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
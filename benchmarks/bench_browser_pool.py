@@ -0,0 +1,147 @@
+"""
+Benchmark: per-call Chromium launch vs the shared browser pool.
+
+Serves a handful of static HTML pages from a local server, reads them with N
+concurrent "analysts", and reports page-read p50/p95 latency plus peak RSS of this
+process and all of its children (Chromium processes included).
+
+    python benchmarks/bench_browser_pool.py --reads 40 --concurrency 8
+
+Requires `playwright install chromium`.
+"""
+import argparse
+import asyncio
+import functools
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+from tools.browser_pool import shutdown_browser_pool  # noqa: E402
+from tools.playwright_tool import _collapse_ws, browser_read  # noqa: E402
+
+PAGE = """<!doctype html><html><head><title>Article {i}</title></head>
+<body><nav>Home | About | Contact</nav><article><h1>Article {i}</h1>{paras}</article>
+<footer>(c) example</footer></body></html>"""
+
+
+def _write_site(root: str, pages: int) -> None:
+    for i in range(pages):
+        paras = "".join(f"<p>Paragraph {j} of article {i}. " + "Lorem ipsum dolor sit amet. " * 20 + "</p>" for j in range(30))
+        with open(os.path.join(root, f"p{i}.html"), "w") as f:
+            f.write(PAGE.format(i=i, paras=paras))
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _tree_rss_kb(pid: int) -> int:
+    """RSS of pid plus all descendants, from /proc (Linux only; 0 elsewhere)."""
+    try:
+        children = {}
+        for d in os.listdir("/proc"):
+            if d.isdigit():
+                try:
+                    with open(f"/proc/{d}/stat") as f:
+                        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                    children.setdefault(ppid, []).append(int(d))
+                except Exception:
+                    continue
+        total, stack = 0, [pid]
+        while stack:
+            p = stack.pop()
+            try:
+                with open(f"/proc/{p}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            total += int(line.split()[1])
+            except Exception:
+                pass
+            stack.extend(children.get(p, []))
+        return total
+    except Exception:
+        return 0
+
+
+async def _legacy_read(url: str) -> dict:
+    # the pre-change code path: new Playwright + Chromium process for every read
+    t0 = time.time()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            context = await browser.new_context()
+            page = await context.new_page()
+            resp = await page.goto(url, wait_until="networkidle", timeout=120000)
+            text = _collapse_ws(await page.inner_text("body", timeout=2000))
+            return {"status": resp.status if resp else 0, "text": text, "elapsed_ms": int((time.time() - t0) * 1000)}
+        finally:
+            await browser.close()
+
+
+async def run_mode(read_fn, urls, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    peak = {"kb": 0}
+    stop = asyncio.Event()
+
+    async def sample_rss():
+        while not stop.is_set():
+            peak["kb"] = max(peak["kb"], _tree_rss_kb(os.getpid()))
+            await asyncio.sleep(0.1)
+
+    async def one(url):
+        async with sem:
+            t0 = time.perf_counter()
+            await read_fn(url)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    sampler = asyncio.create_task(sample_rss())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(u) for u in urls))
+    wall = time.perf_counter() - t0
+    stop.set()
+    await sampler
+    await shutdown_browser_pool()
+    latencies.sort()
+    return {
+        "wall_s": round(wall, 2),
+        "p50_ms": round(statistics.median(latencies)),
+        "p95_ms": round(latencies[max(0, int(len(latencies) * 0.95) - 1)]),
+        "peak_rss_mb": round(peak["kb"] / 1024),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reads", type=int, default=40)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--pages", type=int, default=10)
+    args = ap.parse_args()
+
+    root = tempfile.mkdtemp(prefix="rdr-site-")
+    _write_site(root, args.pages)
+    handler = functools.partial(_QuietHandler, directory=root)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/p{i % args.pages}.html" for i in range(args.reads)]
+
+    print(f"{args.reads} reads, concurrency {args.concurrency}")
+    for name, fn in (("launch per call", _legacy_read), ("shared browser pool", browser_read)):
+        res = asyncio.run(run_mode(fn, urls, args.concurrency))
+        print(f"{name:20s} " + "  ".join(f"{k}={v}" for k, v in res.items()))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark: boilerplate-stripping extraction vs the previous visible-text extraction.
+
+Reads the saved pages in benchmarks/fixtures/pages/ (news article, vendor blog, company
+profile, analyst report, press release, docs page - each with nav, cookie banner, ads and
+footer link farms) and reports per page read:
+
+  - bytes and estimated tokens: all visible text (previous behaviour), main content, and the
+    top --top-k chunks for the page's query from queries.json (what `playwright_web_read`
+    returns when called with `query=`)
+  - whether the fact's evidence quote survives each variant
+  - extraction time (median over --repeat)
+
+With --live it also runs the analyst agent once per page and variant on a one-fact payload
+that carries the page text, and reports analyst latency and input tokens (needs
+OPENAI_API_KEY and DEFAULT_MODEL_NAME).
+
+    python benchmarks/bench_extract.py --top-k 2
+    python benchmarks/bench_extract.py --live
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.playwright_tool import _collapse_ws  # noqa: E402
+from tools.text_extract import extract_readable, extract_text, select_relevant  # noqa: E402
+from utils import estimate_tokens  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pages")
+VARIANTS = ("visible", "main", "relevant")
+
+
+def _median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def page_variants(html_doc: str, query: str, top_k: int):
+    _, visible = extract_text(html_doc)
+    _, main, _ = extract_readable(html_doc)
+    main = _collapse_ws(main)
+    relevant, _, _ = select_relevant(main, query, top_k=top_k)
+    return {"visible": _collapse_ws(visible), "main": main, "relevant": relevant}
+
+
+async def analyst_latency(pages, top_k: int):
+    """(variant -> [latency_s], variant -> [input_tokens]) for one analyst call per page and variant."""
+    from agents import Agent, Runner
+    from dotenv import load_dotenv
+    from prompts.agent_prompts import analyst_agent_system_prompt
+
+    load_dotenv(override=True)
+    agent = Agent(name="Analyst bench", instructions=analyst_agent_system_prompt,
+                  model=os.environ.get("DEFAULT_MODEL_NAME"))
+    latency = {v: [] for v in VARIANTS}
+    tokens = {v: [] for v in VARIANTS}
+    for name, (html_doc, spec) in pages.items():
+        texts = page_variants(html_doc, spec["query"], top_k)
+        for variant in VARIANTS:
+            payload = {
+                "framework": "big-idea",
+                "topic_or_idea": spec["query"],
+                "section_descriptor": {"section": "bench", "description": "benchmark", "facets": []},
+                "facts": [{"fact_id": "s1", "claim": spec["query"], "evidence": spec["evidence"],
+                           "source_url": f"https://fixtures.local/{name}", "page_text": texts[variant]}],
+            }
+            t0 = time.perf_counter()
+            result = await Runner.run(agent, [{"role": "user", "content": json.dumps(payload, ensure_ascii=False)}])
+            latency[variant].append(time.perf_counter() - t0)
+            tokens[variant].append(sum(r.usage.input_tokens for r in result.raw_responses))
+    return latency, tokens
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--top-k", type=int, default=2, help="chunks kept for the query variant")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--live", action="store_true", help="also measure analyst latency with real model calls")
+    args = ap.parse_args()
+
+    with open(os.path.join(FIXTURES, "queries.json"), encoding="utf-8") as f:
+        specs = json.load(f)
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = (f.read(), specs[os.path.basename(path)])
+
+    totals = {v: {"bytes": 0, "tokens": 0, "evidence": 0} for v in VARIANTS}
+    print(f"{'page':34} {'html KB':>7} " + " ".join(f"{v + ' tok':>13}" for v in VARIANTS)
+          + f" {'old ms':>7} {'new ms':>7}  evidence kept")
+    for name, (html_doc, spec) in pages.items():
+        texts = page_variants(html_doc, spec["query"], args.top_k)
+        old_ms = _median_ms(lambda: extract_text(html_doc), args.repeat)
+        new_ms = _median_ms(lambda: extract_readable(html_doc), args.repeat)
+        kept = []
+        for v in VARIANTS:
+            totals[v]["bytes"] += len(texts[v].encode("utf-8"))
+            totals[v]["tokens"] += estimate_tokens(texts[v])
+            found = spec["evidence"] in " ".join(texts[v].split())
+            totals[v]["evidence"] += found
+            kept.append(v if found else f"-{v}")
+        print(f"{name:34} {len(html_doc) / 1024:>7.1f} "
+              + " ".join(f"{estimate_tokens(texts[v]):>13}" for v in VARIANTS)
+              + f" {old_ms:>7.2f} {new_ms:>7.2f}  {' '.join(kept)}")
+
+    n = len(pages)
+    base = totals["visible"]
+    print(f"\nper page read (mean over {n} pages):")
+    for v in VARIANTS:
+        t = totals[v]
+        print(f"  {v:9} {t['bytes'] / n:>8.0f} bytes  {t['tokens'] / n:>6.0f} tokens  "
+              f"({100 * (1 - t['tokens'] / base['tokens']):>5.1f}% fewer tokens)  evidence kept {t['evidence']}/{n}")
+
+    if args.live:
+        latency, tokens = asyncio.run(analyst_latency(pages, args.top_k))
+        print("\nanalyst call per page (median):")
+        for v in VARIANTS:
+            print(f"  {v:9} {statistics.median(latency[v]):>6.2f} s  {statistics.median(tokens[v]):>6.0f} input tokens")
+
+
+if __name__ == "__main__":
+    main()
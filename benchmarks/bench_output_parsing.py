@@ -0,0 +1,110 @@
+"""
+Benchmark: tolerant structured-output parsing vs plain json.loads on damaged agent replies.
+
+Builds a researcher reply with --facts facts and damages it the ways model output breaks in
+practice: truncation at --cuts points (max tokens / dropped stream), a ```json fence, prose
+around the JSON, trailing commas, wrong-typed fields on some facts. For each damaged reply
+it compares the previous parsing (json.loads, empty section on error) with
+output_parsing.parse_output against ResearcherOutput, and reports:
+
+  - replies that yield an empty section (no facts)
+  - facts recovered, as a share of the facts whose required fields are intact in the text
+  - replies that would still need a retry (nothing salvageable)
+
+    python benchmarks/bench_output_parsing.py --facts 40 --cuts 20
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import ModelBehaviorError  # noqa: E402
+
+from output_parsing import parse_output  # noqa: E402
+from schemas.schemas import ResearcherOutput  # noqa: E402
+
+
+def sample_reply(n: int, rng: random.Random) -> dict:
+    facts = []
+    for i in range(1, n + 1):
+        facts.append({
+            "fact_id": f"s{i}", "entity": f"Company {i % 7}", "claim": f"Company {i % 7} reported metric {i} of {rng.randint(1, 999)}M",
+            "source_url": f"https://example{i % 11}.com/news/{i}", "publisher": "Example News",
+            "date_event": "2024-03-01", "date_published": None, "evidence": f"\"metric {i} reached {rng.randint(1, 999)}M in 2023\"",
+            "facet": "market_size", "geo": "US", "modality": "news", "confidence": round(rng.random(), 2),
+            "tags": ["market", "revenue"], "stale": False, "conflict_group_id": None,
+        })
+    return {"facts": facts, "domains_seen": [f"example{i}.com" for i in range(11)], "gap_flags": ["need_academic"]}
+
+
+def damaged_variants(reply: dict, cuts: int, rng: random.Random):
+    text = json.dumps(reply, ensure_ascii=False)
+    for k in range(1, cuts + 1):
+        pos = int(len(text) * k / (cuts + 1))
+        # a fact is recoverable once its last required field (source_url) is complete
+        yield f"truncated@{100 * k // (cuts + 1)}%", text[:pos], len(re.findall(r'"source_url": "[^"]*"', text[:pos]))
+    n = len(reply["facts"])
+    yield "code fence", f"```json\n{json.dumps(reply, indent=2)}\n```", n
+    yield "prose around", f"Here are the facts I found:\n{text}\nLet me know if you need more.", n
+    yield "trailing commas", json.dumps(reply, indent=1).replace("}\n ]", "},\n ]").replace('"need_academic"', '"need_academic",'), n
+    bad = json.loads(text)
+    for f in rng.sample(bad["facts"], max(1, n // 10)):
+        f["confidence"] = "high"
+    yield "wrong types", json.dumps(bad), n
+    bad = json.loads(text)
+    for f in rng.sample(bad["facts"], max(1, n // 10)):
+        del f["source_url"]
+    yield "missing fields", json.dumps(bad), n - max(1, n // 10)
+
+
+def old_parse(text: str) -> int:
+    try:
+        return len(json.loads(text).get("facts", []))
+    except json.JSONDecodeError:
+        return 0
+
+
+def new_parse(text: str):
+    try:
+        return len(parse_output(text, ResearcherOutput, "researcher")["facts"])
+    except ModelBehaviorError:
+        return None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--facts", type=int, default=40)
+    ap.add_argument("--cuts", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    reply = sample_reply(args.facts, rng)
+    rows = list(damaged_variants(reply, args.cuts, rng))
+
+    print(f"{'damage':18} {'facts in text':>13} {'json.loads':>10} {'tolerant':>9}")
+    totals = {"available": 0, "old": 0, "new": 0, "old_empty": 0, "new_empty": 0, "retry": 0}
+    for name, text, available in rows:
+        old = old_parse(text)
+        new = new_parse(text)
+        totals["available"] += available
+        totals["old"] += old
+        totals["new"] += new or 0
+        totals["old_empty"] += old == 0
+        totals["new_empty"] += not new
+        totals["retry"] += new is None
+        print(f"{name:18} {available:>13} {old:>10} {'retry' if new is None else new:>9}")
+
+    n = len(rows)
+    print(f"\n{n} damaged replies")
+    print(f"  empty sections:   json.loads {totals['old_empty']}/{n}   tolerant {totals['new_empty']}/{n}")
+    print(f"  facts recovered:  json.loads {totals['old']}/{totals['available']}   tolerant {totals['new']}/{totals['available']}")
+    print(f"  still need a retry (one extra model turn, no re-search): {totals['retry']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: blocking requests.post vs the shared async Serper client.
+
+Starts a local fake Serper server (fixed latency plus an occasional slow response),
+runs N concurrent "sections" that each issue their queries one after another (the way
+the researcher's tool loop does), and reports queries/sec and event-loop lag.
+
+    python benchmarks/bench_serper.py --sections 7 --queries 12 --latency-ms 150
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+import disk_cache  # noqa: E402
+from tools import serper_tool  # noqa: E402
+from tools.http_client import aclose_client  # noqa: E402
+
+
+def make_handler(latency_s: float, slow_every: int, slow_s: float):
+    counter = {"n": 0}
+    lock = threading.Lock()
+
+    class FakeSerper(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            q = json.loads(body or b"{}").get("q", "")
+            with lock:
+                counter["n"] += 1
+                n = counter["n"]
+            time.sleep(slow_s if slow_every and n % slow_every == 0 else latency_s)
+            data = {"organic": [
+                {"title": f"{q} #{i}", "link": f"https://example.com/{n}/{i}", "snippet": "lorem ipsum", "position": i}
+                for i in range(1, 11)
+            ]}
+            out = json.dumps(data).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args):
+            pass
+
+    return FakeSerper
+
+
+async def _legacy_query(q: str):
+    # the pre-change code path: synchronous requests.post on the event loop thread
+    resp = requests.post(
+        f"{serper_tool.SERPER_BASE}/search",
+        headers={"X-API-KEY": serper_tool.SERPER_API_KEY, "Content-Type": "application/json"},
+        json={"q": q, "num": 10, "page": 1, "gl": "us", "hl": "en"},
+        timeout=20,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _async_query(q: str):
+    return await serper_tool.serper_query(q)
+
+
+async def _loop_lag_probe(stop: asyncio.Event, samples: list, interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - t - interval) * 1000)
+
+
+async def run_mode(query_fn, sections: int, queries: int) -> dict:
+    stop = asyncio.Event()
+    lag = []
+    probe = asyncio.create_task(_loop_lag_probe(stop, lag))
+
+    async def section(i: int):
+        for j in range(queries):
+            await query_fn(f"section {i} query {j}")
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(section(i) for i in range(sections)))
+    wall = time.perf_counter() - t0
+    stop.set()
+    await probe
+    await aclose_client()
+    lag.sort()
+    return {
+        "wall_s": round(wall, 2),
+        "qps": round(sections * queries / wall, 1),
+        "loop_lag_p50_ms": round(statistics.median(lag), 1) if lag else 0.0,
+        "loop_lag_p95_ms": round(lag[int(len(lag) * 0.95) - 1], 1) if lag else 0.0,
+        "loop_lag_max_ms": round(lag[-1], 1) if lag else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sections", type=int, default=7)
+    ap.add_argument("--queries", type=int, default=12)
+    ap.add_argument("--latency-ms", type=int, default=150)
+    ap.add_argument("--slow-every", type=int, default=20, help="every Nth request is slow (0 = never)")
+    ap.add_argument("--slow-ms", type=int, default=2000)
+    args = ap.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency_ms / 1000, args.slow_every, args.slow_ms / 1000))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    serper_tool.SERPER_BASE = f"http://127.0.0.1:{server.server_address[1]}"
+    serper_tool.SERPER_API_KEY = "bench"
+    # serper_query reads through the on-disk cache; a second run would only measure cache hits
+    disk_cache.CACHE_ENABLED = False
+
+    print(f"{args.sections} sections x {args.queries} queries, latency {args.latency_ms} ms, "
+          f"slow {args.slow_ms} ms every {args.slow_every} requests")
+    for name, fn in (("blocking requests.post", _legacy_query), ("async pooled client", _async_query)):
+        res = asyncio.run(run_mode(fn, args.sections, args.queries))
+        print(f"{name:24s} " + "  ".join(f"{k}={v}" for k, v in res.items()))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
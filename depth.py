@@ -0,0 +1,153 @@
+import contextvars
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterable, Optional, Set
+
+from run_context import bump
+from utils import canonical_url
+
+# Per-section hard budgets for each run_params["depth"].
+#   queries  - Serper calls (also caps the complexity agent's recommended_query_count)
+#   pages    - page reads (playwright_web_read)
+#   tokens   - model tokens across every step of the section
+#   wall_s   - seconds from section start
+DEPTH_PROFILES: Dict[str, Dict[str, float]] = {
+    "shallow": {"queries": 6, "pages": 8, "tokens": 80_000, "wall_s": 120},
+    "standard": {"queries": 12, "pages": 20, "tokens": 200_000, "wall_s": 300},
+    "deep": {"queries": 24, "pages": 48, "tokens": 500_000, "wall_s": 900},
+}
+DEFAULT_DEPTH = os.getenv("DEFAULT_DEPTH", "standard")
+
+# Early stop on diminishing returns: once at least YIELD_WINDOW queries have run, stop
+# searching when the last YIELD_WINDOW queries brought fewer than MIN_NEW_SOURCES_PER_QUERY
+# unseen result URLs each on average.
+MIN_NEW_SOURCES_PER_QUERY = float(os.getenv("MIN_NEW_SOURCES_PER_QUERY", "1.5"))
+YIELD_WINDOW = int(os.getenv("YIELD_WINDOW", "3"))
+
+
+class SectionBudget:
+    """
+    Budget bookkeeping for one section. Tools ask before spending (`take_query`,
+    `take_page`) and get a reason string back when they must stop; pipeline steps ask
+    `allow_step` before optional work (critic, iteration) and are skipped once the token or
+    time budget is spent. Every refusal is recorded in `exhausted` for the section artifacts.
+    """
+
+    def __init__(self, section: str, depth: str, limits: Dict[str, float]) -> None:
+        self.section = section
+        self.depth = depth
+        self.limits = limits
+        self.started = time.monotonic()
+        self.used = {"queries": 0, "pages": 0, "tokens": 0}
+        self.exhausted: Dict[str, str] = {}
+        self._seen_sources: Set[str] = set()
+        self._recent_yield: Deque[int] = deque(maxlen=max(1, YIELD_WINDOW))
+
+    # --- state ---
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self.started
+
+    def _over(self) -> Optional[str]:
+        if self.elapsed_s() >= self.limits["wall_s"]:
+            return "wall_clock"
+        if self.used["tokens"] >= self.limits["tokens"]:
+            return "tokens"
+        return None
+
+    def _refuse(self, what: str, reason: str) -> str:
+        if what not in self.exhausted:
+            self.exhausted[what] = reason
+            bump(f"budget_{what}_{reason}")
+            print(f"[{self.section}] {what} budget reached ({reason}, depth={self.depth})")
+        return reason
+
+    def low_yield(self) -> bool:
+        return (len(self._recent_yield) == self._recent_yield.maxlen
+                and sum(self._recent_yield) / len(self._recent_yield) < MIN_NEW_SOURCES_PER_QUERY)
+
+    # --- spending ---
+    def clamp_queries(self, requested: Any) -> int:
+        try:
+            requested = int(requested)
+        except (TypeError, ValueError):
+            requested = int(self.limits["queries"])
+        return max(1, min(requested, int(self.limits["queries"])))
+
+    def take_query(self) -> Optional[str]:
+        """None if a search may run, otherwise why not."""
+        reason = self._over()
+        if reason is None and self.used["queries"] >= self.limits["queries"]:
+            reason = "queries"
+        if reason is None and self.low_yield():
+            reason = "low_yield"
+        if reason:
+            return self._refuse("search", reason)
+        self.used["queries"] += 1
+        return None
+
+    def record_results(self, urls: Iterable[str]) -> int:
+        """Track unseen result URLs of one query; returns how many were new."""
+        new = 0
+        for url in urls:
+            key = canonical_url(url)
+            if key and key not in self._seen_sources:
+                self._seen_sources.add(key)
+                new += 1
+        self._recent_yield.append(new)
+        return new
+
+    def take_page(self) -> Optional[str]:
+        reason = self._over()
+        if reason is None and self.used["pages"] >= self.limits["pages"]:
+            reason = "pages"
+        if reason:
+            return self._refuse("pages", reason)
+        self.used["pages"] += 1
+        return None
+
+    def add_tokens(self, n: int) -> None:
+        self.used["tokens"] += n or 0
+
+    def allow_step(self, step: str) -> bool:
+        """Whether an optional step may still run; records the skip otherwise."""
+        reason = self._over()
+        if reason:
+            self._refuse(step, reason)
+            return False
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "limits": self.limits,
+            "used": {**self.used, "wall_s": round(self.elapsed_s(), 1)},
+            "unique_sources": len(self._seen_sources),
+            "exhausted": self.exhausted,
+        }
+
+
+def section_budget(section: str, run_params: Dict[str, Any]) -> SectionBudget:
+    """Budget for `run_params["depth"]` (unknown values fall back to DEFAULT_DEPTH)."""
+    depth = str(run_params.get("depth") or DEFAULT_DEPTH).lower()
+    if depth not in DEPTH_PROFILES:
+        depth = DEFAULT_DEPTH
+    return SectionBudget(section, depth, dict(DEPTH_PROFILES[depth]))
+
+
+_current_budget: contextvars.ContextVar[Optional[SectionBudget]] = contextvars.ContextVar("rdr_section_budget", default=None)
+
+
+def current_budget() -> Optional[SectionBudget]:
+    return _current_budget.get()
+
+
+@contextmanager
+def use_budget(budget: SectionBudget):
+    """Make `budget` the current section budget for tools and model calls started inside."""
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import brotli
+import orjson
+
+from run_context import bump
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") not in ("0", "false", "False", "")
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(".cache", "rdr"))
+CACHE_MAX_MB = int(os.getenv("CACHE_MAX_MB", "512"))
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+# Per entry-type time-to-live in seconds.
+CACHE_TTLS = {
+    "search": int(os.getenv("SEARCH_CACHE_TTL_S", str(24 * 3600))),
+    "page": int(os.getenv("PAGE_CACHE_TTL_S", str(7 * 24 * 3600))),
+    "llm": int(os.getenv("LLM_CACHE_TTL_S", str(30 * 24 * 3600))),
+}
+
+# Entry types kept in their own file (own size cap, never evicted by page churn).
+# The llm store is switched on by LLM_CACHE_MODE, independent of CACHE_ENABLED.
+_STORES = {
+    "default": ("cache.sqlite3", CACHE_MAX_MB),
+    "llm": ("llm.sqlite3", LLM_CACHE_MAX_MB),
+}
+DEFAULT_TTL = 24 * 3600
+
+# Process-wide counters; per-run counters go to run_context as "cache_<ns>_hits/misses".
+stats: Dict[str, int] = {}
+
+
+def cache_key(*parts: Any) -> str:
+    """Content address for a normalized key tuple."""
+    return hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class DiskCache:
+    """
+    Size-bounded, TTL'd key/value store on SQLite (WAL mode).
+
+    Values are orjson-serialized and Brotli-compressed. SQLite's file locking makes it
+    safe across worker processes; each thread gets its own connection. Least recently
+    accessed entries are evicted once the store grows past `max_bytes`.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " ns TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires REAL NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (ns, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, ns: str, key: str) -> Optional[Any]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, accessed FROM entries WHERE ns=? AND key=? AND expires>?", (ns, key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > 60:  # keep LRU order without a write on every hit
+            conn.execute("UPDATE entries SET accessed=? WHERE ns=? AND key=?", (now, ns, key))
+        return orjson.loads(brotli.decompress(row[0]))
+
+    def set(self, ns: str, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        now = time.time()
+        blob = brotli.compress(orjson.dumps(value), quality=5)
+        ttl = ttl if ttl is not None else CACHE_TTLS.get(ns, DEFAULT_TTL)
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (ns, key, value, size, expires, accessed) VALUES (?,?,?,?,?,?)",
+            (ns, key, blob, len(blob), now + ttl, now),
+        )
+        self._writes += 1
+        if self._writes % 50 == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under 90% of the cap."""
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE expires<=?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        while total > target:
+            rows = conn.execute("SELECT rowid, size FROM entries ORDER BY accessed LIMIT 200").fetchall()
+            if not rows:
+                break
+            freed, ids = 0, []
+            for rowid, size in rows:
+                ids.append(rowid)
+                freed += size
+                if total - freed <= target:
+                    break
+            conn.execute(f"DELETE FROM entries WHERE rowid IN ({','.join('?' * len(ids))})", ids)
+            total -= freed
+            stats["evictions"] = stats.get("evictions", 0) + len(ids)
+
+
+_caches: Dict[str, DiskCache] = {}
+_cache_lock = threading.Lock()
+
+
+def get_cache(ns: str = "search") -> Optional[DiskCache]:
+    """Shared cache instance holding namespace `ns`, or None when caching is disabled."""
+    store = ns if ns in _STORES else "default"
+    if store == "default" and not CACHE_ENABLED:
+        return None
+    cache = _caches.get(store)
+    if cache is None:
+        with _cache_lock:
+            cache = _caches.get(store)
+            if cache is None:
+                filename, max_mb = _STORES[store]
+                cache = _caches[store] = DiskCache(os.path.join(CACHE_DIR, filename), max_mb * 1024 * 1024)
+    return cache
+
+
+def _count(ns: str, outcome: str) -> None:
+    name = f"cache_{ns}_{outcome}"
+    stats[name] = stats.get(name, 0) + 1
+    bump(name)
+
+
+async def cache_get(ns: str, key: str) -> Optional[Any]:
+    """Async lookup; counts a hit or miss for the namespace."""
+    cache = get_cache(ns)
+    if cache is None:
+        return None
+    try:
+        value = await asyncio.to_thread(cache.get, ns, key)
+    except Exception as e:
+        print(f"[cache] get failed ({ns}): {e}")
+        value = None
+    _count(ns, "hits" if value is not None else "misses")
+    return value
+
+
+async def cache_set(ns: str, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    cache = get_cache(ns)
+    if cache is None:
+        return
+    try:
+        await asyncio.to_thread(cache.set, ns, key, value, ttl)
+    except Exception as e:
+        print(f"[cache] set failed ({ns}): {e}")
+
+
+def run_cache_summary(counters: Dict[str, int]) -> Dict[str, int]:
+    """Pick the cache_* counters out of a run's counters for report metadata."""
+    return {k[len("cache_"):]: v for k, v in counters.items() if k.startswith("cache_")}
@@ -0,0 +1,262 @@
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from utils import canonical_url
+
+NUM_PERM = 64
+BANDS = 16            # 16 bands x 4 rows: candidate pairs from ~0.5 Jaccard upwards
+JACCARD_THRESHOLD = 0.6
+# Word overlap (numbers ignored) above which two same-entity, same-facet claims with
+# different figures are treated as conflicting statements of one fact.
+CONFLICT_MIN_OVERLAP = 0.3
+
+_PRIME = 4294967311  # > 2**32, so (a * h + b) stays inside uint64
+
+_WORD_RE = re.compile(r"[a-z0-9$%€£]+(?:[.,][0-9]+)*")
+_NUM_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_ENTITY_SUFFIXES = {"inc", "inc.", "llc", "ltd", "ltd.", "corp", "corp.", "corporation", "co", "co.", "gmbh", "plc", "sa", "ag", "the"}
+_CLAIM_STOPWORDS = {"a", "an", "the", "of", "to", "in", "on", "for", "and", "by", "with", "is", "are", "was", "were", "its", "it", "that", "as", "at"}
+
+
+def normalize_entity(entity: str) -> str:
+    tokens = [t for t in re.split(r"[\s,]+", (entity or "").casefold()) if t]
+    return " ".join(t for t in tokens if t not in _ENTITY_SUFFIXES).strip(" .-")
+
+
+def _claim_tokens(claim: str) -> List[str]:
+    return [t for t in _WORD_RE.findall((claim or "").casefold()) if t not in _CLAIM_STOPWORDS]
+
+
+def _shingles(tokens: List[str]) -> set:
+    if len(tokens) < 2:
+        return set(tokens)
+    return {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def _numbers(claim: str) -> frozenset:
+    return frozenset(n.replace(",", "") for n in _NUM_RE.findall(claim or ""))
+
+
+def _entities_compatible(a: str, b: str) -> bool:
+    # whole words only: "openai" fits "openai foundation", "meta" does not fit "metabase"
+    if not a or not b:
+        return True
+    ta, tb = set(a.split()), set(b.split())
+    return ta <= tb or tb <= ta
+
+
+@lru_cache(maxsize=1)
+def _permutations():
+    # numpy is imported on first use so importing the pipeline stays cheap
+    import numpy as np
+    rng = np.random.default_rng(20240901)
+    a = rng.integers(1, 2**32 - 1, size=NUM_PERM, dtype=np.uint64)
+    b = rng.integers(0, 2**32 - 1, size=NUM_PERM, dtype=np.uint64)
+    return np, a, b, np.uint64(_PRIME)
+
+
+def _minhash_signatures(shingle_sets: List[set]):
+    """(n_facts, NUM_PERM) MinHash signatures in one vectorized pass over all shingles."""
+    np, a, b, prime = _permutations()
+    n = len(shingle_sets)
+    sigs = np.full((n, NUM_PERM), np.iinfo(np.uint64).max, dtype=np.uint64)
+    lengths = np.array([len(s) for s in shingle_sets], dtype=np.int64)
+    nonempty = np.flatnonzero(lengths)
+    if nonempty.size == 0:
+        return sigs
+    flat = np.fromiter(
+        (zlib.crc32(sh.encode("utf-8")) for i in nonempty for sh in shingle_sets[i]),
+        dtype=np.uint64, count=int(lengths[nonempty].sum()),
+    )
+    hashed = (np.outer(a, flat) + b[:, None]) % prime               # (NUM_PERM, total_shingles)
+    offsets = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+    sigs[nonempty] = np.minimum.reduceat(hashed, offsets, axis=1).T
+    return sigs
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_facts(facts: List[Dict], threshold: float = JACCARD_THRESHOLD) -> List[List[int]]:
+    """
+    Group indices of near-duplicate facts. Two facts merge when their claim shingles have
+    Jaccard >= threshold, their normalized entities are compatible and the numbers in the
+    claims agree (so "$10M" vs "$20M" never collapse).
+    """
+    n = len(facts)
+    tokens = [_claim_tokens(f.get("claim", "")) for f in facts]
+    shingles = [_shingles(t) for t in tokens]
+    entities = [normalize_entity(f.get("entity", "")) for f in facts]
+    numbers = [_numbers(f.get("claim", "")) for f in facts]
+    parent = list(range(n))
+
+    # exact duplicates (same entity, claim wording and canonical URL) first
+    exact: Dict[Tuple, int] = {}
+    for i, f in enumerate(facts):
+        key = (entities[i], " ".join(tokens[i]), canonical_url(f.get("source_url", "")))
+        if key in exact:
+            parent[_find(parent, i)] = _find(parent, exact[key])
+        else:
+            exact[key] = i
+
+    sigs = _minhash_signatures(shingles)
+    np = _permutations()[0]
+    rows = NUM_PERM // BANDS
+    candidates = set()
+    for band in range(BANDS):
+        buckets: Dict[bytes, List[int]] = {}
+        block = np.ascontiguousarray(sigs[:, band * rows:(band + 1) * rows])
+        for i in range(n):
+            if shingles[i]:
+                buckets.setdefault(block[i].tobytes(), []).append(i)
+        for members in buckets.values():
+            if len(members) > 1:
+                for a in range(len(members)):
+                    for b in range(a + 1, len(members)):
+                        candidates.add((members[a], members[b]))
+
+    for i, j in candidates:
+        if numbers[i] != numbers[j] or not _entities_compatible(entities[i], entities[j]):
+            continue
+        inter = len(shingles[i] & shingles[j])
+        if inter and inter / len(shingles[i] | shingles[j]) >= threshold:
+            ri, rj = _find(parent, i), _find(parent, j)
+            if ri != rj:
+                parent[rj] = ri
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(n):
+        clusters.setdefault(_find(parent, i), []).append(i)
+    return sorted(clusters.values(), key=lambda c: c[0])
+
+
+def _merge_cluster(facts: List[Dict], members: List[int]) -> Dict:
+    """Keep the most confident member and give it the union of every member's sources."""
+    best = max(members, key=lambda i: (facts[i].get("confidence") or 0, -i))
+    merged = dict(facts[best])
+    urls, seen = [], set()
+    for i in [best] + [m for m in members if m != best]:
+        for url in [facts[i].get("source_url")] + list(facts[i].get("source_urls") or []):
+            if url and canonical_url(url) not in seen:
+                seen.add(canonical_url(url))
+                urls.append(url)
+    if len(urls) > 1:
+        merged["source_urls"] = urls
+    if len(members) > 1:
+        merged["merged_fact_ids"] = [facts[i].get("fact_id") for i in members if i != best]
+    return merged
+
+
+def dedup_facts(facts: List[Dict], threshold: float = JACCARD_THRESHOLD) -> Tuple[List[Dict], Dict[str, str]]:
+    """
+    Collapse near-duplicate facts. Returns (kept_facts, id_map) where id_map sends every
+    input fact_id to the fact_id of the fact that now represents it.
+    """
+    kept, id_map = [], {}
+    for members in cluster_facts(facts, threshold):
+        merged = _merge_cluster(facts, members)
+        kept.append(merged)
+        for i in members:
+            if facts[i].get("fact_id") is not None:
+                id_map[facts[i]["fact_id"]] = merged.get("fact_id")
+    return kept, id_map
+
+
+def merge_new_facts(existing: List[Dict], incoming: List[Dict],
+                    threshold: float = JACCARD_THRESHOLD) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Fold `incoming` into `existing`. Every existing fact is kept, in order and with its id;
+    incoming near-duplicates of existing facts only add their sources to one of them (the
+    first in the cluster), the rest are returned as new facts. Returns (merged_facts, new_facts),
+    where merged_facts is the existing facts followed by the new ones. An existing fact that
+    gained no sources is returned as the same object.
+    """
+    combined = list(existing) + list(incoming)
+    n_existing = len(existing)
+    merged = list(existing)
+    new_facts = []
+    for members in cluster_facts(combined, threshold):
+        old = [i for i in members if i < n_existing]
+        fresh = [i for i in members if i >= n_existing]
+        if not fresh:
+            continue
+        if old:
+            # existing facts never merge with each other here; the first one takes the sources
+            urls = _merge_cluster(combined, [old[0]] + fresh).get("source_urls")
+            if urls:
+                merged[old[0]] = {**combined[old[0]], "source_urls": urls}
+        else:
+            new_facts.append(_merge_cluster(combined, fresh))
+    return merged + new_facts, new_facts
+
+
+def conflict_groups(facts: List[Dict], min_overlap: float = CONFLICT_MIN_OVERLAP) -> List[List[int]]:
+    """
+    Index groups (2+ members) of facts that state different figures for the same thing: same
+    normalized entity and facet, claim wording overlapping by word Jaccard >= min_overlap,
+    and different numbers. Facts sharing a model-assigned conflict_group_id are joined too.
+    """
+    n = len(facts)
+    parent = list(range(n))
+    numbers = [_numbers(f.get("claim", "")) for f in facts]
+    words = [{t for t in _claim_tokens(f.get("claim", "")) if not _NUM_RE.fullmatch(t)} for f in facts]
+
+    by_subject: Dict[Tuple[str, str], List[int]] = {}
+    for i, f in enumerate(facts):
+        entity = normalize_entity(f.get("entity", ""))
+        facet = str(f.get("facet") or "").casefold().strip()
+        if entity and facet and numbers[i]:
+            by_subject.setdefault((entity, facet), []).append(i)
+    for members in by_subject.values():
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                i, j = members[a], members[b]
+                if numbers[i] == numbers[j] or not words[i] or not words[j]:
+                    continue
+                if len(words[i] & words[j]) / len(words[i] | words[j]) >= min_overlap:
+                    ri, rj = _find(parent, i), _find(parent, j)
+                    if ri != rj:
+                        parent[rj] = ri
+
+    given: Dict[str, int] = {}
+    for i, f in enumerate(facts):
+        gid = f.get("conflict_group_id")
+        if gid:
+            if gid in given:
+                ri, rj = _find(parent, given[gid]), _find(parent, i)
+                if ri != rj:
+                    parent[rj] = ri
+            else:
+                given[gid] = i
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(_find(parent, i), []).append(i)
+    return sorted((g for g in groups.values() if len(g) > 1), key=lambda g: g[0])
+
+
+_YEAR_RE = re.compile(r"(?:19|20)\d\d")
+
+
+def conflict_kind(facts: List[Dict]) -> str:
+    """
+    What differs between the facts of one conflict group, in the analyst's terms: "date" when
+    only years differ, "amount" when other figures differ, "definition" when the figures agree.
+    """
+    numbers = [_numbers(f.get("claim", "")) for f in facts]
+    differing = frozenset().union(*numbers) - frozenset.intersection(*numbers) if numbers else frozenset()
+    if not differing:
+        return "definition"
+    return "date" if all(_YEAR_RE.fullmatch(n) for n in differing) else "amount"
+
+
+def fact_sources(fact: Dict) -> List[str]:
+    """All source URLs of a (possibly merged) fact."""
+    urls: Optional[List[str]] = fact.get("source_urls")
+    return list(urls) if urls else ([fact["source_url"]] if fact.get("source_url") else [])
@@ -0,0 +1,150 @@
+import contextvars
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from agents import custom_span
+from agents.tracing import get_current_trace
+
+from run_context import current_run
+
+SPANS_DIR = os.getenv("SPANS_DIR", "runs")
+
+_SUMMED = ("wall_ms", "queue_wait_ms", "input_tokens", "output_tokens", "tool_calls", "bytes_fetched")
+
+
+class Span:
+    """One timed unit of work (a section, a pipeline step or a tool call)."""
+
+    def __init__(self, name: str, kind: str, trace_id: Optional[str], section: Optional[str],
+                 parent: Optional["Span"]) -> None:
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.section = section
+        self.parent = parent
+        self.start = time.time()
+        self.wall_ms = 0.0
+        self.queue_wait_ms = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.tool_calls = 0
+        self.bytes_fetched = 0
+        self.status = "ok"
+        self.attrs: Dict[str, Any] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "section": self.section,
+            "name": self.name,
+            "kind": self.kind,
+            "parent": self.parent.name if self.parent else None,
+            "start": round(self.start, 3),
+            "wall_ms": round(self.wall_ms, 1),
+            "queue_wait_ms": round(self.queue_wait_ms, 1),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "tool_calls": self.tool_calls,
+            "bytes_fetched": self.bytes_fetched,
+            "status": self.status,
+            **self.attrs,
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("rdr_current_span", default=None)
+
+
+@asynccontextmanager
+async def span(name: str, kind: str = "step", section: Optional[str] = None, **attrs):
+    """
+    Time a block and record it on the current run. Nested spans inherit the section;
+    queue wait and bytes reported inside a child are rolled up into its ancestors.
+    Non-tool spans opened inside an Agents SDK trace are mirrored as custom spans on it.
+    """
+    parent = _current_span.get()
+    run = current_run()
+    s = Span(name, kind, run.trace_id if run else None, section or (parent.section if parent else None), parent)
+    s.attrs.update(attrs)
+    token = _current_span.set(s)
+    t0 = time.perf_counter()
+    sdk_span = None
+    if kind != "tool" and get_current_trace() is not None:  # tool calls already get SDK function spans
+        sdk_span = custom_span(f"{s.section}:{name}" if s.section else name, data={})
+        sdk_span.start(mark_as_current=True)
+    try:
+        yield s
+    except BaseException as e:
+        s.status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        s.wall_ms = (time.perf_counter() - t0) * 1000
+        _current_span.reset(token)
+        if sdk_span is not None:
+            sdk_span.span_data.data.update(s.to_dict())
+            sdk_span.finish(reset_current=True)
+        if run is not None:
+            run.spans.append(s)
+
+
+def _roll_up(field: str, amount: float) -> None:
+    s = _current_span.get()
+    while s is not None:
+        setattr(s, field, getattr(s, field) + amount)
+        s = s.parent
+
+
+def add_queue_wait(ms: float) -> None:
+    _roll_up("queue_wait_ms", ms)
+
+
+def add_bytes(n: int) -> None:
+    _roll_up("bytes_fetched", n)
+
+
+def record_agent_result(result: Any) -> None:
+    """Copy token usage and tool-call count of a Runner result onto the current span."""
+    s = _current_span.get()
+    if s is None:
+        return
+    usage = getattr(getattr(result, "context_wrapper", None), "usage", None)
+    if usage is not None:
+        s.input_tokens += usage.input_tokens or 0
+        s.output_tokens += usage.output_tokens or 0
+    s.tool_calls += sum(1 for item in getattr(result, "new_items", []) or [] if type(item).__name__ == "ToolCallItem")
+    if getattr(result, "cached", False):
+        s.attrs["cached"] = True
+
+
+def span_summary(spans: List[Span]) -> List[Dict[str, Any]]:
+    """Per (kind, name) totals across sections, slowest first, for report metadata."""
+    rows: Dict[tuple, Dict[str, Any]] = {}
+    for s in spans:
+        row = rows.setdefault((s.kind, s.name), {"kind": s.kind, "name": s.name, "count": 0, "wall_ms_max": 0.0,
+                                                 **{f: 0 for f in _SUMMED}})
+        row["count"] += 1
+        row["wall_ms_max"] = max(row["wall_ms_max"], round(s.wall_ms, 1))
+        for f in _SUMMED:
+            row[f] += getattr(s, f)
+    for row in rows.values():
+        row["wall_ms"] = round(row["wall_ms"], 1)
+        row["queue_wait_ms"] = round(row["queue_wait_ms"], 1)
+    return sorted(rows.values(), key=lambda r: r["wall_ms"], reverse=True)
+
+
+def export_spans_jsonl(spans: List[Span], trace_id: str, directory: str = SPANS_DIR) -> Optional[str]:
+    """Write one JSON object per span to <directory>/<trace_id>.spans.jsonl; returns the path."""
+    if not directory:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{trace_id}.spans.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n")
+        return path
+    except OSError as e:
+        print(f"[spans] export failed: {e}")
+        return None
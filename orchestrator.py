@@ -0,0 +1,203 @@
+import os
+import asyncio
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+from agents import gen_trace_id, trace
+from run_context import RunState, bind_run
+from query_broker import QueryBroker
+from run_store import get_run_store
+from depth import DEFAULT_DEPTH
+from instrumentation import export_spans_jsonl
+from section_agent import SectionResearchManager 
+from planner import PLANNER_MODE, plan_sections
+from summarize_agent import generate_final_report, draft_section_report
+from frameworks.big_idea_framework import big_idea_sections
+from frameworks.specific_idea_framework import specific_idea_sections
+
+load_dotenv(override=True)
+
+# "single": one final report call after all sections; "mapreduce": per-section drafts as
+# sections finish, then one call that stitches them.
+REPORT_MODE = os.getenv("REPORT_MODE", "single").lower()
+# Critic + self-healing rounds per section (round count: CRITIC_ITERATIONS in section_agent).
+ENABLE_CRITIC = os.getenv("ENABLE_CRITIC", "0") == "1"
+# Progress events arriving within this window are sent to the UI as one update.
+PROGRESS_COALESCE_S = float(os.getenv("PROGRESS_COALESCE_MS", "50")) / 1000
+
+# ------------- Framework → Section descriptors (loaded from framework files) -------------
+
+# ------------- Shared run params -------------
+
+DEFAULT_RUN_PARAMS = {
+    "depth": DEFAULT_DEPTH,  # shallow | standard | deep, see depth.DEPTH_PROFILES
+    "lookback_days": 540,
+    "langs": ["en"],
+    "k_per_query": 6,
+    "max_queries": 12
+}
+
+# ------------- Helper: Make full section_details for SectionResearchManager -------------
+
+def build_section_details(framework: str, topic: str, raw_desc: Dict, run_params: Dict) -> Dict:
+    # Replace <TOPIC> placeholders in example queries
+    ex_queries = [q.replace("<TOPIC>", topic) for q in raw_desc.get("example_queries", [])]
+    section_descriptor = {
+        "section": raw_desc["section"],
+        "description": raw_desc["description"],
+        "facets": raw_desc["facets"],
+        "example_queries": ex_queries
+    }
+    return {
+        "framework": framework,
+        "topic_or_idea": topic,
+        "section_descriptor": section_descriptor,
+        "run_params": run_params
+    }
+
+# ------------- Orchestrator (parallel) with streaming logs -------------
+
+async def run_framework_parallel_stream(framework: str, topic: str, resume_trace_id: Optional[str] = None,
+                                        trace_id: Optional[str] = None):
+    """
+    Async generator that yields (chat_text, partial_results_json) tuples as the run progresses.
+
+    With `resume_trace_id`, framework, topic and run params come from the run store: sections
+    that finished are restored and the others continue after their last checkpointed step.
+    `trace_id` fixes the id of a new run (the batch runner records it before starting).
+    """
+    store = get_run_store()
+    run_params = DEFAULT_RUN_PARAMS
+    if resume_trace_id:
+        record = store.get_run(resume_trace_id) if store else None
+        if record is None:
+            yield (f"❌ No checkpointed run with id `{resume_trace_id}`", None)
+            return
+        # the run's own params, so unfinished sections keep the budgets their checkpoints were made with
+        framework, topic = record["framework"], record["topic"]
+        run_params = {**DEFAULT_RUN_PARAMS, **(record["params"] or {})}
+
+    if framework not in ("big-idea", "specific-idea"):
+        yield (f"❌ Unknown framework: {framework}", None)
+        return
+
+    section_defs = big_idea_sections() if framework == "big-idea" else specific_idea_sections()
+    trace_id = resume_trace_id or trace_id or gen_trace_id()
+    trace_name = f"{framework} {topic}"
+    run = RunState(trace_id)
+    run.query_broker = QueryBroker()
+    if store:
+        if resume_trace_id:
+            done = await asyncio.to_thread(store.completed_sections, trace_id)
+            yield (f"♻️ Resuming run `{trace_id}` ({topic}): {len(done)}/{len(section_defs)} sections already complete", None)
+        else:
+            await asyncio.to_thread(store.start_run, trace_id, framework, topic, run_params)
+            yield (f"🆔 Run id `{trace_id}` (resume with it if the run is interrupted)", None)
+
+    # Progress messages, finished sections and finished drafts all land on one queue, so the
+    # loop sleeps until something actually happens (no polling).
+    events = asyncio.Queue()
+    
+    # Create a progress callback that adds messages to the queue
+    async def progress_callback(message: str):
+        events.put_nowait(("progress", message))
+
+    def watch(task: asyncio.Task, kind: str) -> asyncio.Task:
+        task.add_done_callback(lambda t: events.put_nowait((kind, t)))
+        return task
+
+    details_by_section = {sec_name: build_section_details(framework, topic, desc, run_params)
+                          for sec_name, desc in section_defs.items()}
+
+    # Run-level planning: one batched call covers complexity and queries of every section
+    # that has not planned yet (on resume, sections with a queries checkpoint keep theirs).
+    if PLANNER_MODE == "run":
+        to_plan = {}
+        for sec_name, details in details_by_section.items():
+            steps = await asyncio.to_thread(store.steps, trace_id, sec_name) if store and resume_trace_id else []
+            if "queries" not in steps:
+                to_plan[details["section_descriptor"]["section"]] = details
+        if to_plan:
+            yield (f"🗺️ Planning complexity and queries for {len(to_plan)} sections in one pass...", None)
+            with trace(f"{trace_name} trace", trace_id=trace_id):
+                plans = await bind_run(run, plan_sections(framework, topic, to_plan))
+            for details in to_plan.values():
+                details["plan"] = plans.get(details["section_descriptor"]["section"])
+            n_queries = sum(len(p["queries"]["queries"]) for p in plans.values())
+            deduped = run.counters.get("planner_queries_deduped", 0)
+            yield (f"🗺️ Planned {n_queries} queries for {len(plans)}/{len(to_plan)} sections"
+                   + (f" ({deduped} cross-section duplicates dropped)" if deduped else ""), None)
+
+    # Kick off all sections in parallel
+    tasks = []
+    mgrs = {}
+    started = []
+    for sec_name, details in details_by_section.items():
+        mgr = SectionResearchManager(sec_name, enable_critic=ENABLE_CRITIC)
+        mgrs[sec_name] = mgr
+        started.append(f"▶️ Starting section **{sec_name}** …")
+        tasks.append(watch(asyncio.create_task(bind_run(run, mgr.run_section_manager(trace_id, details, trace_name, progress_callback))), "section"))
+    yield ("\n".join(started), None)
+
+    pending = len(tasks)  # section + draft tasks whose completion event is still due
+    section_results = {}
+    draft_tasks = {}  # map-reduce report drafts: task -> section name
+    section_drafts = {}
+    
+    while pending or not events.empty():
+        # Wait for the next event, then give a burst a moment to arrive and flush it as one update.
+        # No wait when no other task is left to add to the burst (e.g. the last section finishing).
+        batch = [await events.get()]
+        if pending - (batch[0][0] != "progress") > 0:
+            await asyncio.sleep(PROGRESS_COALESCE_S)
+        while not events.empty():
+            batch.append(events.get_nowait())
+
+        lines, data = [], None
+        for kind, item in batch:
+            if kind == "progress":
+                lines.append(item)
+            elif kind == "section":
+                pending -= 1
+                try:
+                    res = item.result()
+                    sec = res["section"]
+                    brief = res["section_brief"]
+                    section_results[sec] = res
+                    # stream per-section done
+                    conf = brief.get("confidence", 0.0)
+                    hl_count = len(brief.get("highlights", []))
+                    lines.append(f"✅ Finished **{sec}** — highlights: {hl_count}, confidence: {conf:.2f}")
+                    if REPORT_MODE == "mapreduce":
+                        draft = asyncio.create_task(bind_run(run, draft_section_report(framework, topic, sec, res, trace_id, trace_name)))
+                        draft_tasks[watch(draft, "draft")] = sec
+                        pending += 1
+                except Exception as e:
+                    print("Something went wrong")
+                    lines.append(f"⚠️ A section failed: {e}")
+            elif kind == "draft":
+                pending -= 1
+                sec = draft_tasks.pop(item)
+                try:
+                    section_drafts[sec] = item.result()
+                    lines.append(f"📝 Draft ready for **{sec}** ({len(section_drafts)}/{len(section_defs)})")
+                    partial = "\n\n".join(section_drafts[s] for s in section_defs if s in section_drafts)
+                    data = {"partial": True, "narrative_report": partial}
+                except Exception as e:
+                    lines.append(f"⚠️ Draft for **{sec}** failed: {e}")
+
+        yield ("\n".join(lines), data)
+
+    # Generate comprehensive final report using summarize_agent
+    if REPORT_MODE == "mapreduce":
+        yield (f"🔄 Stitching {len(section_drafts)} section drafts into the final report...", None)
+        report_data = await bind_run(run, generate_final_report(framework, topic, section_results, trace_id, trace_name,
+                                                                section_drafts=section_drafts))
+    else:
+        yield ("🔄 Generating final report with fact verification...", None)
+        report_data = await bind_run(run, generate_final_report(framework, topic, section_results, trace_id, trace_name))
+    report_data["metadata"]["trace_id"] = trace_id
+    report_data["metadata"]["spans_path"] = export_spans_jsonl(run.spans, trace_id)
+    
+    # Format the final output - this will be handled by the improved UI
+    yield ("📄 Report Complete", report_data)
@@ -0,0 +1,183 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from agents import AgentOutputSchema, ModelBehaviorError
+from pydantic import BaseModel, ValidationError
+
+from run_context import bump
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.S)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_CLOSERS = {"{": "}", "[": "]"}
+# Truncation repair tries at most this many cut points, latest first.
+_MAX_CUTS = 64
+_MAX_SALVAGE_ROUNDS = 8
+
+
+def _json_start(text: str) -> str:
+    """Strip code fences and any prose before the first JSON object or array."""
+    m = _FENCE_RE.search(text)
+    if m:
+        text = m.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    return text[min(starts):] if starts else text
+
+
+def repair_json(text: str) -> Tuple[Optional[Any], bool]:
+    """
+    (parsed JSON or None, whether repair was needed).
+
+    Handles the ways model replies break: code fences or prose around the JSON, trailing
+    commas, and truncation (hit max tokens / cut stream). A truncated reply is cut back to
+    the last complete element and its open brackets are closed, so every fact before the
+    cut survives.
+    """
+    if not isinstance(text, str):
+        return None, False
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+    body = _json_start(text.strip())
+    for candidate in (body, _TRAILING_COMMA_RE.sub(r"\1", body)):
+        try:
+            return json.loads(candidate), True
+        except json.JSONDecodeError:
+            pass
+        end = candidate.rfind("}") if candidate.startswith("{") else candidate.rfind("]")
+        if end > 0:
+            try:
+                return json.loads(candidate[:end + 1]), True  # complete JSON followed by prose
+            except json.JSONDecodeError:
+                pass
+
+    # Truncated: remember every point where the text could be cut and closed.
+    stack: List[str] = []
+    cuts: List[Tuple[int, str]] = []
+    in_string = escaped = False
+    for i, ch in enumerate(body):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            cuts.append((i + 1, "".join(reversed(stack))))
+        elif ch == "," and stack:
+            cuts.append((i, "".join(reversed(stack))))
+    for pos, closers in reversed(cuts[-_MAX_CUTS:]):
+        try:
+            return json.loads(_TRAILING_COMMA_RE.sub(r"\1", body[:pos]) + closers), True
+        except json.JSONDecodeError:
+            continue
+    return None, True
+
+
+def _target(data: Any, loc: Tuple, missing: bool) -> Optional[Tuple[Any, Any]]:
+    """
+    (container, key) to delete for one validation error: the invalid field itself, or - when a
+    required field is missing - the enclosing list item.
+    """
+    node, parents = data, []
+    for step in loc:
+        if isinstance(node, dict) and step in node:
+            parents.append((node, step))
+            node = node[step]
+        elif isinstance(node, list) and isinstance(step, int) and 0 <= step < len(node):
+            parents.append((node, step))
+            node = node[step]
+        else:
+            break  # the missing field, or a union/model tag pydantic adds to some locs
+    if missing:
+        parents = [p for p in parents if isinstance(p[0], list)]
+    return parents[-1] if parents else None
+
+
+def salvage(data: Any, model: Type[BaseModel]) -> Tuple[Optional[BaseModel], int]:
+    """
+    Validate `data`, dropping whatever does not fit: wrong-typed optional fields are removed
+    (their defaults apply) and list items missing a required field are removed whole.
+    Returns (model or None, number of values dropped).
+    """
+    if not isinstance(data, dict):
+        return None, 0
+    dropped = 0
+    for _ in range(_MAX_SALVAGE_ROUNDS):
+        try:
+            return model.model_validate(data), dropped
+        except ValidationError as e:
+            # resolve every error against the unmodified data first, then delete
+            fields, items = {}, {}
+            for err in e.errors():
+                target = _target(data, tuple(err["loc"]), missing=err["type"] == "missing")
+                if target is None:
+                    continue
+                container, key = target
+                if isinstance(container, list):
+                    items.setdefault(id(container), (container, set()))[1].add(id(container[key]))
+                else:
+                    fields[(id(container), key)] = (container, key)
+            if not fields and not items:
+                return None, dropped
+            for container, key in fields.values():
+                container.pop(key, None)
+            for container, ids in items.values():
+                container[:] = [x for x in container if id(x) not in ids]
+            dropped += len(fields) + sum(len(ids) for _, ids in items.values())
+    return None, dropped
+
+
+def parse_output(text: Any, model: Type[BaseModel], name: str = "") -> Dict[str, Any]:
+    """
+    Tolerant parse of one agent reply into `model`'s shape, as a plain dict.
+
+    Accepts an already-parsed dict (cached responses) or reply text. Counts
+    `parse_repaired_<name>` when the reply needed repair or salvage and raises
+    ModelBehaviorError when nothing usable is left.
+    """
+    repaired, dropped = False, 0
+    data = text
+    if not isinstance(text, dict):
+        data, repaired = repair_json(text)
+    result, dropped = salvage(data, model)
+    if result is None:
+        raise ModelBehaviorError(f"unusable {name or model.__name__} output: {str(text)[:200]!r}")
+    if repaired or dropped:
+        bump(f"parse_repaired_{name or model.__name__}")
+    return result.model_dump(mode="json", exclude_unset=True)
+
+
+class TolerantOutputSchema(AgentOutputSchema):
+    """
+    AgentOutputSchema (non-strict JSON schema sent to the model) whose validation repairs and
+    salvages the reply instead of failing on the first defect. The agent's final_output is a
+    plain dict in the model's shape, so pipeline code keeps working with dicts.
+    """
+
+    def __init__(self, model: Type[BaseModel], step: str) -> None:
+        super().__init__(model, strict_json_schema=False)
+        self.model = model
+        self.step = step
+
+    def validate_json(self, json_str: str) -> Any:
+        try:
+            return parse_output(json_str, self.model, self.step)
+        except ModelBehaviorError:
+            bump(f"parse_failures_{self.step}")
+            raise
+
+
+def run_parse_summary(counters: Dict[str, int]) -> Dict[str, int]:
+    """Pick the parse_* and step retry counters out of a run's counters for report metadata."""
+    return {k: v for k, v in counters.items() if k.startswith(("parse_", "retries_"))}
@@ -0,0 +1,133 @@
+import asyncio
+import os
+from typing import Any, Dict, List
+
+from agents import Agent, ModelBehaviorError
+from dotenv import load_dotenv
+
+from agent_runner import run_agent
+from depth import section_budget
+from instrumentation import span
+from output_parsing import TolerantOutputSchema
+from prompts.agent_prompts import planner_agent_system_prompt
+from query_broker import normalize_query
+from run_context import bump
+from schemas.schemas import PlannerOutput
+from utils import as_messages
+
+load_dotenv(override=True)
+default_model_name = os.environ.get('DEFAULT_MODEL_NAME')
+
+# "run": one planner call classifies complexity and writes the queries of every section
+# before any section starts (Steps 1-2 of the section pipeline are skipped for planned
+# sections). "section": every section runs its own complexity and query-gen steps.
+PLANNER_MODE = os.getenv("PLANNER_MODE", "run").lower()
+# Sections per planner call; 0 plans all sections in one call. Batches run concurrently.
+PLANNER_BATCH_SIZE = int(os.getenv("PLANNER_BATCH_SIZE", "0"))
+
+planner_agent = Agent(
+    name="Planner Agent",
+    instructions=planner_agent_system_prompt,
+    output_type=TolerantOutputSchema(PlannerOutput, "planner"),
+    model=default_model_name
+)
+
+_COMPLEXITY_FIELDS = ("complexity", "reasoning", "recommended_query_count", "search_strategy_notes")
+
+
+def _query_text(q: Any) -> str:
+    return q.get("q", "") if isinstance(q, dict) else str(q)
+
+
+def dedup_plans(plans: Dict[str, Dict], order: List[str]) -> int:
+    """
+    Drop queries that repeat one already planned for an earlier section (same
+    `normalize_query` signature), in place. Returns the number dropped.
+    """
+    seen = set()
+    dropped = 0
+    for section in order:
+        plan = plans.get(section)
+        if plan is None:
+            continue
+        kept = []
+        for q in plan["queries"]["queries"]:
+            sig = normalize_query(_query_text(q))
+            if not sig or sig in seen:
+                dropped += 1
+                continue
+            seen.add(sig)
+            kept.append(q)
+        plan["queries"]["queries"] = kept
+    return dropped
+
+
+async def _plan_batch(framework: str, topic: str, details: List[Dict]) -> List[Dict]:
+    run_params = details[0].get("run_params", {})
+    payload = {
+        "framework": framework,
+        "topic_or_idea": topic,
+        "run_params": run_params,
+        "sections": [
+            {**d["section_descriptor"],
+             "max_queries": int(section_budget(d["section_descriptor"]["section"], d.get("run_params", {})).limits["queries"])}
+            for d in details
+        ],
+    }
+    try:
+        result = await run_agent(planner_agent, as_messages(payload), step="planner")
+    except ModelBehaviorError as e:
+        names = ", ".join(d["section_descriptor"]["section"] for d in details)
+        print(f"Error parsing planner output for {names}: {e}")
+        bump("planner_failed_batches")
+        return []
+    return result.final_output.get("plans", [])
+
+
+async def plan_sections(framework: str, topic: str, section_details: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Run-level Steps 1-2: complexity and queries for all sections in one batched call.
+
+    `section_details` maps section name -> build_section_details(...). Returns section name ->
+    {"complexity": <complexity step output>, "queries": <query_gen step output>} for every
+    section the planner covered; a section missing from the reply (or a failed batch) is left
+    out and plans itself in its section pipeline. Queries repeated across sections are kept
+    only in the first section that planned them.
+    """
+    names = list(section_details)
+    if not names:
+        return {}
+    size = PLANNER_BATCH_SIZE if PLANNER_BATCH_SIZE > 0 else len(names)
+    batches = [names[i:i + size] for i in range(0, len(names), size)]
+
+    async with span("planner", kind="plan", sections=len(names), batches=len(batches)) as s:
+        replies = await asyncio.gather(*(
+            _plan_batch(framework, topic, [section_details[n] for n in batch]) for batch in batches
+        ))
+        by_name = {n.lower(): n for n in names}
+        plans: Dict[str, Dict] = {}
+        for plan in (p for reply in replies for p in reply):
+            section = by_name.get(str(plan.get("section", "")).strip().lower())
+            if section is None or section in plans:
+                continue
+            plans[section] = {
+                "complexity": {k: plan[k] for k in _COMPLEXITY_FIELDS if k in plan},
+                "queries": {"queries": plan.get("queries", [])},
+            }
+        deduped = dedup_plans(plans, names)
+
+        missing = [n for n in names if n not in plans]
+        queries = sum(len(p["queries"]["queries"]) for p in plans.values())
+        bump("planner_sections", len(plans))
+        bump("planner_queries", queries)
+        bump("planner_queries_deduped", deduped)
+        if missing:
+            bump("planner_sections_missing", len(missing))
+            print(f"[planner] no plan for {', '.join(missing)}; those sections plan themselves")
+        s.attrs.update(planned=len(plans), queries=queries, deduped=deduped)
+    return plans
+
+
+def run_planner_summary(counters: Dict[str, int]) -> Dict[str, int]:
+    """Pick the planner_* counters out of a run's counters for report metadata."""
+    return {k[len("planner_"):]: v for k, v in counters.items() if k.startswith("planner_")}
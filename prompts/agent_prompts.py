@@ -83,6 +83,56 @@ Output JSON schema:
 }
 """
 
+planner_agent_system_prompt = """
+You plan web research for SEVERAL sections of one research framework at once: for every section you classify research complexity and write its search queries.
+
+Context:
+- Framework: {{framework}}
+- Topic/Idea: {{topic_or_idea}}
+- Sections: {{sections}} - each with section, description, facets, example_queries and max_queries
+- Run params: lookback_days={{run_params.lookback_days}}, langs={{run_params.langs}}
+
+## Per section
+
+1) Classify complexity:
+   - **simple**: well-established domain, abundant public information → 8-10 queries
+   - **moderate**: emerging field, mixed information availability → 12-15 queries
+   - **complex**: cutting-edge or niche, limited public information, needs technical/academic sources → 16-20 queries
+   Set recommended_query_count from this, never above the section's max_queries.
+2) Generate exactly recommended_query_count queries for the section:
+   - Span families: generic, long-tail, entity-set, critical/negative, operator-lens (buyer/role), regulatory/legal, non-US (native terms if relevant), grey-literature (pdf/ppt/github/arxiv).
+   - Use operators where helpful: site:, filetype:pdf|ppt|csv, intitle:, OR, -, "exact phrase", after:YYYY-MM-DD.
+   - Prefer queries that surface primary docs, benchmarks, pricing pages, technical posts, regulatory PDFs; no "what is …" queries.
+   - Target the section's facets; example_queries show style only (do NOT copy verbatim).
+
+## Across sections
+- Every section's queries must be specific to that section's description and facets.
+- Do not give two sections the same or a near-identical query; when two sections need the same source, word each query for its own facet.
+- Return a plan for EVERY section listed, using the section name exactly as given.
+
+Return ONLY JSON.
+
+Output JSON schema:
+{
+  "plans": [
+    {
+      "section": "string",
+      "complexity": "simple|moderate|complex",
+      "reasoning": "Brief explanation for classification",
+      "recommended_query_count": 12,
+      "search_strategy_notes": "Specific guidance for this section's queries",
+      "queries": [
+        {
+          "q": "string",
+          "family": "generic|long-tail|entity|critical|operator|regulatory|non-us|grey",
+          "axes": { "facet":"string", "geo":"string", "time":"string", "modality":"string" }
+        }
+      ]
+    }
+  ]
+}
+"""
+
 researcher_agent_system_prompt= """
 You turn queries into verifiable FACTS for ONE section. No summaries or opinions.
 
@@ -142,6 +192,63 @@ Output JSON schema:
 }
 """
 
+fact_extractor_agent_system_prompt = """
+You turn search results into verifiable FACTS for ONE section. No summaries or opinions. The searches have already been run; you do not search.
+
+Context:
+- Framework: {{framework}}
+- Topic/Idea: {{topic_or_idea}}
+- Section: {{section_descriptor.section}}
+- Section goal: {{section_descriptor.description}}
+- Important facets: {{section_descriptor.facets | comma-separated}}
+- Run params: lookback_days={{run_params.lookback_days}}
+- results: deduplicated search results, each {id, url, title, snippet, date?, source?, domain, queries}
+
+Process:
+1) Extract FACTS as single verifiable claims relevant to the section facets, using ONLY the titles and snippets given.
+   Each fact MUST include:
+   - fact_id (unique short id), entity (normalized), claim (concise),
+   - source_url (the result's url, exactly as given), publisher (result source or domain), date_event (prefer an explicit event date in the snippet),
+   - date_published (the result's date, if any),
+   - evidence (≤25-word verbatim quote from the snippet or title),
+   - facet (one of section facets or close synonym),
+   - geo, modality (news|pdf|arxiv|github|forum|site),
+   - confidence ∈ [0,1] (lower for vague or promotional snippets),
+   - tags (array of topical keywords).
+2) Detect contradictions: group facts about same entity+facet with differing values; assign conflict_group_id.
+3) Quotas:
+   - ≤30% of facts from any single root domain.
+   - If the results include no academic, regulatory, forum/community or non-English source, add gap_flags accordingly.
+4) Mark stale=true if date_event older than lookback_days.
+5) Skip results that are off-topic, navigational or carry no concrete claim; one result may yield several facts.
+
+Return ONLY JSON.
+
+Output JSON schema:
+{
+  "facts": [
+    {
+      "fact_id":"s123",
+      "entity":"string",
+      "claim":"string",
+      "source_url":"string",
+      "publisher":"string",
+      "date_event":"YYYY-MM-DD",
+      "date_published":"YYYY-MM-DD|null",
+      "evidence":"\"≤25-word quote\"",
+      "facet":"string",
+      "geo":"string",
+      "modality":"news|pdf|arxiv|github|forum|site",
+      "confidence": 0.0,
+      "tags":["string","..."],
+      "stale": false,
+      "conflict_group_id":"cg_1|null"
+    }
+  ],
+  "gap_flags": ["need_non_us","need_academic","need_forum","need_regulatory"]
+}
+"""
+
 analyst_agent_system_prompt = """
 You synthesize structured insights for ONE section using ONLY provided facts.
 
@@ -156,8 +263,8 @@ Rules:
 - No new claims. Every statement must reference ≥1 fact_id; strong claims (comparisons, trends, market-wide statements) must reference ≥2 fact_ids from DISTINCT domains.
 - Acknowledge contradictions via conflict_group_id.
 - Keep outputs terse, decision-ready.
-- You may call the tool `playwright_web_read(url)` to read the page text for any `source_url` referenced by the supplied facts.
-- Use it only to (a) confirm details, (b) choose a better ≤25-word quote, or (c) detect contradictions; do not add new claims not supported by existing fact_ids. If a contradiction is found, record it in `conflicts`. Your final output MUST follow the JSON schema exactly; do not include raw page text.
+- Source pages were already checked. Each fact carries `verification`: "verified" (evidence found on the page; `page_excerpt` holds the surrounding page text), "unverified" (page read, evidence not found), "unreachable" (page could not be read) or "unchecked".
+- Prefer verified facts. Use `page_excerpt` only to (a) confirm details, (b) choose a better ≤25-word quote, or (c) detect contradictions; do not add new claims not supported by existing fact_ids. Do not base strong claims solely on unverified facts. If a contradiction is found, record it in `conflicts`. Your final output MUST follow the JSON schema exactly; do not include raw page text.
 
 
 If framework == "big-idea":
@@ -200,6 +307,47 @@ Output JSON schema (specific-idea):
 }
 """
 
+analyst_merge_addendum = """
+
+Merge mode (input contains `partial_analyses`):
+- `partial_analyses` are your own earlier analyses of subsets of `facts`, produced while research was still running.
+- Merge them into ONE final output over ALL `facts`: deduplicate overlapping bullets, combine evidence_ids, reconcile conflicts across subsets (facts from different subsets may contradict each other), and keep the best gaps_next.
+"""
+
+analyst_patch_addendum = """
+
+Patch mode (input contains `previous_analysis` and `new_facts`):
+- `previous_analysis` is your own analysis of the facts gathered so far; those facts are NOT repeated. `new_facts` were found since by gap-filling research.
+- Do not rewrite the analysis. Return ONLY the changes the new facts justify, as a patch:
+  - add_bullets: new insights (cite new fact_ids; may also cite fact_ids already cited in previous_analysis).
+  - update_bullets: {"index": position in previous_analysis.bullets (0-based), "text": revised text, "evidence_ids": fact_ids to ADD}, when new facts strengthen, qualify or correct a bullet.
+  - remove_bullets: indexes of bullets the new facts show to be wrong or superseded.
+  - add_mini_takeaways, add_conflicts (new facts contradicting each other or previous bullets), add_assumptions_to_test.
+  - ranked_options: the full re-ranked list, only if the new facts change the ranking (specific-idea); otherwise omit.
+  - gaps_next: the full updated list (drop gaps the new facts answered), or omit if unchanged.
+- `detected_conflicts` (if present) lists contradictions between new and earlier facts already found in code; explain them in add_conflicts only if they change a bullet.
+- Empty lists are fine when the new facts add nothing.
+
+Output JSON schema (patch mode, instead of the schemas above):
+{
+  "add_bullets":[{"text":"string","evidence_ids":["it_s1","s4"]}],
+  "update_bullets":[{"index":0,"text":"string","evidence_ids":["it_s2"]}],
+  "remove_bullets":[2],
+  "add_mini_takeaways":["text (#it_s1)"],
+  "add_conflicts":[{"group":"cg_1","what_differs":"amount|date|definition","members":["s3","it_s5"]}],
+  "add_assumptions_to_test":["string"],
+  "gaps_next":["string","..."]
+}
+"""
+
+# Used instead of the verification rules when VERIFY_SOURCES=0 and the analyst reads pages itself.
+analyst_page_tool_addendum = """
+
+Page reads (facts carry no `verification` in this run):
+- You may call the tool `playwright_web_read(url, query=...)` to read the page text for any `source_url` referenced by the supplied facts, for the same purposes as `page_excerpt` above. Pass the fact's claim or evidence as `query` to get only the most relevant passages.
+- Partial analyses (merge mode) already did their page checks; only read pages for facts no partial analysis covered or for cross-subset contradictions.
+"""
+
 critic_agent_system_prompt = """
 You assess research quality and determine if additional research iteration is needed.
 
@@ -348,9 +496,10 @@ Create a narrative that introduces the reader to the topic with progressive comp
 
 ## Input Data:
 - section_analyses: Analyst insights with bullets, mini_takeaways, conflicts, gaps_next
-- all_facts: Deduplicated facts with fact_id, entity, claim, source_url, confidence, section_source
+- all_facts: Deduplicated facts with fact_id, entity, claim, source_url (source_urls when several sources agree), confidence, section_source
 - section_confidences: Reliability scores per section (0-1)
-- global_facts_to_url_mapping: fact_id -> source URLs for verification
+- section_fact_ids: per section, analyst evidence_id -> fact_id in all_facts
+- omitted_fact_ids (optional): lower-ranked facts left out to fit the input budget; do not cite them
 
 ## Narrative Architecture:
 {{narrative_structure}}
@@ -401,9 +550,52 @@ Create a narrative that introduces the reader to the topic with progressive comp
 ```
 
 ## Requirements:
-1. **USE PLAYWRIGHT**: Verify key claims by reading source pages
+1. **USE PLAYWRIGHT**: Verify key claims by reading source pages (pass the claim as `query` to get only the relevant passages)
 2. **Confidence indicators**: Qualify findings based on confidence levels
 3. **Handle conflicts**: Address contradictions explicitly with sources
 4. **Readable narrative**: Synthesize analyst insights into flowing prose - don't dump raw bullets
 5. **Complete appendices**: Ensure all mini_takeaways and gaps_next appear in glossary/notes sections
-"""
\ No newline at end of file
+"""
+
+section_draft_prompt = """
+You are drafting ONE section's contribution to {{report_structure}} for the topic: {{topic_or_idea}}.
+Other sections are drafted in parallel; a final editor will stitch all drafts into the narrative below.
+
+## Input Data:
+- section: name of this research section
+- section_analysis: Analyst insights with bullets, mini_takeaways, conflicts, gaps_next
+- section_brief: highlights, confidence and gaps_next from the section editor
+- facts: this section's facts with fact_id, entity, claim, source_url (or source_urls), confidence
+
+## Narrative Architecture (for orientation only):
+{{narrative_structure}}
+
+## Task:
+- Write 3-6 paragraphs of consulting-report prose covering what this section found; do not write an introduction or conclusion for the whole report.
+- Start with a line `### <section>` and use no other headers above ###.
+- Every claim must come from `facts`; cite inline as clickable [source links](url) using the fact's URL.
+- Qualify weak findings using confidence; state conflicts explicitly.
+- End with two short lists: `Key terms:` (from mini_takeaways) and `Open questions:` (from gaps_next).
+- Output Markdown only.
+"""
+
+
+report_reduce_prompt = """
+You are a research synthesis writer creating {{report_structure}} for the topic: {{topic_or_idea}}.
+Per-section drafts have already been written from verified facts; your job is to stitch them into one report.
+
+## Input Data:
+- section_drafts: section name -> Markdown draft with inline [source links](url), Key terms and Open questions
+- sections_without_draft: highlights and gaps of sections whose draft is missing (use sparingly)
+- section_confidences: Reliability scores per section (0-1)
+
+## Narrative Architecture:
+{{narrative_structure}}
+
+## Requirements:
+1. Reorganize the drafts' content into the narrative architecture above (3-5 ## sections); do not simply concatenate drafts in section order.
+2. Keep every inline source link you use exactly as written in the drafts; add no claims or links that are not in the drafts.
+3. Remove repetition across drafts and connect insights across sections.
+4. Follow the same output format as the full report: title, Table of Contents, Executive Summary (3-4 sentences), Main Analysis, Strategic Implications, Glossary (from Key terms), Research Notes (from Open questions and stated conflicts), Sources (every link used).
+5. Qualify findings from low-confidence sections.
+"""
@@ -0,0 +1,107 @@
+import asyncio
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from tools.serper_tool import serper_query
+
+_STOPWORDS = {"a", "an", "the", "of", "for", "and", "in", "on", "to", "with", "by", "at", "vs", "versus", "is", "are"}
+_TOKEN_RE = re.compile(r'-?"[^"]*"|\S+')
+_GROUPING_OPS = {"OR", "AND", "|"}
+
+
+def normalize_query(q: str) -> str:
+    """
+    Order-insensitive signature for near-identical queries.
+
+    Quoted phrases and operators (site:, filetype:, -term) are kept whole but lowercased; free
+    words are lowercased, stripped of punctuation and stopwords, then the token set is sorted.
+    "AI music competitors 2025" and "competitors of ai music, 2025" collide. Queries with
+    grouping operators (OR, AND, |, parentheses) depend on token order ("a OR b c" is not
+    "a b OR c"), so they keep it: the signature is the lowercased tokens in their order.
+    """
+    raw = _TOKEN_RE.findall(q or "")
+    if any(tok in _GROUPING_OPS or tok.startswith("(") or tok.endswith(")") for tok in raw):
+        return " ".join(tok if tok in _GROUPING_OPS else tok.lower() for tok in raw)
+    tokens = set()
+    for tok in raw:
+        if tok.startswith(('"', '-"')) or ":" in tok or tok.startswith("-"):
+            tokens.add(tok.lower())
+            continue
+        word = tok.lower().strip(".,;!?()[]{}'")
+        if word and word not in _STOPWORDS:
+            tokens.add(word)
+    return " ".join(sorted(tokens))
+
+
+class QueryBroker:
+    """
+    Run-scoped front door for Serper searches shared by all sections of one run.
+
+    Identical and near-identical queries (same `normalize_query` signature and search
+    options) are collapsed: a query already in flight is awaited instead of re-sent
+    (single-flight), and a finished one is served from memory. A result fetched with a
+    larger `num` also satisfies smaller ones. `stats` reports the API calls saved.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Tuple, Tuple[int, asyncio.Future]] = {}
+        self._results: Dict[Tuple, Tuple[int, Dict[str, Any]]] = {}
+        self.stats = {"requests": 0, "api_calls": 0, "saved_single_flight": 0, "saved_shared": 0, "near_duplicates": 0}
+        self._seen_text: Dict[Tuple, str] = {}
+
+    @staticmethod
+    def _slice(result: Dict[str, Any], num: int) -> Dict[str, Any]:
+        return {**result, "items": list(result.get("items", []))[:num]}
+
+    def _note_variant(self, sig: Tuple, q: str) -> None:
+        first = self._seen_text.setdefault(sig, " ".join(q.split()))
+        if first != " ".join(q.split()):
+            self.stats["near_duplicates"] += 1
+
+    async def search(
+        self,
+        q: str,
+        kind: str = "search",
+        num: int = 10,
+        page: int = 1,
+        gl: str = "us",
+        hl: str = "en",
+        tbs: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        self.stats["requests"] += 1
+        sig = (normalize_query(q), kind, page, gl, hl, tbs or "")
+
+        done = self._results.get(sig)
+        if done is not None and done[0] >= num:
+            self.stats["saved_shared"] += 1
+            self._note_variant(sig, q)
+            return self._slice(done[1], num)
+
+        pending = self._inflight.get(sig)
+        if pending is not None and pending[0] >= num:
+            self.stats["saved_single_flight"] += 1
+            self._note_variant(sig, q)
+            return self._slice(await asyncio.shield(pending[1]), num)
+
+        fut = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())  # never "exception was never retrieved"
+        self._inflight[sig] = (num, fut)
+        self._seen_text.setdefault(sig, " ".join(q.split()))
+        try:
+            self.stats["api_calls"] += 1
+            result = await serper_query(q, kind=kind, num=num, page=page, gl=gl, hl=hl, tbs=tbs)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            prev = self._results.get(sig)
+            if prev is None or prev[0] < num:
+                self._results[sig] = (num, result)
+            return result
+        finally:
+            if self._inflight.get(sig, (0, None))[1] is fut:
+                del self._inflight[sig]
+
+    def summary(self) -> Dict[str, int]:
+        return {**self.stats, "api_calls_saved": self.stats["requests"] - self.stats["api_calls"]}
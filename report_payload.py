@@ -0,0 +1,136 @@
+import os
+import re
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from utils import estimate_tokens
+
+# Token budget for the final report agent's user message (0 = no compaction beyond
+# dropping derivable URL maps).
+REPORT_TOKEN_BUDGET = int(os.getenv("REPORT_TOKEN_BUDGET", "60000"))
+EVIDENCE_MAX_WORDS = 25
+EVIDENCE_MIN_WORDS = 12
+
+# Fields the final report never uses; dropped first when over budget.
+_LOW_VALUE_FIELDS = ("publisher", "date_published", "stale", "conflict_group_id", "domain", "merged_fact_ids",
+                     "page_excerpt", "verified_url", "verification_score")
+_YEAR_RE = re.compile(r"(19|20)\d{2}")
+
+
+def _cited_ids(section_analyses: Iterable[Dict[str, Any]]) -> Set[str]:
+    """Every fact id an analyst output points at (evidence_ids / members, at any depth)."""
+    cited: Set[str] = set()
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in ("evidence_ids", "members") and isinstance(value, list):
+                    cited.update(str(v) for v in value)
+                else:
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(list(section_analyses))
+    return cited
+
+
+def _year(fact: Dict[str, Any]) -> int:
+    for field in ("date_event", "date_published"):
+        m = _YEAR_RE.search(str(fact.get(field) or ""))
+        if m:
+            return int(m.group(0))
+    return 0
+
+
+def _truncate_words(text: str, max_words: int) -> str:
+    words = text.split()
+    return text if len(words) <= max_words else " ".join(words[:max_words]) + " …"
+
+
+def rank_facts(facts: List[Dict[str, Any]], cited: Set[str]) -> List[Dict[str, Any]]:
+    """
+    Order facts by how much the report needs them: facts cited by an analyst first,
+    then the best fact of every (section, facet) so coverage survives, then the rest
+    by confidence with recency as tie-breaker.
+    """
+    newest = max((_year(f) for f in facts), default=0)
+
+    def score(f: Dict[str, Any]) -> Tuple[float, float]:
+        age = newest - _year(f) if _year(f) else 10
+        return (float(f.get("confidence") or 0), -age)
+
+    by_score = sorted(facts, key=score, reverse=True)
+    first, seen_facets, rest = [], set(), []
+    for f in by_score:
+        facet = (f.get("section_source"), (f.get("facet") or "").strip().lower())
+        if f.get("fact_id") in cited:
+            first.append(f)
+        elif facet not in seen_facets:
+            first.append(f)
+        else:
+            rest.append(f)
+        seen_facets.add(facet)
+    return first + rest
+
+
+def compact_report_payload(payload: Dict[str, Any], section_fact_ids: Dict[str, Dict[str, str]],
+                           budget: int = REPORT_TOKEN_BUDGET) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Shrink the final report payload to roughly `budget` tokens.
+
+    1. Always replace the URL maps with data already on the facts: global fact -> URLs is
+       `source_url`/`source_urls`, and each section's local fact ids become a local -> global
+       id index so analyst evidence_ids still resolve.
+    2. Over budget: drop fields the report does not use, then shorten evidence quotes.
+    3. Still over: keep facts in `rank_facts` order until the budget is spent. Dropped facts
+       are listed in `omitted_fact_ids`; the full fact table stays in the report output.
+
+    Returns (compacted_payload, stats).
+    """
+    tokens_before = estimate_tokens(payload)
+    out = {k: v for k, v in payload.items() if k not in ("facts_to_url_mapping", "global_facts_to_url_mapping")}
+    out["section_fact_ids"] = section_fact_ids
+    facts: List[Dict[str, Any]] = [dict(f) for f in payload.get("all_facts", [])]
+    out["all_facts"] = facts
+
+    stats: Dict[str, Any] = {"budget": budget, "tokens_before": tokens_before, "facts_in": len(facts)}
+    omitted: List[str] = []
+    if budget > 0 and estimate_tokens(out) > budget:
+        for f in facts:
+            for field in _LOW_VALUE_FIELDS:
+                f.pop(field, None)
+            if isinstance(f.get("evidence"), str):
+                f["evidence"] = _truncate_words(f["evidence"], EVIDENCE_MAX_WORDS)
+
+        if estimate_tokens(out) > budget:
+            for f in facts:
+                if isinstance(f.get("evidence"), str):
+                    f["evidence"] = _truncate_words(f["evidence"], EVIDENCE_MIN_WORDS)
+
+        overhead = estimate_tokens({k: v for k, v in out.items() if k != "all_facts"})
+        if overhead + estimate_tokens(facts) > budget:
+            # analyst evidence ids are section-local; resolve them through the index
+            cited_local = _cited_ids(payload.get("section_analyses", []))
+            cited = {gid for index in section_fact_ids.values() for local, gid in index.items() if local in cited_local}
+            # every fact costs at least its id in omitted_fact_ids; keeping it costs the rest
+            id_cost = {f.get("fact_id"): estimate_tokens(f.get("fact_id")) for f in facts}
+            kept, spent = [], overhead + sum(id_cost.values())
+            for f in rank_facts(facts, cited):
+                cost = estimate_tokens(f) - id_cost[f.get("fact_id")]
+                if spent + cost <= budget:
+                    kept.append(f)
+                    spent += cost
+                else:
+                    omitted.append(f.get("fact_id"))
+            kept_ids = {f.get("fact_id") for f in kept}
+            out["all_facts"] = [f for f in facts if f.get("fact_id") in kept_ids]  # original order
+            out["omitted_fact_ids"] = omitted
+
+    stats.update({
+        "facts_out": len(out["all_facts"]),
+        "facts_omitted": len(omitted),
+        "tokens_after": estimate_tokens(out),
+    })
+    return out, stats
+
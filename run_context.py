@@ -0,0 +1,46 @@
+import contextvars
+from typing import Awaitable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class RunState:
+    """Per-run bookkeeping shared by every section task of one framework run."""
+
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.counters: Dict[str, int] = {}
+        self.spans: List = []  # instrumentation.Span records, in completion order
+        # run-scoped services, attached by the orchestrator (e.g. query_broker.QueryBroker)
+        self.query_broker = None
+
+    def bump(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+
+_current_run: contextvars.ContextVar[Optional[RunState]] = contextvars.ContextVar("rdr_current_run", default=None)
+
+
+def current_run() -> Optional[RunState]:
+    return _current_run.get()
+
+
+def bump(name: str, n: int = 1) -> None:
+    """Increment a counter on the current run (no-op outside a run)."""
+    run = _current_run.get()
+    if run is not None:
+        run.bump(name, n)
+
+
+async def bind_run(run: RunState, awaitable: Awaitable[T]) -> T:
+    """
+    Await `awaitable` with `run` as the current run.
+
+    Wrap section tasks with this (asyncio.create_task(bind_run(run, ...))) so tools
+    called deep inside the Agents SDK can find the run without threading it through.
+    """
+    token = _current_run.set(run)
+    try:
+        return await awaitable
+    finally:
+        _current_run.reset(token)
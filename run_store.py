@@ -0,0 +1,145 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from run_context import current_run, bump
+
+RUN_STORE_ENABLED = os.getenv("RUN_STORE_ENABLED", "1") not in ("0", "false", "False", "")
+RUN_STORE_PATH = os.getenv("RUN_STORE_PATH", os.path.join("runs", "checkpoints.sqlite3"))
+
+# Step name under which a finished section's full result is stored.
+RESULT_STEP = "result"
+
+
+class RunStore:
+    """
+    Checkpoints of every pipeline step, keyed by (trace_id, section, step), on SQLite.
+
+    A run records its framework/topic/params once; each section step stores its parsed
+    output as soon as it completes. Re-running a trace_id loads finished sections whole and
+    resumes unfinished ones after their last completed step.
+    """
+
+    def __init__(self, path: str = RUN_STORE_PATH) -> None:
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " trace_id TEXT PRIMARY KEY, framework TEXT NOT NULL, topic TEXT NOT NULL,"
+            " params BLOB NOT NULL, created REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " trace_id TEXT NOT NULL, section TEXT NOT NULL, step TEXT NOT NULL, value BLOB NOT NULL,"
+            " created REAL NOT NULL, PRIMARY KEY (trace_id, section, step))"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- runs ---
+    def start_run(self, trace_id: str, framework: str, topic: str, params: Optional[Dict[str, Any]] = None) -> None:
+        self._conn().execute(
+            "INSERT OR IGNORE INTO runs (trace_id, framework, topic, params, created) VALUES (?, ?, ?, ?, ?)",
+            (trace_id, framework, topic, orjson.dumps(params or {}), time.time()),
+        )
+
+    def get_run(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT framework, topic, params, created FROM runs WHERE trace_id=?", (trace_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"trace_id": trace_id, "framework": row[0], "topic": row[1],
+                "params": orjson.loads(row[2]), "created": row[3]}
+
+    def list_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT r.trace_id, r.framework, r.topic, r.created,"
+            " (SELECT COUNT(*) FROM checkpoints c WHERE c.trace_id=r.trace_id AND c.step=?)"
+            " FROM runs r ORDER BY r.created DESC LIMIT ?", (RESULT_STEP, limit)
+        ).fetchall()
+        return [{"trace_id": r[0], "framework": r[1], "topic": r[2], "created": r[3], "sections_done": r[4]}
+                for r in rows]
+
+    # --- checkpoints ---
+    def load(self, trace_id: str, section: str, step: str) -> Optional[Any]:
+        row = self._conn().execute(
+            "SELECT value FROM checkpoints WHERE trace_id=? AND section=? AND step=?", (trace_id, section, step)
+        ).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def save(self, trace_id: str, section: str, step: str, value: Any) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO checkpoints (trace_id, section, step, value, created) VALUES (?, ?, ?, ?, ?)",
+            (trace_id, section, step, orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS), time.time()),
+        )
+
+    def steps(self, trace_id: str, section: str) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT step FROM checkpoints WHERE trace_id=? AND section=? ORDER BY created", (trace_id, section)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def completed_sections(self, trace_id: str) -> Dict[str, Any]:
+        """section -> finished section result for every section of the run that completed."""
+        rows = self._conn().execute(
+            "SELECT section, value FROM checkpoints WHERE trace_id=? AND step=?", (trace_id, RESULT_STEP)
+        ).fetchall()
+        return {r[0]: orjson.loads(r[1]) for r in rows}
+
+
+_store: Optional[RunStore] = None
+_store_lock = threading.Lock()
+
+
+def get_run_store() -> Optional[RunStore]:
+    """The process-wide store, or None when checkpointing is disabled or unavailable."""
+    global _store
+    if not RUN_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = RunStore()
+            except sqlite3.Error as e:
+                print(f"[run_store] disabled: {e}")
+                return None
+    return _store
+
+
+async def load_checkpoint(section: str, step: str) -> Optional[Any]:
+    """Output of `step` saved by an earlier attempt of the current run, if any."""
+    run = current_run()
+    store = get_run_store()
+    if run is None or store is None:
+        return None
+    value = await asyncio.to_thread(store.load, run.trace_id, section, step)
+    if value is not None:
+        bump("checkpoint_hits")
+    return value
+
+
+async def save_checkpoint(section: str, step: str, value: Any) -> None:
+    run = current_run()
+    store = get_run_store()
+    if run is None or store is None:
+        return
+    try:
+        await asyncio.to_thread(store.save, run.trace_id, section, step, value)
+    except (sqlite3.Error, TypeError) as e:
+        print(f"[run_store] checkpoint {section}/{step} not saved: {e}")
@@ -0,0 +1,218 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+from instrumentation import add_queue_wait
+from run_context import current_run, bump
+
+# 0 disables a limit.
+LLM_TPM = int(os.getenv("LLM_TPM", "400000"))             # model tokens per minute
+SEARCH_QPS = float(os.getenv("SEARCH_QPS", "5"))          # Serper requests per second
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "8"))  # concurrently open browser pages
+
+
+class FairLimiter(ABC):
+    """
+    Weighted limiter with per-run FIFO queues served round-robin.
+
+    A run that enqueues 50 requests cannot starve a run that enqueues 1: whenever
+    capacity frees up, the next grant goes to the next run in rotation. Subclasses
+    decide what "capacity" means (`_try_take`). Tracks queue depth and wait times.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._queues: Dict[str, Deque[Tuple[int, asyncio.Future]]] = {}
+        self._order: Deque[str] = deque()
+        self.depth = 0
+        self.metrics = {"acquired": 0, "queued": 0, "max_depth": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+
+    # --- capacity (overridden) ---
+    @abstractmethod
+    def _try_take(self, weight: int) -> bool:
+        """Take `weight` units of capacity if available; True on success."""
+
+    def _give_back(self, weight: int) -> None:
+        pass
+
+    def _retry_later(self, weight: int) -> None:
+        """Called when the head waiter cannot be served; time-based limiters schedule a retry."""
+
+    # --- queueing ---
+    def _dispatch(self) -> None:
+        while self._order:
+            key = self._order[0]
+            queue = self._queues[key]
+            while queue and queue[0][1].done():  # cancelled waiters
+                queue.popleft()
+                self.depth -= 1
+            if not queue:
+                self._order.popleft()
+                del self._queues[key]
+                continue
+            weight, fut = queue[0]
+            if not self._try_take(weight):
+                self._retry_later(weight)
+                return
+            queue.popleft()
+            self.depth -= 1
+            fut.set_result(None)
+            self._order.rotate(-1)
+
+    async def acquire(self, weight: int = 1, run_key: Optional[str] = None) -> float:
+        """Wait for `weight` units; returns the time spent queued in ms."""
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        if not self._order and self._try_take(weight):
+            self.metrics["acquired"] += 1
+            return 0.0
+
+        if run_key is None:
+            run = current_run()
+            run_key = run.trace_id if run else "default"
+        fut = loop.create_future()
+        if run_key not in self._queues:
+            self._queues[run_key] = deque()
+            self._order.append(run_key)
+        self._queues[run_key].append((weight, fut))
+        self.depth += 1
+        self.metrics["queued"] += 1
+        self.metrics["max_depth"] = max(self.metrics["max_depth"], self.depth)
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release(weight)  # granted just as we were cancelled
+            raise
+
+        waited = (loop.time() - t0) * 1000
+        self.metrics["acquired"] += 1
+        self.metrics["wait_ms_total"] += waited
+        self.metrics["wait_ms_max"] = max(self.metrics["wait_ms_max"], waited)
+        bump(f"sched_{self.name}_wait_ms", int(waited))
+        add_queue_wait(waited)
+        return waited
+
+    def release(self, weight: int = 1) -> None:
+        self._give_back(weight)
+        self._dispatch()
+
+    def snapshot(self) -> Dict[str, float]:
+        acquired = self.metrics["acquired"] or 1
+        return {
+            "queue_depth": self.depth,
+            **self.metrics,
+            "wait_ms_avg": round(self.metrics["wait_ms_total"] / acquired, 1),
+        }
+
+
+class FairSemaphore(FairLimiter):
+    def __init__(self, name: str, capacity: int) -> None:
+        super().__init__(name)
+        self.capacity = capacity
+        self.in_use = 0
+
+    def _try_take(self, weight: int) -> bool:
+        if self.capacity <= 0:
+            return True
+        weight = min(weight, self.capacity)
+        if self.in_use + weight > self.capacity:
+            return False
+        self.in_use += weight
+        return True
+
+    def _give_back(self, weight: int) -> None:
+        if self.capacity > 0:
+            self.in_use = max(0, self.in_use - min(weight, self.capacity))
+
+
+class FairTokenBucket(FairLimiter):
+    """Token bucket refilled at `rate` per second up to `burst`; weight = tokens consumed."""
+
+    def __init__(self, name: str, rate: float, burst: float) -> None:
+        super().__init__(name)
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._stamp: Optional[float] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self) -> None:
+        now = asyncio.get_running_loop().time()
+        if self._stamp is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def _try_take(self, weight: int) -> bool:
+        if self.rate <= 0:
+            return True
+        self._refill()
+        weight = min(weight, self.burst)
+        if self.tokens < weight:
+            return False
+        self.tokens -= weight
+        return True
+
+    def _retry_later(self, weight: int) -> None:
+        if self._timer is not None:
+            return
+        delay = max(0.001, (min(weight, self.burst) - self.tokens) / self.rate)
+
+        def _fire():
+            self._timer = None
+            self._dispatch()
+
+        self._timer = asyncio.get_running_loop().call_later(delay, _fire)
+
+    def adjust(self, delta: float) -> None:
+        """Correct an estimate after the fact (positive = refund, negative = extra usage)."""
+        if self.rate > 0:
+            self._refill()
+            self.tokens = min(self.burst, self.tokens + delta)
+            self._dispatch()
+
+
+class Scheduler:
+    """Process-wide limits for model calls (TPM), Serper requests (QPS) and browser pages."""
+
+    def __init__(self) -> None:
+        self.limiters: Dict[str, FairLimiter] = {
+            "llm": FairTokenBucket("llm", rate=LLM_TPM / 60.0, burst=float(LLM_TPM)),
+            "search": FairTokenBucket("search", rate=SEARCH_QPS, burst=max(1.0, SEARCH_QPS)),
+            "browser": FairSemaphore("browser", capacity=BROWSER_MAX_PAGES),
+        }
+
+    @asynccontextmanager
+    async def slot(self, resource: str, weight: int = 1):
+        limiter = self.limiters[resource]
+        waited = await limiter.acquire(weight)
+        try:
+            yield waited
+        finally:
+            limiter.release(weight)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        return {name: limiter.snapshot() for name, limiter in self.limiters.items()}
+
+
+# asyncio primitives are loop-bound; every run inside one loop (the Gradio server) shares one.
+_schedulers: Dict[asyncio.AbstractEventLoop, Scheduler] = {}
+
+
+def get_scheduler() -> Scheduler:
+    loop = asyncio.get_running_loop()
+    sched = _schedulers.get(loop)
+    if sched is None:
+        for stale in [other for other in _schedulers if other.is_closed()]:
+            del _schedulers[stale]
+        sched = _schedulers[loop] = Scheduler()
+    return sched
+
+
+def run_scheduler_summary(counters: Dict[str, int]) -> Dict[str, int]:
+    """Per-run queue wait (ms) by resource, from the run's sched_* counters."""
+    return {k[len("sched_"):]: v for k, v in counters.items() if k.startswith("sched_")}
@@ -1,3 +1,8 @@
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
 section_information_schema = """
 {
   "framework": "big-idea | specific-idea",
@@ -16,4 +21,120 @@ section_information_schema = """
     "max_queries": 12
   }
 }
-"""
\ No newline at end of file
+"""
+
+# ------------- Agent output models -------------
+# Passed to the pipeline agents as output_type (see output_parsing.TolerantOutputSchema).
+# Fields have defaults unless an item is useless without them (a fact without source_url)
+# and unknown keys are kept; wrong-typed values and items missing a required field are
+# dropped during salvage.
+
+
+class _Output(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+
+class ComplexityOutput(_Output):
+    complexity: str = "moderate"
+    reasoning: str = ""
+    recommended_query_count: int = 12
+    search_strategy_notes: str = ""
+
+
+class Query(_Output):
+    q: str
+    family: str = ""
+    axes: Dict[str, Any] = Field(default_factory=dict)
+
+
+class QueryGenOutput(_Output):
+    queries: List[Union[Query, str]] = Field(default_factory=list)
+
+
+class SectionPlan(ComplexityOutput):
+    section: str
+    queries: List[Union[Query, str]] = Field(default_factory=list)
+
+
+class PlannerOutput(_Output):
+    plans: List[SectionPlan] = Field(default_factory=list)
+
+
+class Fact(_Output):
+    fact_id: str
+    claim: str
+    source_url: str
+    entity: str = ""
+    publisher: str = ""
+    date_event: Optional[str] = None
+    date_published: Optional[str] = None
+    evidence: str = ""
+    facet: str = ""
+    geo: str = ""
+    modality: str = ""
+    confidence: float = 0.5
+    tags: List[str] = Field(default_factory=list)
+    stale: bool = False
+    conflict_group_id: Optional[str] = None
+
+
+class ResearcherOutput(_Output):
+    facts: List[Fact] = Field(default_factory=list)
+    domains_seen: List[str] = Field(default_factory=list)
+    gap_flags: List[str] = Field(default_factory=list)
+
+
+class Bullet(_Output):
+    text: str
+    evidence_ids: List[str] = Field(default_factory=list)
+
+
+class AnalystOutput(_Output):
+    """Both framework shapes: big-idea fills mini_takeaways/conflicts, specific-idea ranked_options/assumptions_to_test."""
+    section: str = ""
+    bullets: List[Union[Bullet, str]] = Field(default_factory=list)
+    mini_takeaways: List[str] = Field(default_factory=list)
+    conflicts: List[Dict[str, Any]] = Field(default_factory=list)
+    ranked_options: List[Dict[str, Any]] = Field(default_factory=list)
+    assumptions_to_test: List[str] = Field(default_factory=list)
+    gaps_next: List[str] = Field(default_factory=list)
+
+
+class BulletUpdate(_Output):
+    index: int
+    text: str = ""
+    evidence_ids: List[str] = Field(default_factory=list)
+
+
+class AnalystPatch(_Output):
+    """Incremental self-healing: changes to the previous AnalystOutput from new facts only (see analysis_patch)."""
+    add_bullets: List[Union[Bullet, str]] = Field(default_factory=list)
+    update_bullets: List[BulletUpdate] = Field(default_factory=list)
+    remove_bullets: List[int] = Field(default_factory=list)
+    add_mini_takeaways: List[str] = Field(default_factory=list)
+    add_conflicts: List[Dict[str, Any]] = Field(default_factory=list)
+    add_assumptions_to_test: List[str] = Field(default_factory=list)
+    ranked_options: Optional[List[Dict[str, Any]]] = None
+    gaps_next: Optional[List[str]] = None
+
+
+class GapQuery(_Output):
+    q: str
+    family: str = "gap-filling"
+    purpose: str = ""
+
+
+class CriticOutput(_Output):
+    needs_iteration: bool = False
+    iteration_reason: str = ""
+    quality_issues: List[str] = Field(default_factory=list)
+    gap_queries: List[Union[GapQuery, str]] = Field(default_factory=list)
+    confidence_assessment: float = 0.5
+
+
+class EditorOutput(_Output):
+    section: str = ""
+    highlights: List[str] = Field(default_factory=list)
+    facts_ref: List[str] = Field(default_factory=list)
+    gaps_next: List[str] = Field(default_factory=list)
+    confidence: float = 0.5
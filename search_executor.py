@@ -0,0 +1,239 @@
+import asyncio
+import math
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from fact_dedup import conflict_groups, dedup_facts
+from instrumentation import span
+from run_context import bump
+from tools.serper_tool import section_search
+from utils import canonical_url, estimate_tokens, root_domain
+
+# Research step without the researcher's tool-calling loop: the section's queries are run in
+# code, concurrently, and the deduplicated results are split into chunks that fact-extraction
+# calls handle concurrently (map); the chunk outputs are merged in code (reduce_extracted).
+# RESEARCH_MODE=agent keeps the tool-calling researcher.
+RESEARCH_MODE = os.getenv("RESEARCH_MODE", "executor").lower()
+# Searches in flight per section. Kept small so the depth budget's low-yield early stop
+# still sees finished queries before later ones start.
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "4"))
+# Search results per fact-extraction call (0 = all results in one call), with a cap on the
+# estimated tokens of one call's results.
+EXTRACT_CHUNK_RESULTS = int(os.getenv("EXTRACT_CHUNK_RESULTS", "12"))
+EXTRACT_CHUNK_TOKENS = int(os.getenv("EXTRACT_CHUNK_TOKENS", "24000"))
+# Extraction calls in flight per section; all of them also wait on the process-wide LLM limiter.
+EXTRACT_CONCURRENCY = int(os.getenv("EXTRACT_CONCURRENCY", "4"))
+# Largest share of a section's facts that may come from one root domain.
+DOMAIN_QUOTA = float(os.getenv("DOMAIN_QUOTA", "0.3"))
+MAX_RESULTS_PER_QUERY = 20
+
+
+def lookback_tbs(days: Any) -> Optional[str]:
+    """Google `tbs` time filter covering the last `days` days (qdr:d3, qdr:w2, qdr:m18, qdr:y3), or None."""
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        return None
+    if days <= 0:
+        return None
+    if days < 7:
+        return f"qdr:d{days}"
+    if days < 31:
+        return f"qdr:w{math.ceil(days / 7)}"
+    if days <= 730:
+        return f"qdr:m{math.ceil(days / 30.44)}"
+    return f"qdr:y{math.ceil(days / 365.25)}"
+
+
+def _query_text(q: Any) -> str:
+    return (q.get("q") or "") if isinstance(q, dict) else str(q or "")
+
+
+def _query_kind(q: Any) -> str:
+    axes = q.get("axes") if isinstance(q, dict) else None
+    modality = str(axes.get("modality") or "").lower() if isinstance(axes, dict) else ""
+    return "news" if modality == "news" else "search"
+
+
+def search_options(run_params: Dict[str, Any]) -> Dict[str, Any]:
+    """Serper options for one section's queries: k_per_query -> num, lookback_days -> tbs, langs[0] -> hl."""
+    try:
+        num = int(run_params.get("k_per_query") or 10)
+    except (TypeError, ValueError):
+        num = 10
+    langs = run_params.get("langs") or ["en"]
+    return {
+        "num": max(1, min(num, MAX_RESULTS_PER_QUERY)),
+        "tbs": lookback_tbs(run_params.get("lookback_days")),
+        "hl": langs[0] if isinstance(langs, list) and langs else "en",
+    }
+
+
+async def execute_queries(queries: List[Any], run_params: Dict[str, Any], section: str = "") -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Run `queries` (query-gen dicts or strings) and return (results, stats).
+
+    Searches go through `section_search`, so the depth budget, the run's query broker and the
+    disk cache apply exactly as for the researcher's tool calls; once the budget refuses a
+    search the remaining queries are not sent. Results are deduplicated by canonical URL in
+    query order: each result keeps its best rank and lists every query that returned it.
+    """
+    opts = search_options(run_params)
+    sem = asyncio.Semaphore(max(1, SEARCH_CONCURRENCY))
+    stopped: Dict[str, str] = {}
+
+    async def one(q: Any) -> Dict[str, Any]:
+        text = _query_text(q).strip()
+        if not text:
+            return {"items": []}
+        async with sem:
+            if stopped:
+                return {"items": [], "skipped": True}
+            try:
+                out = await section_search(text, kind=_query_kind(q), **opts)
+            except Exception as e:
+                print(f"[{section}] search failed for {text!r}: {type(e).__name__}: {e}")
+                return {"items": [], "failed": True}
+            if out.get("error"):
+                stopped["reason"] = out["error"]
+            return out
+
+    async with span("search_executor", kind="tool", section=section or None, queries=len(queries), **opts) as s:
+        outputs = await asyncio.gather(*(one(q) for q in queries))
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for q, out in zip(queries, outputs):
+            for rank, item in enumerate(out.get("items", []), 1):
+                url = item.get("link") or ""
+                key = canonical_url(url)
+                if not url or not key:
+                    continue
+                hit = results.get(key)
+                if hit is None:
+                    results[key] = hit = {
+                        "url": url,
+                        "title": item.get("title") or "",
+                        "snippet": item.get("snippet") or "",
+                        "date": item.get("date"),
+                        "source": item.get("source"),
+                        "domain": root_domain(url),
+                        "rank": rank,
+                        "queries": [],
+                    }
+                else:
+                    hit["rank"] = min(hit["rank"], rank)
+                    if len(item.get("snippet") or "") > len(hit["snippet"]):
+                        hit["snippet"] = item["snippet"]
+                if out.get("query") not in hit["queries"]:
+                    hit["queries"].append(out.get("query") or _query_text(q))
+
+        unique = list(results.values())
+        for i, r in enumerate(unique, 1):
+            r["id"] = f"r{i}"
+            for k in ("date", "source"):
+                if not r[k]:
+                    del r[k]
+        stats = {
+            "queries": len(queries),
+            "searched": sum(1 for o in outputs if not o.get("skipped") and not o.get("error") and not o.get("failed")),
+            "skipped": sum(1 for o in outputs if o.get("skipped") or o.get("error")),
+            "failed": sum(1 for o in outputs if o.get("failed")),
+            "results": sum(len(o.get("items", [])) for o in outputs),
+            "unique_results": len(unique),
+        }
+        bump("executor_queries", stats["searched"])
+        bump("executor_results", stats["results"])
+        bump("executor_unique_results", stats["unique_results"])
+        s.attrs.update(stats)
+    return unique, stats
+
+
+def chunk_results(results: List[Dict[str, Any]], size: Optional[int] = None,
+                  max_tokens: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Split results, in order, into chunks of `size` results (default EXTRACT_CHUNK_RESULTS,
+    0 = no count limit) and at most ~max_tokens (default EXTRACT_CHUNK_TOKENS) estimated tokens.
+    """
+    size = EXTRACT_CHUNK_RESULTS if size is None else size
+    max_tokens = max_tokens or EXTRACT_CHUNK_TOKENS
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    tokens = 0
+    for r in results:
+        n = estimate_tokens(r)
+        if current and ((size and len(current) >= size) or tokens + n > max_tokens):
+            chunks.append(current)
+            current, tokens = [], 0
+        current.append(r)
+        tokens += n
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def apply_domain_quota(facts: List[Dict[str, Any]], quota: float = DOMAIN_QUOTA) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    (kept facts, number dropped) so that no root domain supplies more than `quota` of the
+    facts, dropping the least confident facts of the largest domain first. A domain always
+    keeps one fact, and the quota is not applied when there are too few domains to meet it.
+    """
+    domains = [root_domain(f.get("source_url") or "") for f in facts]
+    if not 0 < quota < 1 or len(set(domains)) < math.ceil(1 / quota):
+        return facts, 0
+    counts = Counter(domains)
+    by_domain: Dict[str, List[int]] = {}
+    for i in sorted(range(len(facts)), key=lambda i: (facts[i].get("confidence") or 0, -i)):
+        by_domain.setdefault(domains[i], []).append(i)
+    dropped = set()
+    while True:
+        domain, count = counts.most_common(1)[0]
+        if count <= max(1, quota * (len(facts) - len(dropped))):
+            break
+        dropped.add(by_domain[domain].pop(0))
+        counts[domain] -= 1
+    return [f for i, f in enumerate(facts) if i not in dropped], len(dropped)
+
+
+def reduce_extracted(outputs: List[Optional[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], List[str], Dict[str, int]]:
+    """
+    Merge the fact-extraction outputs of all chunks into one fact table: (facts, gap_flags, stats).
+
+    Near-duplicate facts from different chunks are merged (their sources combined), the
+    per-domain quota is enforced, conflict groups are detected across the whole table, and
+    fact ids and conflict group ids are reassigned as s1..sN and cg_1..cg_M.
+    """
+    facts: List[Dict[str, Any]] = []
+    gap_flags: List[str] = []
+    for i, out in enumerate(outputs):
+        if not out:
+            continue
+        for fact in out.get("facts", []):
+            # chunk-local ids collide across chunks; only the prefixed ones are unique
+            fact["fact_id"] = f"c{i}_{fact.get('fact_id', '')}"
+            if fact.get("conflict_group_id"):
+                fact["conflict_group_id"] = f"c{i}_{fact['conflict_group_id']}"
+            facts.append(fact)
+        gap_flags.extend(g for g in out.get("gap_flags", []) if g not in gap_flags)
+
+    extracted = len(facts)
+    facts, _ = dedup_facts(facts)
+    merged = extracted - len(facts)
+    facts, over_quota = apply_domain_quota(facts)
+
+    groups = conflict_groups(facts)
+    for n, fact in enumerate(facts, 1):
+        fact["fact_id"] = f"s{n}"
+        fact.pop("merged_fact_ids", None)  # chunk-local ids, meaningless after renumbering
+        fact["conflict_group_id"] = None
+    for n, members in enumerate(groups, 1):
+        for i in members:
+            facts[i]["conflict_group_id"] = f"cg_{n}"
+    stats = {"chunks": len(outputs), "failed_chunks": sum(1 for o in outputs if o is None), "extracted": extracted,
+             "merged": merged, "over_quota": over_quota, "conflict_groups": len(groups), "facts": len(facts)}
+    return facts, gap_flags, stats
+
+
+def run_executor_summary(counters: Dict[str, int]) -> Dict[str, int]:
+    """Pick the executor_* counters out of a run's counters for report metadata."""
+    return {k[len("executor_"):]: v for k, v in counters.items() if k.startswith("executor_")}
@@ -1,57 +1,352 @@
 from copy import deepcopy
-from agents import Runner, Agent, trace, gen_trace_id
+from agents import Agent, ModelBehaviorError, trace
+from agent_runner import run_agent
+from instrumentation import span
+from fact_dedup import dedup_facts, merge_new_facts, fact_sources
+from run_store import load_checkpoint, save_checkpoint, RESULT_STEP
+from depth import section_budget, use_budget, current_budget
+from verification import VERIFY_SOURCES, verify_facts
+from analysis_patch import apply_analyst_patch, detect_new_conflicts
+from search_executor import RESEARCH_MODE, EXTRACT_CONCURRENCY, execute_queries, chunk_results, reduce_extracted
 from dotenv import load_dotenv
-from prompts.agent_prompts import *
-from utils import *
+from prompts.agent_prompts import (
+    complexity_agent_system_prompt, query_gen_agent_system_prompt, researcher_agent_system_prompt,
+    fact_extractor_agent_system_prompt, analyst_agent_system_prompt, analyst_merge_addendum, analyst_page_tool_addendum,
+    analyst_patch_addendum, critic_agent_system_prompt, editor_agent_system_prompt,
+)
+from utils import as_messages
+from output_parsing import TolerantOutputSchema
+from schemas.schemas import (
+    ComplexityOutput, QueryGenOutput, ResearcherOutput, AnalystOutput, AnalystPatch, CriticOutput, EditorOutput,
+)
 from tools.serper_tool import serper_search
 from tools.playwright_tool import playwright_web_read
 import os
-import pdb
-import json
+import asyncio
+from typing import Dict, List, Optional
 
 load_dotenv(override=True)
 default_model_name = os.environ.get('DEFAULT_MODEL_NAME')
 
+# Streaming mode: research runs in query batches and analysis of early batches overlaps later research.
+STREAM_RESEARCH = os.environ.get('STREAM_RESEARCH', '0') == '1'
+RESEARCH_BATCH_SIZE = int(os.environ.get('RESEARCH_BATCH_SIZE', '4'))
+# Self-healing: at most CRITIC_ITERATIONS gap-filling rounds per section, stopping early once a
+# round's new facts are fewer than ITERATION_MIN_GAIN of the facts already known. With
+# INCREMENTAL_ANALYSIS the analyst patches its previous analysis from the new facts only.
+CRITIC_ITERATIONS = int(os.environ.get('CRITIC_ITERATIONS', '1'))
+ITERATION_MIN_GAIN = float(os.environ.get('ITERATION_MIN_GAIN', '0.1'))
+INCREMENTAL_ANALYSIS = os.environ.get('INCREMENTAL_ANALYSIS', '1') == '1'
+
 class SectionResearchManager:
-    def __init__(self, section_name: str, enable_critic: bool = True) -> None:
+    def __init__(self, section_name: str, enable_critic: bool = True, stream_research: bool = STREAM_RESEARCH,
+                 research_batch_size: int = RESEARCH_BATCH_SIZE, verify_sources: bool = VERIFY_SOURCES,
+                 research_mode: str = RESEARCH_MODE, critic_iterations: int = CRITIC_ITERATIONS,
+                 incremental_analysis: bool = INCREMENTAL_ANALYSIS) -> None:
         self.section_name = section_name
         self.enable_critic = enable_critic
+        self.stream_research = stream_research
+        self.research_batch_size = max(1, research_batch_size)
+        self.verify_sources = verify_sources
+        self.research_mode = research_mode
+        self.critic_iterations = max(1, critic_iterations)
+        self.incremental_analysis = incremental_analysis
+
+        # With the verification stage the analyst reasons over pre-fetched pages and needs no tools
+        analyst_instructions = analyst_agent_system_prompt if verify_sources else analyst_agent_system_prompt + analyst_page_tool_addendum
+        analyst_tools = [] if verify_sources else [playwright_web_read]
 
         self.complexity_agent = Agent(
             name=f"Complexity Agent: {section_name}",
             instructions=complexity_agent_system_prompt,
+            output_type=TolerantOutputSchema(ComplexityOutput, "complexity"),
             model=default_model_name
         )
         self.query_gen_agent = Agent(
             name=f"Query Gen Agent: {section_name}",
             instructions=query_gen_agent_system_prompt,
+            output_type=TolerantOutputSchema(QueryGenOutput, "query_gen"),
             model=default_model_name
         )
         self.researcher_agent = Agent(
             name=f"Researcher agent: {section_name}",
             instructions=researcher_agent_system_prompt,
             tools=[serper_search],
+            output_type=TolerantOutputSchema(ResearcherOutput, "researcher"),
+            model=default_model_name
+        )
+        self.extractor_agent = Agent(
+            name=f"Fact extractor agent: {section_name}",
+            instructions=fact_extractor_agent_system_prompt,
+            output_type=TolerantOutputSchema(ResearcherOutput, "extractor"),
             model=default_model_name
         )
         self.analyst_agent = Agent(
             name=f"Analyst agent: {section_name}",
-            instructions=analyst_agent_system_prompt,
-            tools=[playwright_web_read],
+            instructions=analyst_instructions,
+            tools=analyst_tools,
+            output_type=TolerantOutputSchema(AnalystOutput, "analyst"),
+            model=default_model_name
+        )
+        self.analyst_merge_agent = Agent(
+            name=f"Analyst merge agent: {section_name}",
+            instructions=analyst_instructions + analyst_merge_addendum,
+            tools=analyst_tools,
+            output_type=TolerantOutputSchema(AnalystOutput, "analyst"),
+            model=default_model_name
+        )
+        self.analyst_patch_agent = Agent(
+            name=f"Analyst patch agent: {section_name}",
+            instructions=analyst_instructions + analyst_patch_addendum,
+            tools=analyst_tools,
+            output_type=TolerantOutputSchema(AnalystPatch, "analyst_patch"),
             model=default_model_name
         )
         self.critic_agent = Agent(
             name=f"Critic agent: {section_name}",
             instructions=critic_agent_system_prompt,
+            output_type=TolerantOutputSchema(CriticOutput, "critic"),
             model=default_model_name
         )
         self.editor_agent = Agent(
             name=f"Editor agent: {section_name}",
             instructions=editor_agent_system_prompt,
+            output_type=TolerantOutputSchema(EditorOutput, "editor"),
             model=default_model_name
         )
 
+    @staticmethod
+    async def _run_step(agent: Agent, payload: Dict, step: str, section: str) -> Optional[Dict]:
+        """
+        One pipeline step. The agent's output_type repairs truncated or malformed replies and
+        run_agent retries an unusable one; None only when the step still produced nothing usable.
+        """
+        try:
+            raw = await run_agent(agent, as_messages(payload), step=step)
+        except ModelBehaviorError as e:
+            print(f"Error parsing {step} output for {section}: {e}")
+            return None
+        return raw.final_output
+
+    async def _research(self, payload: Dict, section: str, step: str = "researcher") -> Dict:
+        if self.research_mode == "executor":
+            return await self._execute_research(payload, section, step)
+        result = await self._run_step(self.researcher_agent, payload, step, section)
+        if result is None:
+            return {"facts": [], "domains_seen": [], "gap_flags": []}
+        # same near-duplicate merging as the executor's reduce step, so both modes (and the
+        # sequential and streaming paths) hand the analyst the same fact table
+        result["facts"], _ = dedup_facts(result.get("facts", []))
+        return result
+
+    async def _execute_research(self, payload: Dict, section: str, step: str) -> Dict:
+        """
+        Research without the researcher's tool-calling loop: the queries run in code, the
+        deduplicated results are split into chunks of EXTRACT_CHUNK_RESULTS that the fact
+        extractor handles concurrently, and the chunk outputs are merged in code
+        (search_executor.reduce_extracted).
+        """
+        results, stats = await execute_queries(payload.get("queries", []), payload.get("run_params", {}), section)
+        domains_seen = list(dict.fromkeys(r["domain"] for r in results if r["domain"]))
+        chunks = chunk_results(results) if results else []
+        print(f"[{section}] Search executor: {stats['searched']}/{stats['queries']} queries, "
+              f"{stats['unique_results']} unique of {stats['results']} results, {len(chunks)} extraction chunks")
+
+        base = {k: v for k, v in payload.items() if k != "queries"}
+        sem = asyncio.Semaphore(max(1, EXTRACT_CONCURRENCY))
+
+        async def extract(chunk: List) -> Optional[Dict]:
+            async with sem:
+                return await self._run_step(self.extractor_agent, {**base, "results": chunk},
+                                            step.replace("researcher", "extractor"), section)
+
+        async with span("extract_facts", section=section, chunks=len(chunks), results=len(results)) as s:
+            outputs = await asyncio.gather(*(extract(c) for c in chunks))
+            facts, gap_flags, reduce_stats = reduce_extracted(outputs)
+            s.attrs.update(reduce_stats)
+        print(f"[{section}] Extracted {reduce_stats['extracted']} facts → {reduce_stats['facts']} "
+              f"({reduce_stats['merged']} merged, {reduce_stats['over_quota']} over domain quota, "
+              f"{reduce_stats['conflict_groups']} conflict groups)")
+        return {"facts": facts, "domains_seen": domains_seen, "gap_flags": gap_flags}
+
+    async def _verify(self, facts: List[Dict], section: str, progress_callback=None) -> bool:
+        """Run the verification stage over facts not yet checked; True if any were annotated."""
+        pending = [f for f in facts if "verification" not in f]
+        if not self.verify_sources or not pending:
+            return False
+        if progress_callback:
+            await progress_callback(f"🔎 Checking {len(pending)} facts against their source pages for **{section}**...")
+        _, stats = await verify_facts(pending, section)
+        print(f"[{section}] Verification: {stats['verified']} verified, {stats['unverified']} unverified, "
+              f"{stats['unreachable']} unreachable, {stats['unchecked']} unchecked ({stats['pages']} pages)")
+        return True
+
+    async def _self_heal(self, base_payload: Dict, run_params: Dict, researcher_result: Dict, analyst_result: Dict,
+                         gap_queries: List, section: str, round_no: int, progress_callback=None) -> Dict:
+        """
+        One self-healing round: research the critic's gap queries, fold the new facts into the
+        fact table, verify them and update the analysis. In incremental mode the analyst sees
+        only its previous analysis and the new facts and returns a patch that is applied in
+        code; otherwise it re-analyses all facts. Returns {"facts", "analysis", "stats"}.
+        """
+        if progress_callback:
+            await progress_callback(f"🔄 **{section}** needs iteration → running {len(gap_queries)} gap queries...")
+        iteration_payload = {
+            **base_payload,
+            "queries": gap_queries,
+            "run_params": {**run_params, "max_queries": len(gap_queries)}
+        }
+        print(f"[{section}] Running iteration research with {len(gap_queries)} gap queries")
+        iteration_researcher_result = await self._research(iteration_payload, section, step="iteration_researcher")
+
+        # Iteration ids restart at 1; keep them distinct from earlier rounds
+        prefix = "it_" if round_no == 1 else f"it{round_no}_"
+        iteration_facts = [
+            {**f, "fact_id": f"{prefix}{f.get('fact_id')}",
+             "conflict_group_id": f"{prefix}{f['conflict_group_id']}" if f.get("conflict_group_id") else None}
+            for f in iteration_researcher_result.get("facts", [])
+        ]
+
+        # Near-duplicates of known facts only add their sources to the existing fact
+        all_facts = researcher_result.get("facts", [])
+        merged_facts, new_facts = merge_new_facts(all_facts, iteration_facts)
+        merged_researcher_result = {
+            **researcher_result,
+            "facts": merged_facts,
+            "domains_seen": list(set(researcher_result.get("domains_seen", []) + iteration_researcher_result.get("domains_seen", [])))
+        }
+        print(f"[{section}] Merged {len(new_facts)} new facts, total: {len(merged_facts)}")
+        await self._verify(merged_facts, section, progress_callback)
+
+        incremental = self.incremental_analysis
+        if not new_facts:
+            analysis = analyst_result
+        elif incremental:
+            new_ids = {f.get("fact_id") for f in new_facts}
+            detected = detect_new_conflicts(merged_facts, new_ids, analyst_result.get("conflicts", []), prefix)
+            if progress_callback:
+                await progress_callback(f"🔬 Updating **{section}** analysis with {len(new_facts)} new facts...")
+            patch_payload = {
+                **base_payload,
+                "previous_analysis": analyst_result,
+                "new_facts": new_facts,
+                "detected_conflicts": detected
+            }
+            print(f"[{section}] Running Analyst patch over {len(new_facts)} new facts")
+            patch = await self._run_step(self.analyst_patch_agent, patch_payload, "iteration_analyst_patch", section)
+            analysis = apply_analyst_patch(analyst_result, patch)
+            if detected:
+                analysis = apply_analyst_patch(analysis, {"add_conflicts": detected})
+        else:
+            if progress_callback:
+                await progress_callback(f"🔬 Re-analyzing **{section}** with {len(merged_facts)} total facts (added {len(new_facts)} new)...")
+            iteration_analyst_payload = {
+                **base_payload,
+                "facts": merged_facts,
+                "domains_seen": merged_researcher_result.get("domains_seen", []),
+                "gap_flags": merged_researcher_result.get("gap_flags", [])
+            }
+            print(f"[{section}] Re-running Analyst with expanded facts (total: {len(merged_facts)} facts)")
+            analysis = await self._run_step(self.analyst_agent, iteration_analyst_payload, "iteration_analyst", section)
+            if analysis is None:
+                analysis = analyst_result  # fallback to original
+
+        stats = {
+            "round": round_no,
+            "gap_queries": len(gap_queries),
+            "new_facts": len(new_facts),
+            "total_facts": len(merged_facts),
+            "gain": round(len(new_facts) / max(1, len(all_facts)), 3),
+            "analysis": "skipped" if not new_facts else "patch" if incremental else "full",
+        }
+        print(f"[{section}] Iteration {round_no} complete - updated facts and analysis ready for Editor")
+        return {"facts": merged_researcher_result, "analysis": analysis, "stats": stats}
+
+    async def _stream_research_and_analysis(self, base_payload: Dict, queries: List, run_params: Dict, section: str, progress_callback=None):
+        """
+        Streaming Steps 3+4. Queries are researched in batches concurrently; as each batch's
+        facts arrive, a partial analysis (page checks included) starts on them while later
+        batches are still researching. A final merge pass reconciles the partial analyses over
+        all facts. Fact ids are prefixed per batch (b0_s1, b1_s1, ...) so batches never collide.
+        Each batch is checked against its source pages before its partial analysis starts.
+        """
+        batches = [queries[i:i + self.research_batch_size] for i in range(0, len(queries), self.research_batch_size)] or [[]]
+        print(f"[{section}] Streaming research: {len(queries)} queries in {len(batches)} batches")
+
+        async def research_batch(i: int, batch: List) -> Dict:
+            payload = {**base_payload, "queries": batch, "run_params": {**run_params, "max_queries": len(batch)}}
+            result = await self._research(payload, section)
+            for fact in result.get("facts", []):
+                fact["fact_id"] = f"b{i}_{fact.get('fact_id', '')}"
+                if fact.get("conflict_group_id"):
+                    fact["conflict_group_id"] = f"b{i}_{fact['conflict_group_id']}"
+            return result
+
+        async def analyse_partial(facts: List, result: Dict) -> Optional[Dict]:
+            payload = {
+                **base_payload,
+                "facts": facts,
+                "domains_seen": result.get("domains_seen", []),
+                "gap_flags": result.get("gap_flags", [])
+            }
+            return await self._run_step(self.analyst_agent, payload, "partial_analyst", section)
+
+        async def verify_then_analyse(facts: List, result: Dict) -> Optional[Dict]:
+            await self._verify(facts, section)
+            return await analyse_partial(facts, result)
+
+        all_facts, domains_seen, gap_flags = [], [], []
+        partial_tasks = []
+        research_tasks = [asyncio.create_task(research_batch(i, b)) for i, b in enumerate(batches)]
+        for done in asyncio.as_completed(research_tasks):
+            result = await done
+            # near-duplicates (within the batch or of earlier facts) are merged as in the other paths
+            merged_facts, batch_facts = merge_new_facts(all_facts, result.get("facts", []))
+            # update in place: earlier batches' facts may still be under verification
+            for fact, merged in zip(all_facts, merged_facts):
+                fact.update(merged)
+            all_facts.extend(batch_facts)
+            domains_seen.extend(d for d in result.get("domains_seen", []) if d not in domains_seen)
+            gap_flags.extend(g for g in result.get("gap_flags", []) if g not in gap_flags)
+            if batch_facts:
+                partial_tasks.append(asyncio.create_task(verify_then_analyse(batch_facts, result)))
+                if progress_callback:
+                    await progress_callback(f"🧪 **{section}**: analyzing {len(batch_facts)} new facts while research continues...")
+
+        partial_analyses = [a for a in await asyncio.gather(*partial_tasks) if a]
+        researcher_result = {"facts": all_facts, "domains_seen": domains_seen, "gap_flags": gap_flags}
+
+        if progress_callback:
+            await progress_callback(f"🧪 Merging {len(partial_analyses)} partial analyses over {len(all_facts)} facts for **{section}**...")
+        merge_payload = {
+            **base_payload,
+            "facts": all_facts,
+            "domains_seen": domains_seen,
+            "gap_flags": gap_flags,
+            "partial_analyses": partial_analyses
+        }
+        print(f"[{section}] Running Analyst merge over {len(partial_analyses)} partial analyses")
+        analyst_result = await self._run_step(self.analyst_merge_agent, merge_payload, "analyst", section)
+        if analyst_result is None:
+            analyst_result = partial_analyses[0] if partial_analyses else {"section": section, "bullets": [], "mini_takeaways": [], "conflicts": [], "gaps_next": []}
+        return researcher_result, analyst_result
+
     async def run_section_manager(self, trace_id: str, section_details: Dict, trace_name: str, progress_callback=None) -> Dict:
         section = section_details["section_descriptor"]["section"]
+        budget = section_budget(section, section_details.get("run_params", {}))
+        async with span("section", kind="section", section=section, depth=budget.depth):
+            with use_budget(budget):
+                return await self._run_section_steps(trace_id, section_details, trace_name, progress_callback)
+
+    async def _run_section_steps(self, trace_id: str, section_details: Dict, trace_name: str, progress_callback=None) -> Dict:
+        section = section_details["section_descriptor"]["section"]
+
+        # A finished section of a resumed run is returned as stored
+        finished = await load_checkpoint(section, RESULT_STEP)
+        if finished is not None:
+            if progress_callback:
+                await progress_callback(f"♻️ **{section}** restored from checkpoint")
+            return finished
 
         with trace(f"{trace_name} trace", trace_id=trace_id):
             base_payload = {
@@ -61,249 +356,209 @@ class SectionResearchManager:
                 "run_params": section_details.get("run_params", {})
             }
             
+            # Steps 1-2 come from the run-level planner when it covered this section
+            plan = section_details.get("plan") or {}
+
             # ---------- Step 1: Complexity Assessment ----------
-            if progress_callback:
-                await progress_callback(f"🧠 Analyzing complexity for **{section}**...")
-            print(f"[{section}] Running Complexity Assessment")
-            complexity_raw = await Runner.run(self.complexity_agent, as_messages(base_payload))
-            
-            try:
-                complexity_result = json.loads(complexity_raw.final_output)
-            except json.JSONDecodeError as e:
-                print(f"Error parsing complexity JSON for {section}: {e}")
-                complexity_result = {
-                    "complexity": "moderate", 
-                    "reasoning": "fallback due to parsing error",
-                    "recommended_query_count": 12,
-                    "search_strategy_notes": "standard approach"
-                }
+            complexity_result = await load_checkpoint(section, "complexity")
+            if complexity_result is None and plan:
+                complexity_result = plan["complexity"]
+                await save_checkpoint(section, "complexity", complexity_result)
+            if complexity_result is None:
+                if progress_callback:
+                    await progress_callback(f"🧠 Analyzing complexity for **{section}**...")
+                print(f"[{section}] Running Complexity Assessment")
+                complexity_result = await self._run_step(self.complexity_agent, base_payload, "complexity", section)
+                if complexity_result is not None:
+                    await save_checkpoint(section, "complexity", complexity_result)
+                else:
+                    complexity_result = {
+                        "complexity": "moderate", 
+                        "reasoning": "fallback due to parsing error",
+                        "recommended_query_count": 12,
+                        "search_strategy_notes": "standard approach"
+                    }
             
+            budget = current_budget()
             complexity_level = complexity_result.get("complexity", "moderate")
-            recommended_count = complexity_result.get("recommended_query_count", 12)
+            # the complexity agent's recommendation is capped by the depth budget
+            recommended_count = budget.clamp_queries(complexity_result.get("recommended_query_count", 12))
             strategy_notes = complexity_result.get("search_strategy_notes", "")
             
             print(f"[{section}] Complexity: {complexity_level}, Recommended queries: {recommended_count}")
-            if progress_callback:
+            if progress_callback and not plan:
                 await progress_callback(f"📊 **{section}** complexity: {complexity_level} → generating {recommended_count} queries")
 
             # ---------- Step 2: Query Generation ----------
-            query_payload = {
-                **base_payload,
-                "complexity_level": complexity_level,
-                "recommended_query_count": recommended_count,
-                "search_strategy_notes": strategy_notes
-            }
-            
-            if progress_callback:
-                await progress_callback(f"🔍 Generating search queries for **{section}**...")
-            print(f"[{section}] Running Query Generation")
-            query_gen_raw = await Runner.run(self.query_gen_agent, as_messages(query_payload))
-            
-            try:
-                query_gen_result = json.loads(query_gen_raw.final_output)
-            except json.JSONDecodeError as e:
-                print(f"Error parsing query_gen JSON for {section}: {e}")
-                query_gen_result = {"queries": []}
+            query_gen_result = await load_checkpoint(section, "queries")
+            if query_gen_result is None and plan:
+                query_gen_result = plan["queries"]
+                await save_checkpoint(section, "queries", query_gen_result)
+            if query_gen_result is None:
+                query_payload = {
+                    **base_payload,
+                    "complexity_level": complexity_level,
+                    "recommended_query_count": recommended_count,
+                    "search_strategy_notes": strategy_notes
+                }
+                
+                if progress_callback:
+                    await progress_callback(f"🔍 Generating search queries for **{section}**...")
+                print(f"[{section}] Running Query Generation")
+                query_gen_result = await self._run_step(self.query_gen_agent, query_payload, "query_gen", section)
+                if query_gen_result is not None:
+                    await save_checkpoint(section, "queries", query_gen_result)
+                else:
+                    query_gen_result = {"queries": []}
 
-            actual_queries = len(query_gen_result.get("queries", []))
+            query_gen_result["queries"] = query_gen_result.get("queries", [])[:recommended_count]
+            actual_queries = len(query_gen_result["queries"])
             print(f"[{section}] Generated {actual_queries} queries (target: {recommended_count})")
-            if progress_callback:
-                await progress_callback(f"🌐 Researching **{section}** with {actual_queries} search queries...")
 
             # Update run_params with dynamic query count for researcher
             dynamic_run_params = base_payload["run_params"].copy()
             dynamic_run_params["max_queries"] = recommended_count
 
-            # ---------- Step 3: Research ----------
-            researcher_payload = {
-                **base_payload, 
-                "queries": query_gen_result.get("queries", []),
-                "run_params": dynamic_run_params
-            }
-            print(f"[{section}] Running Researcher")
-            researcher_raw = await Runner.run(self.researcher_agent, as_messages(researcher_payload))
-            # pdb.set_trace()
-            # researcher_result = parse_json(researcher_raw)
-            # researcher_result = ensure_keys(researcher_result, {"facts": [], "domains_seen": [], "gap_flags": []})
-
-            try:
-                researcher_result = json.loads(researcher_raw.final_output)
-            except json.JSONDecodeError as e:
-                print(f"Error parsing researcher JSON for {section}: {e}")
-                researcher_result = {"facts": [], "domains_seen": [], "gap_flags": []}
-            facts_to_url_mapping = {}
-            if 'facts' in researcher_result and len(researcher_result['facts'])>0:
-                for fact in researcher_result['facts']:
-                    fact_id = fact["fact_id"]
-                    source_url = fact["source_url"]
+            researcher_result = await load_checkpoint(section, "facts")
+            analyst_result = await load_checkpoint(section, "analysis") if researcher_result is not None else None
+            if researcher_result is None and progress_callback:
+                await progress_callback(f"🌐 Researching **{section}** with {actual_queries} search queries...")
 
-                    if fact_id not in facts_to_url_mapping:
-                        facts_to_url_mapping[fact_id] = []
-                    facts_to_url_mapping[fact_id].append(source_url)
+            if researcher_result is None and self.stream_research:
+                # ---------- Steps 3+4 overlapped: analyse fact batches while research continues ----------
+                researcher_result, analyst_result = await self._stream_research_and_analysis(
+                    base_payload, query_gen_result.get("queries", []), dynamic_run_params, section, progress_callback
+                )
+                await save_checkpoint(section, "facts", researcher_result)
+                await save_checkpoint(section, "analysis", analyst_result)
+            else:
+                # ---------- Step 3: Research ----------
+                if researcher_result is None:
+                    researcher_payload = {
+                        **base_payload, 
+                        "queries": query_gen_result.get("queries", []),
+                        "run_params": dynamic_run_params
+                    }
+                    print(f"[{section}] Running Researcher")
+                    researcher_result = await self._research(researcher_payload, section)
+                    await save_checkpoint(section, "facts", researcher_result)
 
+                # ---------- Step 3b: Verification (all source pages fetched concurrently) ----------
+                if await self._verify(researcher_result.get("facts", []), section, progress_callback):
+                    await save_checkpoint(section, "facts", researcher_result)
 
-            # ---------- Step 4: Analysis ----------
-            facts_count = len(researcher_result.get("facts", []))
-            if progress_callback:
-                await progress_callback(f"🧪 Analyzing {facts_count} facts for **{section}**...")
-                
-            analyst_payload = {
-                **base_payload,
-                "facts": researcher_result.get("facts", []),
-                "domains_seen": researcher_result.get("domains_seen", []),
-                "gap_flags": researcher_result.get("gap_flags", [])
-            }
-            print(f"[{section}] Running Analyst")
-            analyst_raw = await Runner.run(self.analyst_agent, as_messages(analyst_payload))
-            
-            try:
-                analyst_result = json.loads(analyst_raw.final_output)
-            except json.JSONDecodeError as e:
-                print(f"Error parsing analyst JSON for {section}: {e}")
-                analyst_result = {"section": section, "bullets": [], "mini_takeaways": [], "conflicts": [], "gaps_next": []}
+                # ---------- Step 4: Analysis ----------
+                if analyst_result is None:
+                    facts_count = len(researcher_result.get("facts", []))
+                    if progress_callback:
+                        await progress_callback(f"🧪 Analyzing {facts_count} facts for **{section}**...")
+                        
+                    analyst_payload = {
+                        **base_payload,
+                        "facts": researcher_result.get("facts", []),
+                        "domains_seen": researcher_result.get("domains_seen", []),
+                        "gap_flags": researcher_result.get("gap_flags", [])
+                    }
+                    print(f"[{section}] Running Analyst")
+                    analyst_result = await self._run_step(self.analyst_agent, analyst_payload, "analyst", section)
+                    if analyst_result is not None:
+                        await save_checkpoint(section, "analysis", analyst_result)
+                    else:
+                        analyst_result = {"section": section, "bullets": [], "mini_takeaways": [], "conflicts": [], "gaps_next": []}
 
-            # ---------- Step 5: Quality Assessment (Critic) ----------
+            # ---------- Steps 5-6: Critic and self-healing rounds ----------
+            # The critic runs once, then again after each self-healing round while rounds remain
+            # (critic_iterations); a round that adds few new facts ends the loop early.
             critic_result = {}
-            if self.enable_critic:
-                if progress_callback:
-                    await progress_callback(f"🔬 Assessing research quality for **{section}**...")
-                    
-                critic_payload = {
-                    **base_payload,
-                    "facts": researcher_result.get("facts", []),
-                    "analyst_json": analyst_result
-                }
-                print(f"[{section}] Running Quality Assessment (Critic)")
-                critic_raw = await Runner.run(self.critic_agent, as_messages(critic_payload))
-
-                try:
-                    critic_result = json.loads(critic_raw.final_output)
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing critic JSON for {section}: {e}")
-                    critic_result = {
-                        "needs_iteration": False,
-                        "iteration_reason": "JSON parse error",
-                        "quality_issues": [],
-                        "gap_queries": [],
-                        "confidence_assessment": 0.5
+            iterations = []
+            while self.enable_critic:
+                suffix = f"_{len(iterations) + 1}" if iterations else ""
+                if iterations and (len(iterations) >= self.critic_iterations or iterations[-1]["gain"] < ITERATION_MIN_GAIN):
+                    break
+                if not budget.allow_step("critic"):
+                    break
+
+                # ---------- Step 5: Quality Assessment (Critic) ----------
+                round_critic = await load_checkpoint(section, f"critic{suffix}")
+                if round_critic is None:
+                    if progress_callback:
+                        await progress_callback(f"🔬 Assessing research quality for **{section}**...")
+
+                    critic_payload = {
+                        **base_payload,
+                        "facts": researcher_result.get("facts", []),
+                        "analyst_json": analyst_result
                     }
+                    print(f"[{section}] Running Quality Assessment (Critic)")
+                    round_critic = await self._run_step(self.critic_agent, critic_payload, "critic", section)
+                    if round_critic is not None:
+                        await save_checkpoint(section, f"critic{suffix}", round_critic)
+                    else:
+                        round_critic = {
+                            "needs_iteration": False,
+                            "iteration_reason": "JSON parse error",
+                            "quality_issues": [],
+                            "gap_queries": [],
+                            "confidence_assessment": 0.5
+                        }
+                critic_result = round_critic
+
+                needs_iteration = critic_result.get("needs_iteration", False)
+                gap_queries_raw = critic_result.get("gap_queries", [])
+                print(f"[{section}] Critic assessment - Needs iteration: {needs_iteration}, "
+                      f"Confidence: {critic_result.get('confidence_assessment', 0.5):.2f}")
+                if not (needs_iteration and gap_queries_raw):
+                    break
+
+                # ---------- Step 6: Self-Healing Research Round ----------
+                iteration = await load_checkpoint(section, f"iteration{suffix}")
+                if iteration is None:
+                    if not budget.allow_step("iteration"):
+                        break
+                    print(f"[{section}] Triggering self-healing round {len(iterations) + 1}: {critic_result.get('iteration_reason', '')}")
+                    iteration = await self._self_heal(base_payload, dynamic_run_params, researcher_result, analyst_result,
+                                                      gap_queries_raw[:5], section, len(iterations) + 1, progress_callback)
+                    await save_checkpoint(section, f"iteration{suffix}", iteration)
+                researcher_result, analyst_result = iteration["facts"], iteration["analysis"]
+                iterations.append(iteration.get("stats") or {"gain": 1.0})
+                if iterations[-1]["gain"] < ITERATION_MIN_GAIN:
+                    print(f"[{section}] Stopping self-healing: round {len(iterations)} added "
+                          f"{iterations[-1].get('new_facts', 0)} new facts (gain {iterations[-1]['gain']:.2f})")
 
-            # Extract iteration decision from Critic
-            needs_iteration = critic_result.get("needs_iteration", False)
-            iteration_reason = critic_result.get("iteration_reason", "")
             critic_confidence = critic_result.get("confidence_assessment", 0.5)
-            gap_queries_raw = critic_result.get("gap_queries", [])
-            
-            print(f"[{section}] Critic assessment - Needs iteration: {needs_iteration}, Confidence: {critic_confidence:.2f}")
+            iterated = bool(iterations)
 
-            # ---------- Step 6: Self-Healing Research Loop (if needed) ----------
-            if self.enable_critic and needs_iteration and len(gap_queries_raw) > 0:
+            # fact_id -> source URLs (merged facts carry every source they were folded from)
+            facts_to_url_mapping = {}
+            for fact in researcher_result.get("facts", []):
+                urls = facts_to_url_mapping.setdefault(fact["fact_id"], [])
+                urls.extend(u for u in fact_sources(fact) if u not in urls)
+
+            # ---------- Step 7: Editor (Always Runs Once at the End) ----------
+            editor_section = await load_checkpoint(section, "editor")
+            if editor_section is None:
                 if progress_callback:
-                    await progress_callback(f"🔄 **{section}** needs iteration → running {len(gap_queries_raw[:5])} gap queries...")
-                print(f"[{section}] Triggering self-healing loop: {iteration_reason}")
+                    iteration_status = "with iteration enhancements" if iterated else "with original analysis"
+                    await progress_callback(f"✏️ Finalizing **{section}** section brief ({iteration_status})...")
                 
-                # Use Critic's gap queries (already formatted)
-                iteration_queries = gap_queries_raw[:5]  # Max 5 gap queries
-                
-                # Second research round
-                iteration_payload = {
+                editor_payload = {
                     **base_payload,
-                    "queries": iteration_queries,
-                    "run_params": {**dynamic_run_params, "max_queries": len(iteration_queries)}
+                    "analyst_json": analyst_result,  # This is either original or iteration-enhanced
+                    "facts": researcher_result.get("facts", []),  # This is either original or merged facts
+                    "critic_json": critic_result  # Pass critic assessment to editor
                 }
                 
-                print(f"[{section}] Running iteration research with {len(iteration_queries)} gap queries")
-                iteration_researcher_raw = await Runner.run(self.researcher_agent, as_messages(iteration_payload))
-                
-                try:
-                    iteration_researcher_result = json.loads(iteration_researcher_raw.final_output)
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing iteration researcher JSON for {section}: {e}")
-                    iteration_researcher_result = {"facts": [], "domains_seen": [], "gap_flags": []}
-                
-                # Merge original and iteration facts (handle duplicates)
-                all_facts = researcher_result.get("facts", [])
-                iteration_facts = iteration_researcher_result.get("facts", [])
-                
-                # Simple deduplication by claim+entity+source
-                seen_fact_keys = set()
-                for fact in all_facts:
-                    fact_key = f"{fact.get('entity', '')}-{fact.get('claim', '')}-{fact.get('source_url', '')}"
-                    seen_fact_keys.add(fact_key)
-                
-                new_facts = []
-                for fact in iteration_facts:
-                    fact_key = f"{fact.get('entity', '')}-{fact.get('claim', '')}-{fact.get('source_url', '')}"
-                    if fact_key not in seen_fact_keys:
-                        new_facts.append(fact)
-                        seen_fact_keys.add(fact_key)
-                
-                merged_facts = all_facts + new_facts
-                merged_researcher_result = {
-                    **researcher_result,
-                    "facts": merged_facts,
-                    "domains_seen": list(set(researcher_result.get("domains_seen", []) + iteration_researcher_result.get("domains_seen", [])))
-                }
-                
-                print(f"[{section}] Merged {len(new_facts)} new facts, total: {len(merged_facts)}")
-                if progress_callback:
-                    await progress_callback(f"🔬 Re-analyzing **{section}** with {len(merged_facts)} total facts (added {len(new_facts)} new)...")
-                
-                # Re-run analyst with ALL facts (original + iteration facts)
-                iteration_analyst_payload = {
-                    **base_payload,  # Use base_payload for consistency
-                    "facts": merged_facts,  # This contains ALL facts: original + new from iteration
-                    "domains_seen": merged_researcher_result.get("domains_seen", []),
-                    "gap_flags": merged_researcher_result.get("gap_flags", [])
-                }
+                iteration_status = f"after {len(iterations)} iteration(s)" if iterated else "no iteration"
+                print(f"[{section}] Running Editor ({iteration_status})")
                 
-                print(f"[{section}] Re-running Analyst with expanded facts (total: {len(merged_facts)} facts)")
-                iteration_analyst_raw = await Runner.run(self.analyst_agent, as_messages(iteration_analyst_payload))
-                
-                try:
-                    iteration_analyst_result = json.loads(iteration_analyst_raw.final_output)
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing iteration analyst JSON for {section}: {e}")
-                    iteration_analyst_result = analyst_result  # fallback to original
-                
-                # Update the final facts and analysis for editor
-                print(f"[{section}] Iteration complete - updated facts and analysis ready for Editor")
-                researcher_result = merged_researcher_result
-                analyst_result = iteration_analyst_result
-                
-                # Update facts_to_url_mapping with new facts
-                for fact in new_facts:
-                    fact_id = fact["fact_id"]
-                    source_url = fact["source_url"]
-                    if fact_id not in facts_to_url_mapping:
-                        facts_to_url_mapping[fact_id] = []
-                    facts_to_url_mapping[fact_id].append(source_url)
-
-            # ---------- Step 7: Editor (Always Runs Once at the End) ----------
-            if progress_callback:
-                iteration_status = "with iteration enhancements" if (self.enable_critic and needs_iteration and len(gap_queries_raw) > 0) else "with original analysis"
-                await progress_callback(f"✏️ Finalizing **{section}** section brief ({iteration_status})...")
-            
-            editor_payload = {
-                **base_payload,
-                "analyst_json": analyst_result,  # This is either original or iteration-enhanced
-                "facts": researcher_result.get("facts", []),  # This is either original or merged facts
-                "critic_json": critic_result  # Pass critic assessment to editor
-            }
-            
-            iteration_status = "after iteration" if (self.enable_critic and needs_iteration and len(gap_queries_raw) > 0) else "no iteration"
-            print(f"[{section}] Running Editor ({iteration_status})")
-            
-            editor_raw = await Runner.run(self.editor_agent, as_messages(editor_payload))
-            
-            try:
-                editor_section = json.loads(editor_raw.final_output)
-            except json.JSONDecodeError as e:
-                print(f"Error parsing editor JSON for {section}: {e}")
-                editor_section = {"section": section, "highlights": [], "facts_ref": [], "gaps_next": [], "confidence": critic_confidence}
+                editor_section = await self._run_step(self.editor_agent, editor_payload, "editor", section)
+                if editor_section is not None:
+                    await save_checkpoint(section, "editor", editor_section)
+                else:
+                    editor_section = {"section": section, "highlights": [], "facts_ref": [], "gaps_next": [], "confidence": critic_confidence}
 
             # Update facts_ref mapping
-            if 'facts_ref' in editor_section and len(editor_section['facts_ref'])>0:
+            if 'facts_ref' in editor_section and isinstance(editor_section['facts_ref'], list) and len(editor_section['facts_ref'])>0:
                 updated_facts_ref = {}
                 for fact_referred_id in editor_section['facts_ref']:
                     if fact_referred_id in facts_to_url_mapping:
@@ -311,7 +566,7 @@ class SectionResearchManager:
 
                 editor_section['facts_ref'] = deepcopy(updated_facts_ref)
 
-            return {
+            result = {
                 "section": section,
                 "section_brief": editor_section,
                 "artifacts": {
@@ -321,6 +576,10 @@ class SectionResearchManager:
                     "analysis": analyst_result,
                     "critic": critic_result,
                     "facts_to_url_mapping": facts_to_url_mapping,
-                    "iteration_triggered": self.enable_critic and needs_iteration and len(gap_queries_raw) > 0
+                    "iteration_triggered": iterated,
+                    "iterations": iterations,
+                    "budget": budget.summary()
                 }
             }
+            await save_checkpoint(section, RESULT_STEP, result)
+            return result
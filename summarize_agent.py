@@ -1,8 +1,22 @@
 import json
+import time
 from tools.playwright_tool import playwright_web_read 
-from prompts.agent_prompts import final_summarizer_prompt
-from agents import Agent, Runner, trace
+from prompts.agent_prompts import final_summarizer_prompt, section_draft_prompt, report_reduce_prompt
+from agents import Agent, trace
+from agent_runner import run_agent
+from disk_cache import run_cache_summary
+from output_parsing import run_parse_summary
+from planner import run_planner_summary
+from search_executor import run_executor_summary
+from tools.doc_store import get_doc_store, run_doc_store_summary
+from run_context import current_run
+from scheduler import get_scheduler, run_scheduler_summary
+from instrumentation import span, span_summary
+from fact_dedup import dedup_facts, fact_sources
+from utils import estimate_tokens
+from report_payload import compact_report_payload
 from dotenv import load_dotenv
+from typing import Dict, Optional
 import os
 
 load_dotenv(override=True)
@@ -15,7 +29,83 @@ final_report_agent = Agent(
     model=default_model_name
 )
 
-async def generate_final_report(framework: str, topic: str, section_results: dict, trace_id: str, trace_name: str) -> dict:
+# Map-reduce report mode: one small draft per section as soon as it finishes, then one
+# reduce call that stitches the drafts. No tools on either, so both stay single-turn.
+section_draft_agent = Agent(
+    name="Section Draft Agent",
+    instructions=section_draft_prompt,
+    model=default_model_name
+)
+
+report_reduce_agent = Agent(
+    name="Report Reduce Agent",
+    instructions=report_reduce_prompt,
+    model=default_model_name
+)
+
+def report_structure_for(framework: str) -> tuple:
+    """(report_structure, narrative_structure) for a framework."""
+    if framework == "big-idea":
+        report_structure = "a market landscape analysis"
+        narrative_structure = """
+**Foundation**: What is this domain and why does it matter? Establish the basic concept, scale, and relevance.
+
+**Current Landscape**: Who are the key players and what's happening now? Introduce major companies, technologies, and current market activity with concrete examples.
+
+**Market Dynamics**: How does this ecosystem work? Explore business models, adoption patterns, competitive dynamics, and value chains.
+
+**Critical Insights**: What are the non-obvious patterns and tensions? Synthesize findings to reveal underlying trends, contradictions, and emerging opportunities.
+
+**Strategic Implications**: What does this mean for stakeholders? Distill insights into actionable understanding and key considerations for decision-makers.
+"""
+    else:  # specific-idea
+        report_structure = "a business viability assessment" 
+        narrative_structure = """
+**Foundation**: What problem does this solve and for whom? Establish the core pain point, affected stakeholders, and why this matters now.
+
+**Problem-Solution Fit**: How real and urgent is this problem? Present evidence of customer pain, market size, and demand signals with specific examples.
+
+**Competitive Reality**: What's the competitive context? Analyze existing solutions, differentiation opportunities, and defensive positioning.
+
+**Business Viability**: How could this work as a business? Explore revenue models, go-to-market approaches, and buyer dynamics.
+
+**Strategic Assessment**: What are the key risks and next steps? Synthesize insights into execution priorities and critical uncertainties to resolve.
+"""
+    return report_structure, narrative_structure
+
+
+async def draft_section_report(framework: str, topic: str, section_name: str, section_result: dict,
+                               trace_id: str, trace_name: str) -> str:
+    """
+    Map step of the map-reduce report: a Markdown draft of one section's findings.
+    Runs as soon as the section finishes, while other sections are still researching.
+    """
+    report_structure, narrative_structure = report_structure_for(framework)
+    facts = [
+        {k: f[k] for k in ("fact_id", "entity", "claim", "source_url", "source_urls", "confidence", "date_event") if k in f}
+        for f in section_result["artifacts"]["facts"].get("facts", [])
+    ]
+    brief = section_result["section_brief"]
+    payload = {
+        "framework": framework,
+        "topic_or_idea": topic,
+        "report_structure": report_structure,
+        "narrative_structure": narrative_structure,
+        "section": section_name,
+        "section_analysis": section_result["artifacts"]["analysis"],
+        "section_brief": {k: brief.get(k) for k in ("highlights", "confidence", "gaps_next")},
+        "facts": facts,
+    }
+    async with span("report_draft", kind="report", section=section_name):
+        with trace(f"{trace_name} trace", trace_id=trace_id):
+            draft = await run_agent(section_draft_agent, [
+                {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}
+            ], step="section_draft")
+    return draft.final_output
+
+
+async def generate_final_report(framework: str, topic: str, section_results: dict, trace_id: str, trace_name: str,
+                                section_drafts: Optional[Dict[str, str]] = None) -> dict:
     """
     Generate comprehensive final report with fact deduplication and framework-specific structure.
     
@@ -23,6 +113,8 @@ async def generate_final_report(framework: str, topic: str, section_results: dic
         framework: "big-idea" or "specific-idea" 
         topic: research topic/idea
         section_results: dict of section_name -> {section_brief, artifacts}
+        section_drafts: section_name -> draft from draft_section_report; when given, the
+            narrative is a reduce over the drafts instead of one call over all facts
     
     Returns:
         dict with structured_summary (JSON) and narrative_report (text)
@@ -48,41 +140,50 @@ async def generate_final_report(framework: str, topic: str, section_results: dic
         res["artifacts"]["analysis"] for res in section_results.values()
     ]
     
-    # Deduplicate facts across sections (handling fact_id collisions)
-    all_facts = []
-    seen_claims = set()
-    global_facts_to_url_mapping = {}
-    fact_id_counter = 1
-    
+    # Deduplicate facts across sections (handling fact_id collisions). Near-duplicate
+    # claims from different sections collapse into one fact carrying all their sources.
+    dedup_t0 = time.perf_counter()
+    section_facts = []
     for section_name, res in section_results.items():
-        facts = res["artifacts"]["facts"].get("facts", [])
         section_facts_mapping = res["artifacts"].get("facts_to_url_mapping", {})
-        
-        for fact in facts:
-            # Create unique key for deduplication based on content
-            entity = fact.get('entity', '').strip().lower()
-            claim = fact.get('claim', '').strip().lower()
-            source_url = fact.get('source_url', '')
-            fact_key = f"{entity}|{claim}|{source_url}"
-            
-            if fact_key not in seen_claims:
-                # Create new global fact_id to avoid collisions
-                new_fact_id = f"global_{fact_id_counter}"
-                fact_id_counter += 1
-                
-                # Update fact with new global ID
-                fact_copy = fact.copy()
-                old_fact_id = fact.get('fact_id')
-                fact_copy['fact_id'] = new_fact_id
-                fact_copy['section_source'] = section_name  # Track which section this came from
-                
-                all_facts.append(fact_copy)
-                seen_claims.add(fact_key)
-                
-                # Map the new global fact_id to URLs, preserving old mapping
-                if old_fact_id in section_facts_mapping:
-                    global_facts_to_url_mapping[new_fact_id] = section_facts_mapping[old_fact_id]
-    
+        for fact in res["artifacts"]["facts"].get("facts", []):
+            fact_copy = fact.copy()
+            old_fact_id = fact.get('fact_id')
+            fact_copy['fact_id'] = f"{section_name}::{old_fact_id}"  # unique across sections
+            fact_copy['section_source'] = section_name  # Track which section this came from
+            mapped_urls = section_facts_mapping.get(old_fact_id) or []
+            if len(mapped_urls) > 1:
+                fact_copy['source_urls'] = list(mapped_urls)
+            section_facts.append(fact_copy)
+
+    deduped_facts, id_map = dedup_facts(section_facts)
+
+    all_facts = []
+    global_facts_to_url_mapping = {}
+    global_ids = {}
+    for fact_id_counter, fact in enumerate(deduped_facts, start=1):
+        # Create new global fact_id to avoid collisions
+        new_fact_id = f"global_{fact_id_counter}"
+        global_ids[fact['fact_id']] = new_fact_id
+        fact['fact_id'] = new_fact_id
+        fact.pop('merged_fact_ids', None)
+        all_facts.append(fact)
+        global_facts_to_url_mapping[new_fact_id] = fact_sources(fact)
+
+    # section -> {section fact_id -> global fact_id}, so analyst evidence_ids stay resolvable
+    section_fact_ids = {}
+    for scoped_id, rep_id in id_map.items():
+        section_name, old_fact_id = scoped_id.split("::", 1)
+        section_fact_ids.setdefault(section_name, {})[old_fact_id] = global_ids[rep_id]
+
+    dedup_stats = {
+        "facts_in": len(section_facts),
+        "facts_out": len(all_facts),
+        "tokens_before": estimate_tokens(section_facts),
+        "tokens_after": estimate_tokens(all_facts),
+        "ms": round((time.perf_counter() - dedup_t0) * 1000, 1),
+    }
+
     # Create section-specific facts mapping (keeping original IDs for section references)
     facts_to_url_mapping = {
         s: res["artifacts"].get("facts_to_url_mapping", {})
@@ -95,33 +196,7 @@ async def generate_final_report(framework: str, topic: str, section_results: dic
         for s,res in section_results.items()
     }
 
-    # Set framework-specific reporting structure
-    if framework == "big-idea":
-        report_structure = "a market landscape analysis"
-        narrative_structure = """
-**Foundation**: What is this domain and why does it matter? Establish the basic concept, scale, and relevance.
-
-**Current Landscape**: Who are the key players and what's happening now? Introduce major companies, technologies, and current market activity with concrete examples.
-
-**Market Dynamics**: How does this ecosystem work? Explore business models, adoption patterns, competitive dynamics, and value chains.
-
-**Critical Insights**: What are the non-obvious patterns and tensions? Synthesize findings to reveal underlying trends, contradictions, and emerging opportunities.
-
-**Strategic Implications**: What does this mean for stakeholders? Distill insights into actionable understanding and key considerations for decision-makers.
-"""
-    else:  # specific-idea
-        report_structure = "a business viability assessment" 
-        narrative_structure = """
-**Foundation**: What problem does this solve and for whom? Establish the core pain point, affected stakeholders, and why this matters now.
-
-**Problem-Solution Fit**: How real and urgent is this problem? Present evidence of customer pain, market size, and demand signals with specific examples.
-
-**Competitive Reality**: What's the competitive context? Analyze existing solutions, differentiation opportunities, and defensive positioning.
-
-**Business Viability**: How could this work as a business? Explore revenue models, go-to-market approaches, and buyer dynamics.
-
-**Strategic Assessment**: What are the key risks and next steps? Synthesize insights into execution priorities and critical uncertainties to resolve.
-"""
+    report_structure, narrative_structure = report_structure_for(framework)
 
     # Prepare payload for final report agent
     payload = {
@@ -135,19 +210,57 @@ async def generate_final_report(framework: str, topic: str, section_results: dic
         "section_confidences": section_confidences,
         "global_facts_to_url_mapping": global_facts_to_url_mapping
     }
+    if section_drafts is not None:
+        # Reduce step: the drafts already carry the facts and links they use
+        payload = {
+            "framework": framework,
+            "topic_or_idea": topic,
+            "report_structure": report_structure,
+            "narrative_structure": narrative_structure,
+            "section_drafts": {s: section_drafts[s] for s in section_results if s in section_drafts},
+            "sections_without_draft": {
+                s: {k: v for k, v in merged_summary["sections"][s].items() if k != "facts_ref"}
+                for s in section_results if s not in section_drafts
+            },
+            "section_confidences": section_confidences,
+        }
+        payload_stats = {"mode": "mapreduce", "drafts": len(payload["section_drafts"]), "tokens_after": estimate_tokens(payload)}
+        report_agent, report_step = report_reduce_agent, "report_reduce"
+    else:
+        payload, payload_stats = compact_report_payload(payload, section_fact_ids)
+        report_agent, report_step = final_report_agent, "final_report"
 
     with trace(f"{trace_name} trace", trace_id=trace_id):
         # Generate final narrative report
-        final_report = await Runner.run(final_report_agent, [
+        final_report = await run_agent(report_agent, [
             {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}
-        ])
+        ], step=report_step)
 
+    run = current_run()
     return {
         "structured_summary": merged_summary,
         "narrative_report": final_report.final_output,
+        "facts": all_facts,  # full fact table; the report payload may omit low-ranked facts
         "metadata": {
             "total_facts": len(all_facts),
             "avg_confidence": sum(section_confidences.values()) / len(section_confidences) if section_confidences else 0,
-            "sections_count": len(section_results)
+            "sections_count": len(section_results),
+            "dedup": dedup_stats,
+            "budgets": {s: res["artifacts"].get("budget", {}) for s, res in section_results.items()},
+            "report_payload": payload_stats,
+            "cache": run_cache_summary(run.counters) if run else {},
+            "parsing": run_parse_summary(run.counters) if run else {},
+            "planning": run_planner_summary(run.counters) if run else {},
+            "search_broker": run.query_broker.summary() if run and run.query_broker else {},
+            "search_executor": run_executor_summary(run.counters) if run else {},
+            "doc_store": {
+                "run": run_doc_store_summary(run.counters) if run else {},
+                "process": get_doc_store().summary() if get_doc_store() else {}
+            },
+            "scheduler": {
+                "run_wait_ms": run_scheduler_summary(run.counters) if run else {},
+                "process": get_scheduler().metrics()
+            },
+            "timings": span_summary(run.spans) if run else []
         }
     }
\ No newline at end of file
@@ -0,0 +1,63 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fact_dedup import conflict_kind, dedup_facts, fact_sources, merge_new_facts  # noqa: E402
+
+
+def _fact(fact_id, url, claim="Suno raised $125M in a Series B round led by Lightspeed in May 2024"):
+    return {"fact_id": fact_id, "entity": "Suno", "facet": "funding", "claim": claim,
+            "source_url": url, "confidence": 0.7}
+
+
+def test_merge_new_facts_keeps_every_existing_fact():
+    existing = [_fact("s1", "https://a.example/1"), _fact("s2", "https://b.example/2"),
+                _fact("s3", "https://c.example/3", "Udio launched its public beta in April 2024")]
+    incoming = [_fact("it_s1", "https://d.example/4")]
+
+    merged, new_facts = merge_new_facts(existing, incoming)
+
+    assert [f["fact_id"] for f in merged] == ["s1", "s2", "s3"]
+    assert new_facts == []
+    assert fact_sources(merged[0]) == ["https://a.example/1", "https://d.example/4"]
+    assert merged[1] is existing[1] and merged[2] is existing[2]
+    assert "source_urls" not in existing[0]
+
+
+def test_merge_new_facts_appends_new_facts():
+    existing = [_fact("s1", "https://a.example/1")]
+    incoming = [_fact("it_s1", "https://b.example/2", "Udio launched its public beta in April 2024"),
+                _fact("it_s2", "https://c.example/3", "Udio launched its public beta in April 2024")]
+
+    merged, new_facts = merge_new_facts(existing, incoming)
+
+    assert [f["fact_id"] for f in merged] == ["s1", "it_s1"]
+    assert new_facts == merged[1:]
+    assert fact_sources(new_facts[0]) == ["https://b.example/2", "https://c.example/3"]
+
+
+def test_conflict_kind():
+    assert conflict_kind([_fact("s1", "u"), _fact("s2", "u", "Suno raised $100M in a Series B round in May 2024")]) == "amount"
+    assert conflict_kind([_fact("s1", "u", "Udio launched in 2023"), _fact("s2", "u", "Udio launched in 2024")]) == "date"
+    assert conflict_kind([_fact("s1", "u", "Suno revenue was $10M"), _fact("s2", "u", "Suno bookings were $10M")]) == "definition"
+
+
+def _entity_fact(fact_id, entity, url):
+    return {"fact_id": fact_id, "entity": entity, "facet": "funding", "confidence": 0.7, "source_url": url,
+            "claim": f"{entity} raised $125M in a Series B round led by Lightspeed in May 2024"}
+
+
+def test_dedup_facts_keeps_near_miss_entities_apart():
+    for a, b in [("Meta", "Metabase"), ("Apple", "Pineapple"), ("query 1", "query 10")]:
+        facts = [_entity_fact("s1", a, "https://a.example/1"), _entity_fact("s2", b, "https://b.example/2")]
+        kept, _ = dedup_facts(facts)
+        assert [f["fact_id"] for f in kept] == ["s1", "s2"], (a, b)
+        assert all("source_urls" not in f for f in kept)
+
+
+def test_dedup_facts_merges_entity_name_variants():
+    facts = [_entity_fact("s1", "Suno Inc.", "https://a.example/1"), _entity_fact("s2", "Suno", "https://b.example/2")]
+    kept, id_map = dedup_facts(facts)
+    assert len(kept) == 1
+    assert id_map == {"s1": "s1", "s2": "s1"}
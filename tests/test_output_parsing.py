@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import ModelBehaviorError  # noqa: E402
+
+from output_parsing import parse_output, repair_json  # noqa: E402
+from schemas.schemas import ResearcherOutput  # noqa: E402
+
+
+def _reply(n):
+    return {"facts": [{"fact_id": f"s{i}", "entity": "Suno", "claim": f"claim {i}",
+                       "source_url": f"https://example.com/{i}", "confidence": 0.5} for i in range(1, n + 1)],
+            "domains_seen": ["example.com"], "gap_flags": []}
+
+
+def test_repair_json_leaves_valid_json_alone():
+    assert repair_json('{"a": [1, 2]}') == ({"a": [1, 2]}, False)
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"a": [1, 2]}\n```',
+    'Here you go: {"a": [1, 2]} hope that helps',
+    '{"a": [1, 2,],}',
+])
+def test_repair_json_fences_prose_trailing_commas(text):
+    assert repair_json(text) == ({"a": [1, 2]}, True)
+
+
+def test_repair_json_truncated_keeps_complete_items():
+    text = json.dumps(_reply(3))
+    cut = text[:text.index('"s3"') + 10]
+    data, repaired = repair_json(cut)
+    assert repaired
+    assert [f["fact_id"] for f in data["facts"]][:2] == ["s1", "s2"]
+
+
+def test_parse_output_salvages_truncated_reply():
+    text = json.dumps(_reply(3))
+    out = parse_output(text[:text.index('"s3"') + 10], ResearcherOutput, "researcher")
+    assert [f["fact_id"] for f in out["facts"]] == ["s1", "s2"]
+
+
+def test_parse_output_drops_bad_fields_and_items():
+    data = _reply(3)
+    data["facts"][0]["confidence"] = "high"
+    del data["facts"][1]["source_url"]
+    out = parse_output(json.dumps(data), ResearcherOutput, "researcher")
+    assert [f["fact_id"] for f in out["facts"]] == ["s1", "s3"]
+    assert "confidence" not in out["facts"][0]  # wrong-typed optional field dropped, default applies
+
+
+def test_parse_output_raises_when_nothing_usable():
+    with pytest.raises(ModelBehaviorError):
+        parse_output("I could not find anything.", ResearcherOutput, "researcher")
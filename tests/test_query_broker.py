@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query_broker import normalize_query  # noqa: E402
+
+
+def test_word_order_case_punctuation_and_stopwords_collide():
+    assert normalize_query("AI music competitors 2025") == normalize_query("competitors of ai music, 2025")
+
+
+def test_operators_and_phrases_stay_whole():
+    assert normalize_query('Suno "Series B" site:TechCrunch.com') == '"series b" site:techcrunch.com suno'
+    assert normalize_query("suno -udio") != normalize_query("suno udio")
+
+
+def test_grouping_operators_keep_token_order():
+    assert normalize_query("a OR b c") != normalize_query("a b OR c")
+    assert normalize_query("(suno OR udio) funding") != normalize_query("suno OR (udio funding)")
+    assert normalize_query("Suno OR Udio") == normalize_query("suno OR udio")
+
+
+def test_empty_query():
+    assert normalize_query("") == ""
+    assert normalize_query(None) == ""
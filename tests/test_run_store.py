@@ -0,0 +1,50 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import run_store  # noqa: E402
+from run_context import RunState, bind_run  # noqa: E402
+from run_store import RESULT_STEP, RunStore, load_checkpoint, save_checkpoint  # noqa: E402
+
+
+def test_a_reopened_store_has_what_the_run_needs_to_resume(tmp_path):
+    path = str(tmp_path / "runs" / "checkpoints.sqlite3")
+    store = RunStore(path)
+    store.start_run("t1", "big-idea", "AI music", {"depth": "deep", "k_per_query": 6})
+    store.save("t1", "market", "complexity", {"complexity": "moderate"})
+    store.save("t1", "market", "queries", {"queries": [{"q": "suno funding"}]})
+    store.save("t1", "team", "complexity", {"complexity": "simple"})
+    store.save("t1", "team", RESULT_STEP, {"section": "team"})
+
+    reopened = RunStore(path)  # a later process resuming the run
+    assert reopened.get_run("t1")["params"] == {"depth": "deep", "k_per_query": 6}
+    assert reopened.steps("t1", "market") == ["complexity", "queries"]
+    assert reopened.load("t1", "market", "queries") == {"queries": [{"q": "suno funding"}]}
+    assert reopened.completed_sections("t1") == {"team": {"section": "team"}}
+    assert reopened.get_run("unknown") is None
+
+
+def test_start_run_keeps_the_original_params(tmp_path):
+    store = RunStore(str(tmp_path / "c.sqlite3"))
+    store.start_run("t1", "big-idea", "AI music", {"depth": "deep"})
+    store.start_run("t1", "big-idea", "AI music", {"depth": "shallow"})
+    assert store.get_run("t1")["params"] == {"depth": "deep"}
+
+
+def test_checkpoints_are_scoped_to_the_current_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_store, "RUN_STORE_ENABLED", True)
+    monkeypatch.setattr(run_store, "_store", RunStore(str(tmp_path / "c.sqlite3")))
+
+    async def attempt(run):
+        await save_checkpoint("market", "analyst", {"bullets": [run.trace_id]})
+        return await load_checkpoint("market", "analyst")
+
+    first, other = RunState("t1"), RunState("t2")
+    assert asyncio.run(bind_run(first, attempt(first))) == {"bullets": ["t1"]}
+    assert asyncio.run(bind_run(other, load_checkpoint("market", "analyst"))) is None
+    resumed = RunState("t1")
+    assert asyncio.run(bind_run(resumed, load_checkpoint("market", "analyst"))) == {"bullets": ["t1"]}
+    assert resumed.counters["checkpoint_hits"] == 1
+    assert asyncio.run(load_checkpoint("market", "analyst")) is None  # outside a run
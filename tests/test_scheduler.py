@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import FairSemaphore, FairTokenBucket  # noqa: E402
+
+
+async def _grant_order(limiter, requests):
+    """Hold the limiter, queue `requests` (run keys) in order, then release one grant at a time."""
+    order = []
+    await limiter.acquire(run_key="holder")
+
+    async def worker(i, key):
+        await limiter.acquire(run_key=key)
+        order.append(i)
+
+    tasks = [asyncio.create_task(worker(i, key)) for i, key in enumerate(requests)]
+    await asyncio.sleep(0)
+    for _ in range(len(requests)):
+        limiter.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_busy_run_does_not_starve_others():
+    requests = ["a", "a", "a", "a", "b", "c"]
+    order = asyncio.run(_grant_order(FairSemaphore("test", 1), requests))
+    # round-robin across runs: b and c are served after a's first request, not after all four
+    assert order == [0, 4, 5, 1, 2, 3]
+
+
+def test_semaphore_capacity_and_metrics():
+    async def main():
+        sem = FairSemaphore("test", 2)
+        await sem.acquire(run_key="a")
+        await sem.acquire(run_key="a")
+        waiter = asyncio.create_task(sem.acquire(run_key="b"))
+        await asyncio.sleep(0)
+        assert not waiter.done() and sem.depth == 1
+        sem.release()
+        await waiter
+        return sem.snapshot()
+
+    snap = asyncio.run(main())
+    assert snap["acquired"] == 3 and snap["queued"] == 1 and snap["queue_depth"] == 0
+
+
+def test_cancelled_waiter_is_skipped():
+    async def main():
+        sem = FairSemaphore("test", 1)
+        await sem.acquire(run_key="a")
+        cancelled = asyncio.create_task(sem.acquire(run_key="a"))
+        waiter = asyncio.create_task(sem.acquire(run_key="b"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        sem.release()
+        await asyncio.wait_for(waiter, 1)
+        return sem.in_use
+
+    assert asyncio.run(main()) == 1
+
+
+def test_token_bucket_waits_for_refill():
+    async def main():
+        bucket = FairTokenBucket("test", rate=50, burst=1)
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        for _ in range(3):
+            await bucket.acquire(run_key="a")
+        return loop.time() - t0
+
+    assert 0.03 <= asyncio.run(main()) < 1  # 2 refills of 1 token at 50 tokens/s
+
+
+def test_zero_capacity_means_unlimited():
+    async def main():
+        await asyncio.gather(*(FairSemaphore("test", 0).acquire() for _ in range(5)))
+        await asyncio.gather(*(FairTokenBucket("test", 0, 0).acquire() for _ in range(5)))
+
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+# tools/browser_pool.py
+import asyncio
+import atexit
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_RECYCLE_AFTER = int(os.getenv("BROWSER_RECYCLE_AFTER", "200"))
+
+
+class _BrowserSlot:
+    """One long-lived Chromium process plus its reusable contexts."""
+
+    def __init__(self, browser) -> None:
+        self.browser = browser
+        self.contexts: Dict[Tuple[bool, Optional[str]], object] = {}
+        self.active = 0
+        self.pages_served = 0
+
+    def healthy(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Process-wide pool of headless Chromium browsers.
+
+    - `size` browsers are launched lazily on first use and kept alive.
+    - Contexts are reused per (render_js, user_agent); each read gets a fresh page.
+    - Concurrently open pages are capped by the caller's scheduler "browser" slot
+      (BROWSER_MAX_PAGES, fair across runs), not by the pool itself.
+    - A browser that crashed/disconnected is relaunched before it is handed out, and a
+      browser that served `recycle_after` pages is replaced (the old one is closed once
+      its in-flight pages finish) to bound memory growth.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, recycle_after: int = BROWSER_RECYCLE_AFTER) -> None:
+        self.size = max(1, size)
+        self.recycle_after = max(1, recycle_after)
+        self._lock = asyncio.Lock()
+        self._playwright = None
+        self._slots = [None] * self.size
+        self._retiring = set()
+        self.stats = {"launches": 0, "recycled": 0, "relaunched_unhealthy": 0, "pages": 0}
+
+    async def _launch(self) -> _BrowserSlot:
+        if self._playwright is None:
+            # imported on first launch: most reads never need a browser, and the import is slow
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+        browser = await self._playwright.chromium.launch(headless=True)
+        self.stats["launches"] += 1
+        return _BrowserSlot(browser)
+
+    async def _retire(self, slot: _BrowserSlot) -> None:
+        # wait for in-flight pages on the old browser, then close it
+        try:
+            while slot.active:
+                await asyncio.sleep(0.05)
+            await slot.browser.close()
+        except Exception:
+            pass
+
+    async def _acquire_slot(self) -> _BrowserSlot:
+        async with self._lock:
+            i = min(range(self.size), key=lambda j: self._slots[j].active if self._slots[j] else 0)
+            slot = self._slots[i]
+            if slot is None or not slot.healthy():
+                if slot is not None:
+                    self.stats["relaunched_unhealthy"] += 1
+                slot = self._slots[i] = await self._launch()
+            elif slot.pages_served >= self.recycle_after:
+                self.stats["recycled"] += 1
+                task = asyncio.create_task(self._retire(slot))
+                self._retiring.add(task)
+                task.add_done_callback(self._retiring.discard)
+                slot = self._slots[i] = await self._launch()
+            slot.active += 1
+            slot.pages_served += 1
+            return slot
+
+    async def _context_for(self, slot: _BrowserSlot, render_js: bool, user_agent: Optional[str]):
+        key = (render_js, user_agent)
+        context = slot.contexts.get(key)
+        if context is None:
+            context_kwargs = {}
+            if user_agent:
+                context_kwargs["user_agent"] = user_agent
+            if not render_js:
+                context_kwargs["java_script_enabled"] = False
+            context = await slot.browser.new_context(**context_kwargs)
+            slot.contexts[key] = context
+        return context
+
+    @asynccontextmanager
+    async def page(self, render_js: bool = True, user_agent: Optional[str] = None):
+        """Yield a fresh page from a pooled browser/context; the page is closed afterwards."""
+        slot = await self._acquire_slot()
+        page = None
+        try:
+            context = await self._context_for(slot, render_js, user_agent)
+            try:
+                page = await context.new_page()
+            except Exception:
+                # context went bad (e.g. closed underneath us): rebuild it once
+                slot.contexts.pop((render_js, user_agent), None)
+                context = await self._context_for(slot, render_js, user_agent)
+                page = await context.new_page()
+            self.stats["pages"] += 1
+            yield page
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            slot.active -= 1
+
+    async def shutdown(self) -> None:
+        async with self._lock:
+            for task in list(self._retiring):
+                task.cancel()
+            for i, slot in enumerate(self._slots):
+                if slot is not None:
+                    try:
+                        await slot.browser.close()
+                    except Exception:
+                        pass
+                self._slots[i] = None
+            if self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception:
+                    pass
+                self._playwright = None
+
+
+# One pool per event loop (Playwright objects are loop-bound).
+_pools: Dict[asyncio.AbstractEventLoop, BrowserPool] = {}
+_atexit_registered = False
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the lazily created pool for the running event loop."""
+    global _atexit_registered
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = BrowserPool()
+        _pools[loop] = pool
+        if not _atexit_registered:
+            atexit.register(shutdown_browser_pools_sync)
+            _atexit_registered = True
+    return pool
+
+
+async def shutdown_browser_pool() -> None:
+    """Close the pool bound to the running loop (for workers that own their loop)."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.shutdown()
+
+
+def shutdown_browser_pools_sync(timeout: float = 10.0) -> None:
+    """Best-effort shutdown of every pool; registered with atexit on first use."""
+    for loop, pool in list(_pools.items()):
+        _pools.pop(loop, None)
+        try:
+            if loop.is_closed():
+                continue
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(pool.shutdown(), loop).result(timeout=timeout)
+            else:
+                loop.run_until_complete(pool.shutdown())
+        except Exception:
+            pass
@@ -0,0 +1,168 @@
+# tools/doc_store.py
+import asyncio
+import os
+import tempfile
+import threading
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from run_context import bump
+from utils import canonical_url
+
+DOC_STORE_ENABLED = os.getenv("DOC_STORE_ENABLED", "1") not in ("0", "false", "False", "")
+DOC_STORE_DIR = os.getenv("DOC_STORE_DIR") or None  # None = system temp dir
+DOC_STORE_MAX_MB = int(os.getenv("DOC_STORE_MAX_MB", "1024"))
+
+
+class _Doc(NamedTuple):
+    title: str
+    final_url: str
+    status: int
+    offset: int
+    nbytes: int
+    nchars: int
+    truncated: bool
+
+
+class DocStore:
+    """
+    Process-wide store of extracted page text, keyed by canonical URL.
+
+    Sits in front of the page reader so every section, the final report agent and later runs
+    in the same process share one fetch per URL:
+      - keys are `canonical_url` of the requested URL; after a fetch the canonical final URL
+        (after redirects) is recorded as an alias, so links to either form hit the same entry
+      - concurrent requests for a URL that is being fetched await that fetch (single-flight)
+      - page text lives in an unlinked temp file and is read back from the file on each hit, so
+        large pages are not held on the Python heap between reads; the index keeps only
+        title/status/offsets. The file is dropped and restarted past DOC_STORE_MAX_MB.
+    The disk cache behind the reader still serves pages across processes.
+    """
+
+    def __init__(self, directory: Optional[str] = DOC_STORE_DIR, max_bytes: int = DOC_STORE_MAX_MB * 1024 * 1024) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._index: Dict[Tuple[str, bool], _Doc] = {}
+        self._aliases: Dict[str, str] = {}
+        self._inflight: Dict[Tuple[int, str, bool], asyncio.Future] = {}
+        self.stats = {"requests": 0, "hits": 0, "single_flight": 0, "fetches": 0, "aliases": 0, "resets": 0}
+
+    # --- storage ---
+    def _resolve(self, url: str) -> str:
+        key = canonical_url(url)
+        return self._aliases.get(key, key)
+
+    def _read(self, doc: _Doc) -> str:
+        self._file.seek(doc.offset)
+        return self._file.read(doc.nbytes).decode("utf-8")
+
+    def get(self, url: str, render_js: bool = True, max_chars: int = 200_000) -> Optional[Dict[str, Any]]:
+        """Stored read of `url` in the page reader's shape, or None if absent or too short for max_chars."""
+        with self._lock:
+            doc = self._index.get((self._resolve(url), render_js))
+            if doc is None or (doc.truncated and doc.nchars < max_chars):
+                return None
+            text = self._read(doc)
+        return {"title": doc.title, "final_url": doc.final_url, "status": doc.status,
+                "text": text[:max_chars], "elapsed_ms": 0, "tier": "store"}
+
+    def has(self, url: str, render_js: bool = True) -> bool:
+        with self._lock:
+            return (self._resolve(url), render_js) in self._index
+
+    def put(self, url: str, render_js: bool, page: Dict[str, Any], max_chars: int) -> None:
+        text = page.get("text") or ""
+        if (page.get("status") or 0) >= 400 or not text:
+            return
+        data = text.encode("utf-8")
+        with self._lock:
+            if self._file is None or self._size + len(data) > self.max_bytes:
+                self._reset()
+            self._file.seek(self._size)
+            self._file.write(data)
+            key = canonical_url(url)
+            doc = _Doc(page.get("title") or "", page.get("final_url") or url, page.get("status") or 0,
+                       self._size, len(data), len(text), len(text) >= max_chars)
+            self._size += len(data)
+            self._index[(key, render_js)] = doc
+            final_key = canonical_url(doc.final_url)
+            if final_key != key:
+                # redirected: the final URL's canonical form becomes the entry; the requested one points at it
+                self._index[(final_key, render_js)] = doc
+                if self._aliases.get(key) != final_key:
+                    self._aliases[key] = final_key
+                    self.stats["aliases"] += 1
+
+    def _reset(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self.stats["resets"] += 1
+        self._file = tempfile.TemporaryFile(prefix="rdr-docs-", dir=self.directory)
+        self._size = 0
+        self._index.clear()
+        self._aliases.clear()
+
+    # --- fetching ---
+    async def fetch(self, url: str, fetch: Callable[[], Awaitable[Dict[str, Any]]], render_js: bool = True,
+                    max_chars: int = 200_000) -> Dict[str, Any]:
+        """Stored read of `url`, else the result of `fetch()`, shared with concurrent callers and stored."""
+        self.stats["requests"] += 1
+        stored = self.get(url, render_js, max_chars)
+        if stored is not None:
+            self.stats["hits"] += 1
+            bump("docstore_hits")
+            return stored
+
+        flight = (id(asyncio.get_running_loop()), self._resolve(url), render_js)
+        pending = self._inflight.get(flight)
+        if pending is not None:
+            self.stats["single_flight"] += 1
+            bump("docstore_single_flight")
+            page = await asyncio.shield(pending)
+            return {**page, "text": page.get("text", "")[:max_chars]}
+
+        fut = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())  # never "exception was never retrieved"
+        self._inflight[flight] = fut
+        try:
+            page = await fetch()
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(page)
+            if page.get("tier") != "cache":
+                self.stats["fetches"] += 1
+                bump("docstore_fetches")
+            self.put(url, render_js, page, max_chars)
+            return page
+        finally:
+            if self._inflight.get(flight) is fut:
+                del self._inflight[flight]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            docs = len({doc.offset for doc in self._index.values()})
+            return {**self.stats, "documents": docs, "bytes_on_disk": self._size}
+
+
+_store: Optional[DocStore] = None
+_store_lock = threading.Lock()
+
+
+def get_doc_store() -> Optional[DocStore]:
+    """The process-wide document store, or None when disabled."""
+    global _store
+    if not DOC_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = DocStore()
+    return _store
+
+
+def run_doc_store_summary(counters: Dict[str, int]) -> Dict[str, int]:
+    """Pick the docstore_* counters out of a run's counters for report metadata."""
+    return {k[len("docstore_"):]: v for k, v in counters.items() if k.startswith("docstore_")}
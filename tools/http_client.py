@@ -0,0 +1,66 @@
+# tools/http_client.py
+import asyncio
+import importlib.util
+import os
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "64"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "32"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "8"))
+
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 keep-alive without it.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# One client (and one set of host semaphores) per event loop. httpx/asyncio primitives
+# are bound to the loop they were created on, and the batch runner / sync shims run
+# their own loops next to the Gradio one.
+_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+_host_semaphores: Dict[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]] = {}
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client for the running event loop (created lazily)."""
+    loop = asyncio.get_running_loop()
+    # drop clients whose loop has gone away
+    for stale in [other for other in _clients if other is not loop and other.is_closed()]:
+        _clients.pop(stale, None)
+        _host_semaphores.pop(stale, None)
+
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=30.0,
+            ),
+            timeout=httpx.Timeout(20.0, connect=5.0),
+            follow_redirects=True,
+        )
+        _clients[loop] = client
+    return client
+
+
+def host_semaphore(url: str, limit: Optional[int] = None) -> asyncio.Semaphore:
+    """Per-host concurrency limiter for the running event loop."""
+    loop = asyncio.get_running_loop()
+    host = (urlsplit(url).hostname or "").lower()
+    sems = _host_semaphores.setdefault(loop, {})
+    sem = sems.get(host)
+    if sem is None:
+        sem = asyncio.Semaphore(limit or HTTP_PER_HOST_LIMIT)
+        sems[host] = sem
+    return sem
+
+
+async def aclose_client() -> None:
+    """Close the shared client of the running loop (call on app/worker shutdown)."""
+    loop = asyncio.get_running_loop()
+    client = _clients.pop(loop, None)
+    _host_semaphores.pop(loop, None)
+    if client is not None:
+        await client.aclose()
@@ -1,6 +1,17 @@
 # playwright_tool.py
 from typing import Dict, Optional
-from playwright.async_api import async_playwright
+from tools.browser_pool import get_browser_pool
+from tools.doc_store import get_doc_store
+from tools.http_client import get_async_client, host_semaphore
+from tools.text_extract import EXTRACTOR_VERSION, extract_readable, looks_js_rendered, select_relevant
+from disk_cache import cache_key, cache_get, cache_set
+from run_context import bump
+from scheduler import get_scheduler
+from instrumentation import span, add_bytes
+from depth import current_budget
+from utils import canonical_url
+import asyncio
+import os
 import re
 import html
 import time
@@ -12,6 +23,15 @@ except Exception:
     # fallback no-op if you call it directly
     def function_tool(fn): return fn
 
+HTTP_READ_TIMEOUT_MS = int(os.getenv("HTTP_READ_TIMEOUT_MS", "15000"))
+HTTP_READ_MAX_BYTES = int(os.getenv("HTTP_READ_MAX_BYTES", str(5 * 1024 * 1024)))
+DEFAULT_UA = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+# Status codes that bot walls return to plain clients but often not to a real browser.
+_ESCALATE_STATUS = {401, 403, 429, 503}
+
 def _collapse_ws(s: str) -> str:
     s = html.unescape(s or "")
     s = re.sub(r"\r\n|\r", "\n", s)
@@ -20,8 +40,7 @@ def _collapse_ws(s: str) -> str:
     s = re.sub(r"\n{3,}", "\n\n", s)
     return s.strip()
 
-@function_tool
-async def playwright_web_read(
+async def browser_read(
     url: str,
     wait_selector: Optional[str] = None,
     render_js: bool = True,
@@ -29,57 +48,41 @@ async def playwright_web_read(
     max_chars: int = 200_000,
     user_agent: Optional[str] = None,
 ) -> Dict[str, object]:
-    """
-    Fetch visible page text using Playwright (Chromium, headless).
-    Args:
-      url: The URL to visit.
-      wait_selector: CSS selector to wait for (optional).
-      render_js: If False, disable JS for faster loads on static pages.
-      timeout_ms: Overall nav+wait timeout.
-      max_chars: Truncate returned text to avoid huge payloads.
-      user_agent: Optional UA string.
-    Returns:
-      { "title", "final_url", "status", "text", "elapsed_ms" }
-    """
+    """Undecorated page read on the shared browser pool (see `playwright_web_read`)."""
     t0 = time.time()
     title = ""
     final_url = url
     status = 0
     text = ""
+    html_doc = ""
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        try:
-            context_kwargs = {}
-            if user_agent:
-                context_kwargs["user_agent"] = user_agent
-            if not render_js:
-                context_kwargs["java_script_enabled"] = False
-
-            context = await browser.new_context(**context_kwargs)
-            page = await context.new_page()
-
-            # Conservative wait_until to get dynamic content when render_js=True
-            wait_until = "networkidle" if render_js else "domcontentloaded"
-            resp = await page.goto(url, wait_until=wait_until, timeout=timeout_ms)
-            if resp:
-                status = resp.status or 0
-                final_url = page.url
-
-            if wait_selector:
-                try:
-                    await page.wait_for_selector(wait_selector, timeout=timeout_ms)
-                except Exception:
-                    pass  # don't fail just because selector not found
+    async with get_scheduler().slot("browser"), get_browser_pool().page(render_js=render_js, user_agent=user_agent) as page:
+        # Conservative wait_until to get dynamic content when render_js=True
+        wait_until = "networkidle" if render_js else "domcontentloaded"
+        resp = await page.goto(url, wait_until=wait_until, timeout=timeout_ms)
+        if resp:
+            status = resp.status or 0
+            final_url = page.url
 
+        if wait_selector:
             try:
-                title = await page.title() or ""
+                await page.wait_for_selector(wait_selector, timeout=timeout_ms)
             except Exception:
-                title = ""
+                pass  # don't fail just because selector not found
 
-            # Prefer visible text; fall back to body textContent.
+        try:
+            title = await page.title() or ""
+        except Exception:
+            title = ""
+
+        # Main content of the rendered DOM; visible body text only if that yields nothing.
+        try:
+            html_doc = await page.content()
+        except Exception:
+            html_doc = ""
+        if not html_doc:
             try:
-                # inner_text("body") respects visibility better than content()
+                # inner_text("body") respects visibility better than textContent
                 text = await page.inner_text("body", timeout=2000)
             except Exception:
                 try:
@@ -87,19 +90,223 @@ async def playwright_web_read(
                 except Exception:
                     text = ""
 
-            text = _collapse_ws(text)
-            if len(text) > max_chars:
-                text = text[:max_chars]
-
-            return {
-                "title": title,
-                "final_url": final_url,
-                "status": status,
-                "text": text,
-                "elapsed_ms": int((time.time() - t0) * 1000),
-            }
-        finally:
-            try:
-                await browser.close()
-            except Exception:
-                pass
+    if html_doc:
+        add_bytes(len(html_doc.encode("utf-8")))
+        _, text, _ = extract_readable(html_doc) if len(html_doc) < 200_000 else await asyncio.to_thread(extract_readable, html_doc)
+    else:
+        add_bytes(len(text.encode("utf-8")))
+    text = _collapse_ws(text)
+    if len(text) > max_chars:
+        text = text[:max_chars]
+
+    return {
+        "title": title,
+        "final_url": final_url,
+        "status": status,
+        "text": text,
+        "elapsed_ms": int((time.time() - t0) * 1000),
+    }
+
+async def http_read(url: str, timeout_ms: int = HTTP_READ_TIMEOUT_MS, user_agent: Optional[str] = None) -> Dict[str, object]:
+    """
+    Fetch a page with the shared HTTP client and extract its main content in-process (no JS).
+    Adds "html" (raw markup) and "visible_chars" (text before boilerplate stripping), both for
+    escalation heuristics, and "content_type" to the usual shape.
+    """
+    t0 = time.time()
+    headers = {"User-Agent": user_agent or DEFAULT_UA, "Accept": "text/html,application/xhtml+xml,*/*;q=0.8"}
+    async with host_semaphore(url):
+        async with get_async_client().stream("GET", url, headers=headers, timeout=timeout_ms / 1000) as resp:
+            chunks, size = [], 0
+            async for chunk in resp.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= HTTP_READ_MAX_BYTES:
+                    break
+            body = b"".join(chunks)
+            encoding = resp.encoding or "utf-8"
+            status = resp.status_code
+            final_url = str(resp.url)
+            content_type = resp.headers.get("content-type", "").lower()
+    add_bytes(size)
+
+    doc = body.decode(encoding, errors="replace")
+    if "html" in content_type or not content_type:
+        # big documents are parsed off the event loop
+        title, text, visible = extract_readable(doc) if len(doc) < 200_000 else await asyncio.to_thread(extract_readable, doc)
+    elif content_type.startswith("text/") or "json" in content_type:
+        title, text, visible = "", doc, len(doc)
+    else:
+        title, text, doc, visible = "", "", "", 0  # binary (pdf, images, ...) - nothing to extract here
+    return {
+        "title": title,
+        "final_url": final_url,
+        "status": status,
+        "text": _collapse_ws(text),
+        "elapsed_ms": int((time.time() - t0) * 1000),
+        "html": doc,
+        "visible_chars": visible,
+        "content_type": content_type,
+    }
+
+async def read_page(
+    url: str,
+    wait_selector: Optional[str] = None,
+    render_js: bool = True,
+    timeout_ms: int = 120000,
+    max_chars: int = 200_000,
+    user_agent: Optional[str] = None,
+) -> Dict[str, object]:
+    """
+    Tiered page read: plain HTTP first, headless browser only when the page needs it.
+
+    Escalates to the browser when a wait_selector is given, the HTTP fetch fails or is
+    bot-walled, or (with render_js) the body looks client-side rendered. Returns the
+    playwright_web_read shape plus "tier" ("http", "browser" or "cache"). Successful reads are
+    disk-cached by canonical URL (reads with a wait_selector bypass the cache).
+    """
+    t0 = time.time()
+    key = None
+    if not wait_selector:
+        key = cache_key(canonical_url(url), render_js, EXTRACTOR_VERSION)
+        cached = await cache_get("page", key)
+        # a cached read truncated below what the caller allows is not good enough
+        if cached is not None and (not cached["truncated"] or len(cached["text"]) >= max_chars):
+            out = {**cached, "text": cached["text"][:max_chars], "tier": "cache", "elapsed_ms": int((time.time() - t0) * 1000)}
+            out.pop("truncated", None)
+            return out
+
+    out = await _read_page_uncached(url, wait_selector=wait_selector, render_js=render_js,
+                                    timeout_ms=timeout_ms, max_chars=max_chars, user_agent=user_agent)
+    bump(f"pages_{out['tier']}")
+    if key is not None and out["status"] < 400 and out["text"]:
+        entry = {**out, "truncated": len(out["text"]) >= max_chars}
+        await cache_set("page", key, entry)
+        final_key = cache_key(canonical_url(out["final_url"]), render_js, EXTRACTOR_VERSION)
+        if final_key != key:  # redirected: later links straight to the final URL hit too
+            await cache_set("page", final_key, entry)
+    out["elapsed_ms"] = int((time.time() - t0) * 1000)
+    return out
+
+async def read_document(
+    url: str,
+    wait_selector: Optional[str] = None,
+    render_js: bool = True,
+    timeout_ms: int = 120000,
+    max_chars: int = 200_000,
+    user_agent: Optional[str] = None,
+) -> Dict[str, object]:
+    """
+    `read_page` behind the process-wide document store: one fetch per canonical URL (or
+    redirect alias) shared by every section and concurrent caller. Hits have tier "store".
+    Reads with a wait_selector go straight to the page.
+    """
+    store = get_doc_store()
+    if store is None or wait_selector:
+        return await read_page(url, wait_selector=wait_selector, render_js=render_js, timeout_ms=timeout_ms,
+                               max_chars=max_chars, user_agent=user_agent)
+    return await store.fetch(
+        url,
+        lambda: read_page(url, render_js=render_js, timeout_ms=timeout_ms, max_chars=max_chars, user_agent=user_agent),
+        render_js=render_js,
+        max_chars=max_chars,
+    )
+
+def page_is_stored(url: str, render_js: bool = True) -> bool:
+    """Whether a read of `url` would be served from the document store (no page budget spent)."""
+    store = get_doc_store()
+    return store is not None and store.has(url, render_js)
+
+async def _read_page_uncached(
+    url: str,
+    wait_selector: Optional[str] = None,
+    render_js: bool = True,
+    timeout_ms: int = 120000,
+    max_chars: int = 200_000,
+    user_agent: Optional[str] = None,
+) -> Dict[str, object]:
+    t0 = time.time()
+    res = None
+    if not wait_selector:
+        try:
+            res = await http_read(url, timeout_ms=min(timeout_ms, HTTP_READ_TIMEOUT_MS), user_agent=user_agent)
+        except Exception as e:
+            print(f"[web_read] http tier failed for {url}: {e}")
+
+    escalate = (
+        res is None
+        or res["status"] in _ESCALATE_STATUS
+        or (render_js and res["html"] and looks_js_rendered(res["html"], res["visible_chars"]))
+    )
+    if escalate:
+        if res is not None:
+            bump("pages_escalations")
+        try:
+            out = await browser_read(url, wait_selector=wait_selector, render_js=render_js,
+                                     timeout_ms=timeout_ms, max_chars=max_chars, user_agent=user_agent)
+            out["tier"] = "browser"
+            out["elapsed_ms"] = int((time.time() - t0) * 1000)
+            return out
+        except Exception as e:
+            if res is None:
+                raise
+            print(f"[web_read] browser tier failed for {url}, keeping http result: {e}")
+
+    text = res["text"]
+    if len(text) > max_chars:
+        text = text[:max_chars]
+    return {
+        "title": res["title"],
+        "final_url": res["final_url"],
+        "status": res["status"],
+        "text": text,
+        "elapsed_ms": int((time.time() - t0) * 1000),
+        "tier": "http",
+    }
+
+@function_tool
+async def playwright_web_read(
+    url: str,
+    wait_selector: Optional[str] = None,
+    render_js: bool = True,
+    timeout_ms: int = 120000,
+    max_chars: int = 200_000,
+    user_agent: Optional[str] = None,
+    query: Optional[str] = None,
+    top_k: int = 6,
+) -> Dict[str, object]:
+    """
+    Fetch the main content of a page (navigation, banners and footers stripped).
+    Args:
+      url: The URL to visit.
+      wait_selector: CSS selector to wait for (optional).
+      render_js: If False, disable JS for faster loads on static pages.
+      timeout_ms: Overall nav+wait timeout.
+      max_chars: Truncate returned text to avoid huge payloads.
+      user_agent: Optional UA string.
+      query: Optional query or claim; if given, only the top_k most relevant passages are returned.
+      top_k: Passages to return with a query.
+    Returns:
+      { "title", "final_url", "status", "text", "elapsed_ms", "tier" } plus, with a query,
+      "chunks_returned" and "chunks_total"
+    """
+    async with span("playwright_web_read", kind="tool") as s:
+        budget = current_budget()
+        refused = budget.take_page() if budget is not None and not page_is_stored(url, render_js) else None
+        if refused:
+            s.attrs["refused"] = refused
+            return {"title": "", "final_url": url, "status": None, "text": "", "elapsed_ms": 0, "tier": None,
+                    "error": f"page budget reached ({refused}); do not open more pages"}
+        out = await read_document(
+            url,
+            wait_selector=wait_selector,
+            render_js=render_js,
+            timeout_ms=timeout_ms,
+            max_chars=max_chars,
+            user_agent=user_agent,
+        )
+        s.attrs["tier"] = out.get("tier")
+        if query and out.get("text"):
+            text, kept, total = select_relevant(out["text"], query, top_k=max(1, top_k))
+            out = {**out, "text": text, "chunks_returned": kept, "chunks_total": total}
+        return out
@@ -1,15 +1,20 @@
 # tools/serper_tool.py
-import os, requests, html
-from this import d
+import os, html, asyncio, threading
 from typing import Literal, Optional, Dict, Any, List, TypedDict
 from agents import function_tool   # from OpenAI Agents SDK (python)
 from dotenv import load_dotenv
 from copy import deepcopy
+from tools.http_client import get_async_client, host_semaphore, aclose_client
+from disk_cache import cache_key, cache_get, cache_set
+from run_context import current_run
+from scheduler import get_scheduler
+from instrumentation import span, add_bytes
+from depth import current_budget
 
 load_dotenv(override=True)
 
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
-SERPER_BASE = "https://google.serper.dev"
+SERPER_BASE = os.getenv("SERPER_BASE", "https://google.serper.dev")
 
 class SerperItem(TypedDict, total=False):
     title: str
@@ -35,16 +40,19 @@ def _log_empty_debug(query: str, data: Dict[str, Any]) -> None:
     except Exception:
         pass
 
-def _http_post(endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+async def _http_post(endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     if not SERPER_API_KEY:
         raise RuntimeError("SERPER_API_KEY not set")
-    resp = requests.post(
-        f"{SERPER_BASE}/{endpoint}",
-        headers={"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"},
-        json=payload,
-        timeout=20,
-    )
+    url = f"{SERPER_BASE}/{endpoint}"
+    async with get_scheduler().slot("search"), host_semaphore(url):
+        resp = await get_async_client().post(
+            url,
+            headers={"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"},
+            json=payload,
+            timeout=20,
+        )
     resp.raise_for_status()
+    add_bytes(len(resp.content))
     return resp.json()
 
 def _normalize_search(data: Dict[str, Any]) -> List[SerperItem]:
@@ -75,8 +83,7 @@ def _normalize_news(data: Dict[str, Any]) -> List[SerperItem]:
         })
     return items
 
-@function_tool
-def serper_search(
+async def serper_query(
     q: str,
     kind: Literal["search", "news"] = "search",
     num: int = 10,
@@ -85,26 +92,34 @@ def serper_search(
     hl: str = "en",
     tbs: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """
-    Google web/news search via Serper.dev.
+    """Undecorated Serper search used by `serper_search` and by in-code callers (disk-cached)."""
+    endpoint = "news" if kind == "news" else "search"
+    # operators (OR, site:, quotes) are case/quote sensitive, so only whitespace is normalized
+    key = cache_key(endpoint, " ".join(q.split()), num, page, gl, hl, tbs or "")
+    cached = await cache_get("search", key)
+    if cached is not None:
+        return cached
 
-    Args:
-      q: The search query (use operators like site:, filetype:, OR, -term, "exact").
-      kind: "search" (standard web) or "news".
-      num: Number of results to return (1–20 typical).
-      page: Results page (1-based).
-      gl: Country code (e.g., "us","gb","in","de").
-      hl: Interface language (e.g., "en","de","ja").
-      tbs: Optional Google time filter (e.g., "qdr:d","qdr:w","qdr:m").
-    Returns:
-      JSON with {"kind","query","items":[{title,link,snippet,source?,date?,position?}], "raw":{...}}
-    """
+    result = await _serper_query_uncached(q, kind=kind, num=num, page=page, gl=gl, hl=hl, tbs=tbs)
+    if result["items"]:
+        await cache_set("search", key, result)
+    return result
+
+async def _serper_query_uncached(
+    q: str,
+    kind: Literal["search", "news"] = "search",
+    num: int = 10,
+    page: int = 1,
+    gl: str = "us",
+    hl: str = "en",
+    tbs: Optional[str] = None,
+) -> Dict[str, Any]:
     payload = {"q": q, "num": num, "page": page, "gl": gl, "hl": hl}
     if tbs:
         payload["tbs"] = tbs
 
     endpoint = "news" if kind == "news" else "search"
-    data = _http_post(endpoint, payload)
+    data = await _http_post(endpoint, payload)
 
     items = _normalize_news(data) if kind == "news" else _normalize_search(data)
     # basic HTML unescape on snippets
@@ -117,7 +132,7 @@ def serper_search(
         q_relaxed = _dequote(q)
         payload_new = deepcopy(payload)
         payload_new["q"] = q_relaxed
-        data2 = _http_post(endpoint, payload_new)
+        data2 = await _http_post(endpoint, payload_new)
         items2 = _normalize_news(data2) if kind == "news" else _normalize_search(data2)
         if items2:
             for it in items2:
@@ -131,3 +146,94 @@ def serper_search(
             }
 
     return {"kind": kind, "query": q, "items": items, "raw": {"meta": {k: data.get(k) for k in ("knowledgeGraph","answerBox","topStories","peopleAlsoAsk")}}}
+
+
+@function_tool
+async def serper_search(
+    q: str,
+    kind: Literal["search", "news"] = "search",
+    num: int = 10,
+    page: int = 1,
+    gl: str = "us",
+    hl: str = "en",
+    tbs: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Google web/news search via Serper.dev.
+
+    Args:
+      q: The search query (use operators like site:, filetype:, OR, -term, "exact").
+      kind: "search" (standard web) or "news".
+      num: Number of results to return (1–20 typical).
+      page: Results page (1-based).
+      gl: Country code (e.g., "us","gb","in","de").
+      hl: Interface language (e.g., "en","de","ja").
+      tbs: Optional Google time filter (e.g., "qdr:d","qdr:w","qdr:m").
+    Returns:
+      JSON with {"kind","query","items":[{title,link,snippet,source?,date?,position?}], "raw":{...}}
+    """
+    return await section_search(q, kind=kind, num=num, page=page, gl=gl, hl=hl, tbs=tbs)
+
+
+async def section_search(
+    q: str,
+    kind: Literal["search", "news"] = "search",
+    num: int = 10,
+    page: int = 1,
+    gl: str = "us",
+    hl: str = "en",
+    tbs: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    One search on behalf of the current section: charged to its depth budget and shared with
+    the other sections through the run's query broker. Used by the `serper_search` tool and
+    by the in-code search executor.
+    """
+    async with span("serper_search", kind="tool") as s:
+        budget = current_budget()
+        refused = budget.take_query() if budget is not None else None
+        if refused:
+            s.attrs["refused"] = refused
+            return {"kind": kind, "query": q, "items": [],
+                    "error": f"search budget reached ({refused}); stop searching and use the results you already have"}
+        run = current_run()
+        if run is not None and run.query_broker is not None:
+            # share/single-flight overlapping queries with the other sections of this run
+            out = await run.query_broker.search(q, kind=kind, num=num, page=page, gl=gl, hl=hl, tbs=tbs)
+        else:
+            out = await serper_query(q, kind=kind, num=num, page=page, gl=gl, hl=hl, tbs=tbs)
+        if budget is not None:
+            s.attrs["new_sources"] = budget.record_results(i.get("link", "") for i in out.get("items", []))
+        return out
+
+
+def serper_search_sync(q: str, **kwargs) -> Dict[str, Any]:
+    """
+    Blocking shim for scripts and sync callers. Runs the async client on a private loop,
+    in a helper thread when the caller is already inside an event loop.
+    """
+    async def _once():
+        try:
+            return await serper_query(q, **kwargs)
+        finally:
+            await aclose_client()
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_once())
+
+    result: Dict[str, Any] = {}
+
+    def _worker():
+        try:
+            result["value"] = asyncio.run(_once())
+        except BaseException as e:  # re-raised in the caller's thread
+            result["error"] = e
+
+    t = threading.Thread(target=_worker, daemon=True)
+    t.start()
+    t.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
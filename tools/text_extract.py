@@ -0,0 +1,337 @@
+# tools/text_extract.py
+import math
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Elements whose content is never visible text.
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe", "object"}
+# Elements that start a new line in rendered text.
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tr", "ul", "td", "th",
+}
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# Markers of client-side rendered apps whose server HTML carries little content.
+_SPA_MARKERS = re.compile(
+    r'id=["\'](?:root|app|__next|__nuxt|___gatsby)["\']\s*>\s*</div>'
+    r'|window\.__NUXT__|ng-version=|data-reactroot|<app-root',
+    re.I,
+)
+# Bumped whenever extraction output changes, so cached page reads of the old format are not reused.
+EXTRACTOR_VERSION = 3
+_NEEDS_JS = re.compile(r"(enable|turn on)\s+javascript|javascript (is )?(required|disabled)", re.I)
+
+
+class _TextParser(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title_parts: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag in _SKIP_TAGS and tag not in _VOID_TAGS:
+            self._skip_depth += 1
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+        elif not self._skip_depth:
+            self.parts.append(data)
+
+
+def extract_text(html_doc: str) -> Tuple[str, str]:
+    """Return (title, visible_text) from raw HTML without a browser. Whitespace is not collapsed."""
+    parser = _TextParser()
+    try:
+        parser.feed(html_doc or "")
+        parser.close()
+    except Exception:
+        pass  # keep whatever was parsed before the markup broke
+    title = " ".join("".join(parser.title_parts).split())
+    return title, "".join(parser.parts)
+
+
+def looks_js_rendered(html_doc: str, visible_chars: int, min_chars: int = 400) -> bool:
+    """Heuristic: does this page need a real browser to show its content? (visible_chars: all visible text)"""
+    n = visible_chars
+    if n < min_chars:
+        return True
+    if n < 2000 and (_SPA_MARKERS.search(html_doc) or _NEEDS_JS.search(html_doc)):
+        return True
+    return False
+
+
+# ------------- Readable main content -------------
+
+# Elements that are page chrome wherever they appear (header/footer only outside article/main).
+_CHROME_TAGS = {"nav", "aside", "form", "button", "select", "dialog", "menu"}
+_PAGE_CHROME_TAGS = {"header", "footer"}
+# class/id/role words of navigation, consent banners, ads and other boilerplate.
+_CHROME_WORDS = {
+    "nav", "navbar", "navigation", "menu", "breadcrumb", "breadcrumbs", "sidebar", "footer", "masthead",
+    "cookie", "cookies", "consent", "gdpr", "banner", "newsletter", "subscribe", "signup", "promo", "advert",
+    "ad", "ads", "advertisement", "sponsored", "social", "share", "sharing", "related", "recommended", "comments",
+    "comment", "popup", "modal", "overlay", "skip", "toolbar", "pagination", "widget", "outbrain", "taboola",
+}
+_CHROME_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog", "menu", "alert"}
+_HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+_ATTR_SPLIT = re.compile(r"[^a-z0-9]+")
+_SENTENCE_END = re.compile(r"[.!?:;\"')\]]$")
+
+MIN_BLOCK_WORDS = 7
+MAX_LINK_DENSITY = 0.5
+CHUNK_WORDS = 120
+
+
+class _Block(NamedTuple):
+    text: str
+    words: int
+    link_density: float
+    in_main: bool
+    heading: bool
+    table_row: bool
+
+
+def _is_chrome(tag: str, attrs, in_main: bool) -> bool:
+    if tag in _CHROME_TAGS or (tag in _PAGE_CHROME_TAGS and not in_main):
+        return True
+    for name, value in attrs:
+        # boolean attributes: a bare `hidden` / `aria-hidden` has no value but still hides
+        if name == "hidden" or (name == "aria-hidden" and (value or "true").lower() == "true"):
+            return True
+        if not value:
+            continue
+        if name == "role" and value.lower() in _CHROME_ROLES:
+            return True
+        if name in ("class", "id") and _CHROME_WORDS.intersection(_ATTR_SPLIT.split(value.lower())):
+            return True
+    return False
+
+
+class _ReadableParser(HTMLParser):
+    """Splits a page into text blocks with the features boilerplate detection needs."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[_Block] = []
+        self.title_parts: List[str] = []
+        self.visible_chars = 0
+        self._stack: List[Tuple[str, bool, bool]] = []  # (tag, opened chrome, opened main)
+        self._chrome = 0
+        self._main = 0
+        self._skip = 0
+        self._link = 0
+        self._in_title = False
+        self._parts: List[str] = []
+        self._link_chars = 0
+        self._heading = False
+        self._row = False
+
+    def _flush(self) -> None:
+        text = " ".join("".join(self._parts).split())
+        if text:
+            chars = len(text)
+            self.blocks.append(_Block(text, len(text.split()), min(1.0, self._link_chars / chars),
+                                      self._main > 0, self._heading, self._row))
+        self._parts, self._link_chars, self._heading, self._row = [], 0, False, False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+            return
+        if tag in _SKIP_TAGS and tag not in _VOID_TAGS:
+            self._skip += 1
+            return
+        if tag in ("td", "th"):
+            # table rows are one block ("Founded | 2019"), so key/value tables survive as facts
+            if self._parts:
+                self._parts.append(" | ")
+            self._row = True
+        elif tag in _BLOCK_TAGS or tag in _HEADING_TAGS:
+            self._flush()
+        if tag in _VOID_TAGS:
+            return
+        chrome = not self._chrome and _is_chrome(tag, attrs, self._main > 0)
+        main = tag in ("article", "main") or any(n == "role" and (v or "").lower() == "main" for n, v in attrs)
+        self._chrome += chrome
+        self._main += main
+        self._stack.append((tag, chrome, main))
+        if tag == "a":
+            self._link += 1
+        if tag in _HEADING_TAGS:
+            self._heading = True
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+            return
+        if tag in _SKIP_TAGS and tag not in _VOID_TAGS:
+            self._skip = max(0, self._skip - 1)
+            return
+        if (tag in _BLOCK_TAGS or tag in _HEADING_TAGS) and tag not in ("td", "th"):
+            self._flush()
+        # close up to the matching start tag; unmatched end tags are ignored
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                for t, chrome, main in self._stack[i:]:
+                    self._chrome -= chrome
+                    self._main -= main
+                    if t == "a":
+                        self._link = max(0, self._link - 1)
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+        elif not self._skip:
+            self.visible_chars += len(data.strip())
+            if not self._chrome:
+                self._parts.append(data)
+                if self._link:
+                    self._link_chars += len(" ".join(data.split()))
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _select_blocks(blocks: List[_Block]) -> List[_Block]:
+    # an <article>/<main> region with real content wins; otherwise judge every block on its own
+    main = [b for b in blocks if b.in_main]
+    if sum(b.words for b in main if not b.heading) >= 50:
+        blocks = main
+    kept = []
+    for i, b in enumerate(blocks):
+        if b.link_density > MAX_LINK_DENSITY:
+            continue
+        if b.heading:
+            # headings only when followed by content
+            nxt = blocks[i + 1] if i + 1 < len(blocks) else None
+            if nxt is not None and not nxt.heading and nxt.words >= MIN_BLOCK_WORDS:
+                kept.append(b)
+        elif b.words >= MIN_BLOCK_WORDS or (b.words >= 3 and _SENTENCE_END.search(b.text)) or (b.table_row and b.words >= 2):
+            kept.append(b)
+    return kept
+
+
+def extract_readable(html_doc: str) -> Tuple[str, str, int]:
+    """
+    Return (title, main_text, visible_chars) from raw HTML.
+
+    Drops page chrome (nav, header/footer outside the article, asides, forms, cookie/consent
+    and ad containers by class/id/role) and link-heavy or fragmentary blocks; when the page
+    has an <article>/<main> region with content, only that region is kept. Paragraphs of
+    main_text are separated by blank lines, ready for `chunk_text`. visible_chars counts all
+    visible text before stripping (for `looks_js_rendered`). Falls back to all visible text
+    when stripping leaves almost nothing.
+    """
+    parser = _ReadableParser()
+    try:
+        parser.feed(html_doc or "")
+        parser.close()
+    except Exception:
+        pass  # keep whatever was parsed before the markup broke
+    title = " ".join("".join(parser.title_parts).split())
+    main_text = "\n\n".join(b.text for b in _select_blocks(parser.blocks))
+    if len(main_text) < 200 and parser.visible_chars > 1000:
+        _, text = extract_text(html_doc)
+        main_text = text
+    return title, main_text, parser.visible_chars
+
+
+# ------------- Chunking and relevance -------------
+
+_TERM_RE = re.compile(r"\w+")
+_QUERY_STOPWORDS = {
+    "a", "an", "the", "of", "to", "in", "on", "for", "and", "or", "by", "with", "is", "are", "was", "were",
+    "its", "it", "that", "as", "at", "from", "be", "this", "these", "than", "vs",
+}
+
+
+def chunk_text(text: str, chunk_words: int = CHUNK_WORDS) -> List[str]:
+    """Split paragraph-separated text into chunks of about `chunk_words` words, never mid-paragraph
+    unless a single paragraph is longer than that."""
+    chunks, current, n = [], [], 0
+    for para in re.split(r"\n\s*\n", text or ""):
+        words = para.split()
+        if not words:
+            continue
+        if n and n + len(words) > chunk_words:
+            chunks.append("\n\n".join(current))
+            current, n = [], 0
+        while len(words) > chunk_words * 2:
+            chunks.append(" ".join(words[:chunk_words]))
+            words = words[chunk_words:]
+        current.append(" ".join(words))
+        n += len(words)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _terms(text: str) -> List[str]:
+    return [t for t in _TERM_RE.findall(text.lower()) if t not in _QUERY_STOPWORDS]
+
+
+def rank_chunks(chunks: List[str], query: Optional[str] = None) -> List[Dict[str, object]]:
+    """
+    Chunks as [{"index", "score", "text"}], best first.
+
+    With a query (or claim), chunks are scored by BM25 over the query terms, so a quote's
+    surrounding passage ranks first; without one, earlier chunks rank higher (lead content).
+    """
+    if not query or not _terms(query):
+        return [{"index": i, "score": round(1.0 / (1 + i), 3), "text": c} for i, c in enumerate(chunks)]
+    q_terms = set(_terms(query))
+    docs = [_terms(c) for c in chunks]
+    n = len(docs)
+    avg_len = sum(len(d) for d in docs) / n if n else 0
+    df = {t: sum(1 for d in docs if t in d) for t in q_terms}
+    k1, b = 1.2, 0.75
+    ranked = []
+    for i, (chunk, d) in enumerate(zip(chunks, docs)):
+        tf: Dict[str, int] = {}
+        for t in d:
+            if t in q_terms:
+                tf[t] = tf.get(t, 0) + 1
+        score = 0.0
+        for t, f in tf.items():
+            idf = math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5))
+            score += idf * f * (k1 + 1) / (f + k1 * (1 - b + b * len(d) / (avg_len or 1)))
+        ranked.append({"index": i, "score": round(score, 3), "text": chunk})
+    ranked.sort(key=lambda c: (-c["score"], c["index"]))
+    return ranked
+
+
+def select_relevant(text: str, query: str, top_k: int = 6) -> Tuple[str, int, int]:
+    """(text of the top_k chunks for `query` in document order, chunks kept, chunks total)."""
+    chunks = chunk_text(text)
+    top = [c for c in rank_chunks(chunks, query)[:top_k] if c["score"] > 0] or rank_chunks(chunks)[:top_k]
+    top.sort(key=lambda c: c["index"])
+    return "\n\n".join(c["text"] for c in top), len(top), len(chunks)
@@ -1,5 +1,6 @@
 import os, json, uuid
 from typing import Any, Dict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 def parse_json(maybe_json: Any) -> Dict:
     """Accept dict or JSON string; return dict. If model returned prose, try to extract JSON fallback."""
@@ -33,6 +34,45 @@ def ensure_keys(d: Dict, required: Dict[str, Any]) -> Dict:
 def new_id(prefix="s"):
     return f"{prefix}{uuid.uuid4().hex[:8]}"
 
+_TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "dclid", "yclid", "mc_cid", "mc_eid", "igshid", "ref_src", "_hsenc", "_hsmi"}
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL for keying: lowercase host (no www./default port), no fragment or tracking params, sorted query."""
+    try:
+        parts = urlsplit((url or "").strip())
+    except ValueError:
+        return url or ""
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    port = parts.port if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)) else None
+    netloc = f"{host}:{port}" if port else host
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+_SECOND_LEVEL = {"co", "com", "ac", "gov", "edu", "org", "net", "or", "ne", "go"}
+
+def root_domain(url: str) -> str:
+    """Registrable domain of a URL's host ("news.bbc.co.uk" -> "bbc.co.uk"); a bare host is accepted too."""
+    host = urlsplit(url if "//" in (url or "") else f"//{url or ''}").hostname or ""
+    labels = host.lower().split(".")
+    if labels and labels[0] == "www":
+        labels = labels[1:]
+    keep = 3 if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL else 2
+    return ".".join(labels[-keep:])
+
+def estimate_tokens(obj: Any) -> int:
+    """Cheap token estimate (~4 chars/token) for budgeting; not a tokenizer."""
+    s = obj if isinstance(obj, str) else json.dumps(obj, ensure_ascii=False, default=str)
+    return len(s) // 4 + 1
+
 def as_messages(payload: Dict) -> list:
     """Convert a dict payload to a single user message so Runner.run can .extend(...)."""
     return [{"role": "user", "content": json.dumps(payload, ensure_ascii=False)}]
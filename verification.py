@@ -0,0 +1,170 @@
+import asyncio
+import os
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from depth import current_budget
+from fact_dedup import fact_sources
+from instrumentation import span
+from run_context import bump
+from tools.playwright_tool import page_is_stored, read_document
+from utils import canonical_url
+
+# Verification stage between researcher and analyst: every distinct source page of the
+# section's facts is fetched once, concurrently, and each fact's evidence quote is matched
+# against the page text in-process. The analyst then works from the annotations and page
+# excerpts instead of opening pages itself.
+VERIFY_SOURCES = os.getenv("VERIFY_SOURCES", "1") not in ("0", "false", "False", "")
+VERIFY_CONCURRENCY = int(os.getenv("VERIFY_CONCURRENCY", "8"))
+VERIFY_TIMEOUT_MS = int(os.getenv("VERIFY_TIMEOUT_MS", "20000"))
+VERIFY_MAX_CHARS = 400_000
+# Share of the evidence's word trigrams that must appear on the page for a paraphrased or
+# re-punctuated quote to count as verified.
+VERIFY_MIN_SCORE = float(os.getenv("VERIFY_MIN_SCORE", "0.6"))
+EXCERPT_CHARS = 320
+
+VERIFIED, UNVERIFIED, UNREACHABLE, UNCHECKED = "verified", "unverified", "unreachable", "unchecked"
+
+_WORD_RE = re.compile(r"\w+")
+_NUM_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_PUNCT_MAP = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"',
+                            "–": "-", "—": "-", " ": " ", "…": "..."})
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").translate(_PUNCT_MAP)
+    return " ".join(text.split())
+
+
+class PageIndex:
+    """Normalized text of one fetched page with a word-trigram set for fuzzy quote matching."""
+
+    def __init__(self, text: str) -> None:
+        self.text = _normalize(text)
+        self.lower = self.text.lower()
+        if len(self.lower) != len(self.text):  # lower() changed lengths; excerpt from the lowered text
+            self.text = self.lower
+        words = _WORD_RE.findall(self.lower)
+        self.words: Set[str] = set(words)
+        self.trigrams: Set[Tuple[str, ...]] = set(zip(words, words[1:], words[2:]))
+        self.numbers: Set[str] = {n.replace(",", "") for n in _NUM_RE.findall(self.lower)}
+
+    def excerpt(self, pos: int, length: int) -> str:
+        pad = max(0, (EXCERPT_CHARS - length) // 2)
+        start, end = max(0, pos - pad), min(len(self.text), pos + length + pad)
+        return ("…" if start else "") + self.text[start:end] + ("…" if end < len(self.text) else "")
+
+    def match(self, evidence: str) -> Tuple[float, Optional[str]]:
+        """(score in 0..1, page excerpt around the match or None)."""
+        quote = _normalize(evidence).lower().strip(" \"'.…")
+        if not quote:
+            return 0.0, None
+        pos = self.lower.find(quote)
+        if pos >= 0:
+            return 1.0, self.excerpt(pos, len(quote))
+
+        words = _WORD_RE.findall(quote)
+        # a quote whose figures are not on the page is not verified, however similar the prose
+        numbers = {n.replace(",", "") for n in _NUM_RE.findall(quote)}
+        if numbers - self.numbers:
+            return 0.0, None
+        if len(words) < 3:
+            hits = [w for w in words if w in self.words]
+            return len(hits) / max(1, len(words)), None
+        grams = list(zip(words, words[1:], words[2:]))
+        hits = [g for g in grams if g in self.trigrams]
+        score = len(hits) / len(grams)
+        excerpt = None
+        if hits:
+            m = re.search(r"\W+".join(map(re.escape, hits[0])), self.lower)
+            if m:
+                excerpt = self.excerpt(m.start(), m.end() - m.start())
+        return score, excerpt
+
+
+async def _fetch(url: str, sem: asyncio.Semaphore) -> Tuple[Optional[PageIndex], Optional[str]]:
+    """(page index, None) or (None, why the page could not be checked)."""
+    budget = current_budget()
+    refused = budget.take_page() if budget is not None and not page_is_stored(url) else None
+    if refused:
+        return None, f"page budget reached ({refused})"
+    async with sem:
+        try:
+            page = await asyncio.wait_for(
+                read_document(url, render_js=True, timeout_ms=VERIFY_TIMEOUT_MS, max_chars=VERIFY_MAX_CHARS),
+                timeout=VERIFY_TIMEOUT_MS / 1000 * 2,
+            )
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"[:200]
+    if (page.get("status") or 0) >= 400 or not page.get("text"):
+        return None, f"HTTP {page.get('status')}" if page.get("status") else "empty page"
+    text = page["text"]
+    # trigram indexing of very large pages would stall the event loop
+    index = PageIndex(text) if len(text) < 100_000 else await asyncio.to_thread(PageIndex, text)
+    return index, None
+
+
+async def verify_facts(facts: List[Dict[str, Any]], section: str = "") -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Annotate `facts` in place with a `verification` status and return (facts, stats).
+
+    Every distinct source URL (source_url plus merged source_urls) is read once through the
+    bounded pool, most-cited first so a tight page budget checks the pages that matter most.
+    Per fact: "verified" when any source page contains the evidence quote (score >=
+    VERIFY_MIN_SCORE, with an excerpt of the page around it), "unverified" when the pages were
+    read but the quote was not found, "unreachable" when no source page could be read, and
+    "unchecked" when the page budget ran out first. Facts that already carry a verification
+    (restored from a checkpoint) are left as they are.
+    """
+    todo = [f for f in facts if "verification" not in f]
+    stats: Dict[str, Any] = {VERIFIED: 0, UNVERIFIED: 0, UNREACHABLE: 0, UNCHECKED: 0, "pages": 0}
+    if not todo:
+        return facts, stats
+
+    cites: Dict[str, int] = {}
+    url_for: Dict[str, str] = {}
+    for f in todo:
+        for url in fact_sources(f):
+            key = canonical_url(url)
+            if key:
+                cites[key] = cites.get(key, 0) + 1
+                url_for.setdefault(key, url)
+    keys = sorted(cites, key=cites.get, reverse=True)
+
+    async with span("verify_sources", kind="tool", section=section or None, urls=len(keys)) as s:
+        sem = asyncio.Semaphore(max(1, VERIFY_CONCURRENCY))
+        fetched = await asyncio.gather(*(_fetch(url_for[k], sem) for k in keys))
+        pages = dict(zip(keys, fetched))
+
+        for f in todo:
+            best_score, best_excerpt, best_url, errors = 0.0, None, None, []
+            read_any = False
+            for url in fact_sources(f):
+                index, error = pages.get(canonical_url(url), (None, "no url"))
+                if index is None:
+                    errors.append(error)
+                    continue
+                read_any = True
+                score, excerpt = index.match(str(f.get("evidence") or f.get("claim") or ""))
+                if score > best_score:
+                    best_score, best_excerpt, best_url = score, excerpt, url
+            if read_any:
+                status = VERIFIED if best_score >= VERIFY_MIN_SCORE else UNVERIFIED
+            elif errors and all(e and e.startswith("page budget") for e in errors):
+                status = UNCHECKED
+            else:
+                status = UNREACHABLE
+            f["verification"] = status
+            f["verification_score"] = round(best_score, 2)
+            if status == VERIFIED:
+                f["verified_url"] = best_url
+                if best_excerpt:
+                    f["page_excerpt"] = best_excerpt
+            stats[status] += 1
+
+        stats["pages"] = sum(1 for index, _ in fetched if index is not None)
+        for status in (VERIFIED, UNVERIFIED, UNREACHABLE, UNCHECKED):
+            bump(f"facts_{status}", stats[status])
+        s.attrs.update(stats)
+    return facts, stats